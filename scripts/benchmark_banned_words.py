@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark banned words AutoMod: loop substring lama vs matcher regex trie
+Jalankan dari root project: python scripts/benchmark_banned_words.py
+"""
+
+import random
+import string
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.word_matcher import BannedWordMatcher
+
+def loop_check(words, wildcards, content: str) -> str:
+    """Implementasi lama: substring test per kata dan per wildcard"""
+    content_lower = content.lower()
+    for word in words:
+        if word in content_lower:
+            return word
+    for pattern in wildcards:
+        if pattern.lower() in content_lower:
+            return pattern
+    return ""
+
+def random_word(rng: random.Random) -> str:
+    return ''.join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(4, 10)))
+
+def main():
+    rng = random.Random(42)
+    messages = [
+        ' '.join(random_word(rng) for _ in range(rng.randint(5, 40)))
+        for _ in range(500)
+    ]
+    for size in (100, 1000, 5000):
+        words = {random_word(rng) for _ in range(size)}
+        wildcards = [f"{random_word(rng)[:3]}*{random_word(rng)[:3]}" for _ in range(20)]
+
+        start = timeit.default_timer()
+        matcher = BannedWordMatcher(words, wildcards)
+        build_ms = (timeit.default_timer() - start) * 1000
+
+        results = {
+            'loop': lambda: [loop_check(words, wildcards, m) for m in messages],
+            'matcher': lambda: [matcher.search(m) for m in messages],
+        }
+        print(f"{size} kata + {len(wildcards)} wildcard (kompilasi {build_ms:.1f} ms, {len(messages)} pesan per run):")
+        for name, func in results.items():
+            best = min(timeit.repeat(func, number=3, repeat=3)) / 3
+            print(f"  {name:<8} {best / len(messages) * 1e6:10.2f} us/pesan")
+
+if __name__ == "__main__":
+    main()
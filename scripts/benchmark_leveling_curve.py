@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark kurva leveling: loop linear lama vs tabel bisect vs invers kuadratik
+Jalankan dari root project: python scripts/benchmark_leveling_curve.py
+"""
+
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from src.utils.leveling_curve import DEFAULT_CURVE
+
+def loop_level_for_xp(xp: int) -> int:
+    """Implementasi lama: naikkan level satu per satu"""
+    level = 0
+    while DEFAULT_CURVE.xp_for_level(level + 1) <= xp:
+        level += 1
+    return level
+
+def main():
+    rng = random.Random(42)
+    for max_level in (10, 100, 500):
+        max_xp = DEFAULT_CURVE.xp_for_level(max_level)
+        samples = [rng.randrange(max_xp) for _ in range(1000)]
+        assert all(loop_level_for_xp(xp) == DEFAULT_CURVE.level_for_xp(xp) for xp in samples)
+
+        results = {
+            'loop': lambda: [loop_level_for_xp(xp) for xp in samples],
+            'bisect': lambda: [DEFAULT_CURVE.level_for_xp(xp) for xp in samples],
+            'closed_form': lambda: [DEFAULT_CURVE._solve(xp) for xp in samples],
+        }
+        print(f"Level sampai {max_level} ({len(samples)} lookup per run):")
+        for name, func in results.items():
+            best = min(timeit.repeat(func, number=10, repeat=5)) / 10
+            print(f"  {name:<12} {best / len(samples) * 1e6:8.3f} us/lookup")
+
+if __name__ == "__main__":
+    main()
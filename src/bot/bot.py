@@ -7,7 +7,8 @@ import discord
 from discord.ext import commands
 import asyncio
 import logging
-from typing import Optional
+import time
+from typing import Dict, Optional
 
 from src.bot.config import config_manager
 from src.bot.logging import logging_manager
@@ -15,6 +16,7 @@ from src.bot.hot_reload import HotReloadManager
 from src.bot.module_loader import ModuleLoader
 from src.services.cache_service import CacheManager
 from src.database.connection import DatabaseManager
+from src.config.constants.bot_constants import TIMEOUTS
 
 logger = logging.getLogger(__name__)
 
@@ -48,22 +50,36 @@ class StoreBot(commands.Bot):
         # Status tracking
         self._ready = asyncio.Event()
         self._setup_done = False
+        # Durasi tiap fase cold start (detik), diisi oleh setup_hook
+        self.startup_report: Dict[str, float] = {}
     
     async def setup_hook(self):
         """Setup yang dijalankan sebelum bot login"""
         try:
             logger.info("Memulai setup bot...")
+            started = time.perf_counter()
             
             # Setup database
             if not await self.db_manager.initialize():
                 raise Exception("Gagal inisialisasi database")
+            self.startup_report['database'] = time.perf_counter() - started
             
             # Load semua modul menggunakan ModuleLoader
+            phase = time.perf_counter()
             success = await self.module_loader.load_all_modules()
             if not success:
                 logger.warning("⚠️  Beberapa modul gagal dimuat, bot tetap berjalan")
+            self.startup_report['modules'] = time.perf_counter() - phase
+            self.startup_report['total'] = time.perf_counter() - started
             
-            logger.info("Setup bot selesai")
+            total = self.startup_report['total']
+            if total > TIMEOUTS.COLD_START_BUDGET:
+                logger.warning(
+                    f"⏱️  Cold start {total:.2f}s melebihi budget {TIMEOUTS.COLD_START_BUDGET}s "
+                    f"(database={self.startup_report['database']:.2f}s, "
+                    f"modules={self.startup_report['modules']:.2f}s)"
+                )
+            logger.info(f"Setup bot selesai dalam {total:.2f}s")
             
         except Exception as e:
             logger.critical(f"Gagal setup bot: {e}")
@@ -122,6 +138,8 @@ class StoreBot(commands.Bot):
                 await self.module_loader.unload_all_cogs()
             
             if hasattr(self, 'cache_manager'):
+                # Cache dikosongkan saat shutdown, jadi write-behind tidak perlu di-flush
+                await self.cache_manager.close(flush=False)
                 await self.cache_manager.clear_all()
             
             if hasattr(self, 'hot_reload_manager'):
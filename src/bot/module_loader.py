@@ -1,18 +1,35 @@
 """
 Module Loader untuk Discord Bot
-Memuat modul sesuai urutan yang ditentukan dalam ANALISIS_URUTAN_PEMUATAN.md
+Memuat cog mengikuti DAG COG_DEPENDENCIES; modul pendukung diimport oleh
+cog yang memakainya
 """
 
 import os
+import re
+import ast
 import sys
 import asyncio
 import logging
 import importlib
+import time
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import List, Dict, NamedTuple, Optional, Tuple
+
+from src.utils.import_profiler import ImportProfiler
 
 logger = logging.getLogger(__name__)
 
+# Cog mendeklarasikan dependensinya di level modul, mis.
+#   COG_DEPENDENCIES = ('src.cogs.live_stock',)
+# Dibaca dari source (tanpa import) agar urutan bisa dihitung sebelum memuat
+_DEPENDENCIES_RE = re.compile(r'^COG_DEPENDENCIES\s*=\s*([\[\(].*?[\]\)])', re.MULTILINE | re.DOTALL)
+
+class CogSource(NamedTuple):
+    """Hasil scan source cog yang di-cache per mtime"""
+    has_setup: bool
+    has_cog_class: bool
+    dependencies: Tuple[str, ...]
+
 class ModuleLoader:
     """Class untuk memuat modul bot sesuai urutan yang benar"""
     
@@ -20,47 +37,47 @@ class ModuleLoader:
         self.bot = bot
         self.loaded_modules = []
         self.failed_modules = []
-        
-        # Urutan pemuatan sesuai ANALISIS_URUTAN_PEMUATAN.md
-        self.loading_order = [
-            'utils',      # Foundational utilities
-            'services',   # Business logic
-            'ext',        # Extensions
-            'handlers',   # Command processing
-            'ui',         # User interface
-            'cogs'        # Discord cogs (terakhir)
-        ]
+        # Waktu pemuatan per tahap (detik) dan profil import dari load terakhir
+        self.load_times: Dict[str, float] = {}
+        self.import_profiler: Optional[ImportProfiler] = None
+        # Waktu load per cog (detik)
+        self.cog_load_times: Dict[str, float] = {}
+        # Cog tanpa dependensi satu sama lain dimuat paralel, dibatasi sekian sekaligus
+        self.max_concurrent_cogs = 8
+        # path -> (mtime_ns, size, CogSource), agar file yang tidak berubah tidak dibaca ulang
+        self._source_cache: Dict[str, Tuple[int, int, CogSource]] = {}
+        # module cog -> dependensi, diisi oleh _discover_cogs
+        self._cog_dependencies: Dict[str, Tuple[str, ...]] = {}
     
     async def load_all_modules(self) -> bool:
         """
-        Memuat semua modul sesuai urutan yang benar
+        Memuat semua cog. Modul di src/utils, src/services, src/ext,
+        src/handlers dan src/ui tidak lagi diimport massal sebelum cog:
+        setiap cog mengimport yang dipakainya, sehingga modul yang tidak
+        dipakai tidak ikut menambah waktu startup
         Returns: True jika semua modul berhasil dimuat, False jika ada yang gagal
         """
         logger.info("🚀 Memulai pemuatan modul bot...")
         
-        success_count = 0
-        total_count = 0
+        # Ukur waktu import setiap modul selama startup (setara python -X importtime)
+        self.import_profiler = ImportProfiler()
+        with self.import_profiler:
+            logger.info("📂 Memuat modul cogs...")
+            start = time.perf_counter()
+            loaded, failed = await self._load_cogs()
+            self.load_times['cogs'] = time.perf_counter() - start
         
-        for module_type in self.loading_order:
-            logger.info(f"📂 Memuat modul {module_type}...")
-            
-            if module_type == 'cogs':
-                # Khusus untuk cogs, gunakan discord.py extension system
-                loaded, failed = await self._load_cogs()
-            else:
-                # Untuk modul lain, import secara normal
-                loaded, failed = await self._load_module_type(module_type)
-            
-            success_count += loaded
-            total_count += loaded + failed
-            
-            if failed > 0:
-                logger.warning(f"⚠️  {failed} modul {module_type} gagal dimuat")
-            else:
-                logger.info(f"✅ Semua modul {module_type} berhasil dimuat")
+        if failed > 0:
+            logger.warning(f"⚠️  {failed} modul cogs gagal dimuat")
+        else:
+            logger.info("✅ Semua modul cogs berhasil dimuat")
         
         # Summary
-        logger.info(f"📊 Ringkasan pemuatan: {success_count}/{total_count} modul berhasil dimuat")
+        logger.info(f"📊 Ringkasan pemuatan: {loaded}/{loaded + failed} modul berhasil dimuat")
+        timings = ", ".join(f"{name}={seconds:.2f}s" for name, seconds in self.load_times.items())
+        logger.info(f"⏱️  Waktu pemuatan: {timings}")
+        if self.import_profiler.records:
+            logger.info("🐢 Import paling lambat:\n" + self.import_profiler.format_report(limit=10))
         
         if self.failed_modules:
             logger.error("❌ Modul yang gagal dimuat:")
@@ -69,46 +86,12 @@ class ModuleLoader:
         
         return len(self.failed_modules) == 0
     
-    async def _load_module_type(self, module_type: str) -> Tuple[int, int]:
-        """
-        Memuat semua modul dari tipe tertentu
-        Returns: (loaded_count, failed_count)
-        """
-        module_path = Path(f"src/{module_type}")
-        
-        if not module_path.exists():
-            logger.warning(f"📁 Direktori {module_path} tidak ditemukan")
-            return 0, 0
-        
-        loaded = 0
-        failed = 0
-        
-        # Scan semua file Python di direktori
-        for py_file in module_path.rglob("*.py"):
-            if py_file.name == "__init__.py":
-                continue
-                
-            # Convert path ke module name
-            relative_path = py_file.relative_to(Path("."))
-            module_name = str(relative_path).replace("/", ".").replace("\\", ".")[:-3]  # Remove .py
-            
-            try:
-                # Import module
-                importlib.import_module(module_name)
-                logger.debug(f"   ✓ {module_name}")
-                loaded += 1
-                self.loaded_modules.append(module_name)
-                
-            except Exception as e:
-                logger.error(f"   ✗ {module_name}: {str(e)}")
-                failed += 1
-                self.failed_modules.append((module_name, str(e)))
-        
-        return loaded, failed
-    
     async def _load_cogs(self) -> Tuple[int, int]:
         """
-        Memuat semua cogs dari direktori src/cogs
+        Memuat semua cogs dari direktori src/cogs.
+        Cog dimuat mengikuti DAG dependensi (COG_DEPENDENCIES): sebuah cog
+        menunggu dependensinya selesai, cog yang tidak saling bergantung
+        dimuat bersamaan sehingga I/O di cog_load tidak antre
         Returns: (loaded_count, failed_count)
         """
         cogs_path = Path("src/cogs")
@@ -119,24 +102,87 @@ class ModuleLoader:
         
         # Auto-discover semua cogs
         cog_files = self._discover_cogs(cogs_path)
+        order, cyclic = self._resolve_cog_order(cog_files)
+        
+        semaphore = asyncio.Semaphore(self.max_concurrent_cogs)
+        tasks: Dict[str, asyncio.Task] = {}
         
-        loaded = 0
-        failed = 0
+        for cog_module in cyclic:
+            logger.error(f"   ✗ {cog_module}: dependensi melingkar")
+            self.failed_modules.append((cog_module, "Dependensi melingkar"))
         
-        for cog_module in cog_files:
+        # Urutan topologis menjamin task dependensi sudah ada saat task cog dibuat
+        for cog_module in order:
+            dependencies = [tasks[dep] for dep in self._cog_dependencies.get(cog_module, ()) if dep in tasks]
+            tasks[cog_module] = asyncio.create_task(
+                self._load_cog(cog_module, dependencies, semaphore),
+                name=f"load-{cog_module}"
+            )
+        
+        results = await asyncio.gather(*tasks.values()) if tasks else []
+        loaded = sum(1 for ok in results if ok)
+        failed = len(results) - loaded + len(cyclic)
+        
+        if self.cog_load_times:
+            slowest = sorted(self.cog_load_times.items(), key=lambda item: item[1], reverse=True)[:5]
+            logger.info("⏱️  Cog paling lambat: " + ", ".join(f"{name}={seconds:.2f}s" for name, seconds in slowest))
+        
+        return loaded, failed
+    
+    async def _load_cog(self, cog_module: str, dependencies: List[asyncio.Task], semaphore: asyncio.Semaphore) -> bool:
+        """Tunggu dependensi lalu muat satu cog, return True jika berhasil"""
+        for dependency in dependencies:
+            if not await dependency:
+                error = f"Dependensi {dependency.get_name()[len('load-'):]} gagal dimuat"
+                logger.error(f"   ✗ {cog_module}: {error}")
+                self.failed_modules.append((cog_module, error))
+                return False
+        
+        async with semaphore:
+            start = time.perf_counter()
             try:
                 await self.bot.load_extension(cog_module)
-                logger.info(f"   ✓ {cog_module}")
-                loaded += 1
-                self.loaded_modules.append(cog_module)
-                
             except Exception as e:
                 logger.error(f"   ✗ {cog_module}: {str(e)}")
                 logger.error(f"      Detail error: {str(e)}", exc_info=True)
-                failed += 1
                 self.failed_modules.append((cog_module, str(e)))
+                return False
+            finally:
+                self.cog_load_times[cog_module] = time.perf_counter() - start
         
-        return loaded, failed
+        logger.info(f"   ✓ {cog_module} ({self.cog_load_times[cog_module]:.2f}s)")
+        self.loaded_modules.append(cog_module)
+        return True
+    
+    def _resolve_cog_order(self, cog_modules: List[str]) -> Tuple[List[str], List[str]]:
+        """
+        Urutkan cog secara topologis (Kahn), urutan discovery sebagai tie-breaker.
+        Dependensi yang tidak ditemukan diabaikan dengan warning
+        Returns: (urutan load, cog yang terjebak dependensi melingkar)
+        """
+        known = set(cog_modules)
+        pending: Dict[str, set] = {}
+        for cog_module in cog_modules:
+            dependencies = set()
+            for dep in self._cog_dependencies.get(cog_module, ()):
+                if dep in known:
+                    dependencies.add(dep)
+                else:
+                    logger.warning(f"⚠️  {cog_module} bergantung pada {dep} yang tidak ditemukan, diabaikan")
+            pending[cog_module] = dependencies
+        
+        order: List[str] = []
+        while True:
+            ready = [cog for cog in cog_modules if cog in pending and not pending[cog]]
+            if not ready:
+                break
+            for cog_module in ready:
+                del pending[cog_module]
+                order.append(cog_module)
+            for dependencies in pending.values():
+                dependencies.difference_update(ready)
+        
+        return order, [cog for cog in cog_modules if cog in pending]
     
     def _discover_cogs(self, cogs_path: Path) -> List[str]:
         """
@@ -160,6 +206,7 @@ class ModuleLoader:
                 if py_file.exists() and self._validate_cog_file(py_file):
                     module_name = f"src.cogs.{py_file.stem}"
                     cog_modules.append(module_name)
+                    self._cog_dependencies[module_name] = self._scan_source(py_file).dependencies
                     logger.info(f"🔍 Priority cog ditemukan: {module_name}")
             else:
                 # Subdirektori cog
@@ -168,6 +215,7 @@ class ModuleLoader:
                     module_name = f"src.cogs.{priority_item}"
                     if self._validate_subdir_cog(subdir):
                         cog_modules.append(module_name)
+                        self._cog_dependencies[module_name] = self._scan_source(subdir / "__init__.py").dependencies
                         logger.info(f"🔍 Priority subdirectory cog ditemukan: {module_name}")
         
         # Load remaining file cogs
@@ -195,6 +243,7 @@ class ModuleLoader:
             # Validasi apakah file memiliki setup function
             if self._validate_cog_file(py_file):
                 cog_modules.append(module_name)
+                self._cog_dependencies[module_name] = self._scan_source(py_file).dependencies
                 logger.debug(f"🔍 Ditemukan cog: {module_name}")
             else:
                 logger.warning(f"⚠️  File {py_file.name} tidak memiliki setup function yang valid")
@@ -213,9 +262,41 @@ class ModuleLoader:
             if init_file.exists() and self._validate_subdir_cog(subdir):
                 module_name = f"src.cogs.{subdir.name}"
                 cog_modules.append(module_name)
+                self._cog_dependencies[module_name] = self._scan_source(init_file).dependencies
                 logger.debug(f"🔍 Ditemukan subdirectory cog: {module_name}")
         
-        return cog_modules  # Tidak di-sort agar urutan prioritas tetap terjaga
+        return cog_modules  # Tidak di-sort, urutan prioritas jadi tie-breaker urutan load
+    
+    def _scan_source(self, file_path: Path) -> CogSource:
+        """
+        Scan source cog (setup function, class Cog, COG_DEPENDENCIES).
+        Hasil di-cache per (mtime, size) sehingga discovery ulang saat reload
+        tidak membaca file yang tidak berubah
+        """
+        stat = file_path.stat()
+        key = str(file_path)
+        cached = self._source_cache.get(key)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        
+        with open(file_path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        
+        dependencies: Tuple[str, ...] = ()
+        match = _DEPENDENCIES_RE.search(content)
+        if match:
+            try:
+                dependencies = tuple(str(dep) for dep in ast.literal_eval(match.group(1)))
+            except (ValueError, SyntaxError) as e:
+                logger.warning(f"⚠️  COG_DEPENDENCIES tidak valid di {file_path}: {e}")
+        
+        source = CogSource(
+            has_setup=('async def setup(' in content or 'def setup(' in content),
+            has_cog_class=('commands.Cog' in content or 'class ' in content and 'Cog' in content),
+            dependencies=dependencies
+        )
+        self._source_cache[key] = (stat.st_mtime_ns, stat.st_size, source)
+        return source
     
     def _validate_cog_file(self, file_path: Path) -> bool:
         """
@@ -223,20 +304,15 @@ class ModuleLoader:
         Returns: True jika valid, False jika tidak
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
+            source = self._scan_source(file_path)
             
             # Skip file yang hanya berisi utility functions (tidak ada setup function)
-            if file_path.name == 'utils.py' and 'def setup(' not in content and 'async def setup(' not in content:
+            if file_path.name == 'utils.py' and not source.has_setup:
                 logger.debug(f"⏭️  Skipping utility file: {file_path.name}")
                 return False
-                
-            # Cek apakah ada async def setup atau def setup
-            has_setup = ('async def setup(' in content or 'def setup(' in content)
-            has_cog_class = ('commands.Cog' in content or 'class ' in content and 'Cog' in content)
             
             # File valid jika memiliki setup function atau class Cog
-            return has_setup or has_cog_class
+            return source.has_setup or source.has_cog_class
                    
         except Exception as e:
             logger.error(f"Error validating {file_path}: {e}")
@@ -251,15 +327,9 @@ class ModuleLoader:
             init_file = subdir_path / "__init__.py"
             if not init_file.exists():
                 return False
-                
-            with open(init_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Cek apakah ada async def setup atau def setup
-            has_setup = ('async def setup(' in content or 'def setup(' in content)
             
             # Untuk subdirektori, setup function adalah wajib
-            return has_setup
+            return self._scan_source(init_file).has_setup
                    
         except Exception as e:
             logger.error(f"Error validating subdirectory {subdir_path}: {e}")
@@ -273,6 +343,16 @@ class ModuleLoader:
         """Dapatkan list modul yang gagal dimuat beserta error"""
         return self.failed_modules.copy()
     
+    def get_cog_load_times(self) -> Dict[str, float]:
+        """Waktu load per cog (detik) dari load terakhir"""
+        return dict(self.cog_load_times)
+    
+    def get_import_report(self, limit: int = 20, prefix: str = "") -> str:
+        """Laporan waktu import modul dari load terakhir"""
+        if not self.import_profiler:
+            return "Belum ada data import"
+        return self.import_profiler.format_report(limit=limit, prefix=prefix)
+    
     async def reload_module(self, module_name: str) -> bool:
         """
         Reload modul tertentu
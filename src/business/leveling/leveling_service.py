@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from src.database.repositories.leveling_repository import LevelingRepository
+from src.utils.leveling_curve import DEFAULT_CURVE
 
 logger = logging.getLogger(__name__)
 
@@ -142,22 +143,20 @@ class LevelingService:
                         'level': 0,
                         'messages': 0,
                         'rank': None,
-                        'xp_for_next': 100,
+                        'xp_for_next': DEFAULT_CURVE.xp_for_level(1),
                         'progress_percent': 0
                     }
                 }
             
             rank = self.repository.get_user_rank(guild_id, user_id)
-            xp_for_next = self.repository.get_xp_for_next_level(user_data['xp'])
-            current_level_xp = self.repository.get_xp_for_level(user_data['level'])
+            xp_for_next = DEFAULT_CURVE.xp_for_next_level(user_data['xp'])
+            # Level 0 dimulai dari 0 XP
+            current_level_xp = DEFAULT_CURVE.xp_for_level(user_data['level']) if user_data['level'] else 0
             
             # Calculate progress percentage
-            if user_data['level'] == 0:
-                progress_percent = (user_data['xp'] / 100) * 100
-            else:
-                xp_in_current_level = user_data['xp'] - current_level_xp
-                xp_needed_for_next = xp_for_next - current_level_xp
-                progress_percent = (xp_in_current_level / xp_needed_for_next) * 100
+            xp_in_current_level = user_data['xp'] - current_level_xp
+            xp_needed_for_next = xp_for_next - current_level_xp
+            progress_percent = (xp_in_current_level / xp_needed_for_next) * 100 if xp_needed_for_next > 0 else 100
             
             return {
                 'success': True,
@@ -7,13 +7,20 @@ from discord.ext import commands
 import logging
 import asyncio
 import os
-import shutil
 from datetime import datetime
 from src.cogs.admin_base import AdminBaseCog
+from src.config.constants.bot_constants import Database
+from src.database.backup import BackupEngine, BackupError
 from src.database.manager import db_manager
 
 logger = logging.getLogger(__name__)
 
+# Backup terjadwal: prefix, jumlah yang disimpan dan kompresi (bisa di-override config 'backup')
+SCHEDULED_PREFIX = "scheduled_backup"
+DEFAULT_KEEP = 7
+SAFETY_PREFIX = "pre_restore_backup"
+SAFETY_KEEP = 3
+
 class AdminBackupCog(AdminBaseCog):
     """Cog untuk manajemen backup database"""
     
@@ -22,18 +29,46 @@ class AdminBackupCog(AdminBaseCog):
         self.db_file = "shop.db"
         self.backup_dir = "backups"
         os.makedirs(self.backup_dir, exist_ok=True)
+        self.engine = BackupEngine(self.db_file, self.backup_dir)
+        # Satu backup/restore dalam satu waktu
+        self.backup_lock = asyncio.Lock()
+
+        settings = self.config.get('backup', {}) or {}
+        self.backup_interval = settings.get('interval', Database.BACKUP_INTERVAL)
+        self.backup_keep = settings.get('keep', DEFAULT_KEEP)
+        self.backup_compress = settings.get('compress', True)
+        self.backup_task = bot.loop.create_task(self.scheduled_backup_loop())
+
+    async def cog_unload(self):
+        """Hentikan backup terjadwal"""
+        self.backup_task.cancel()
+
+    async def scheduled_backup_loop(self):
+        """Backup online berkala dengan retensi, dilewati jika database tidak berubah"""
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            await asyncio.sleep(self.backup_interval)
+            try:
+                async with self.backup_lock:
+                    await asyncio.to_thread(
+                        self.engine.create_backup, SCHEDULED_PREFIX, self.backup_compress, True
+                    )
+                    await asyncio.to_thread(self.engine.prune_backups, SCHEDULED_PREFIX, self.backup_keep)
+            except Exception as e:
+                logger.error(f"Error saat backup terjadwal: {e}")
 
     @commands.command(name="backup")
-    async def backup_database(self, ctx):
-        """Membuat dan mengirim backup database"""
+    async def backup_database(self, ctx, mode: str = ""):
+        """Membuat dan mengirim backup database (`!backup gz` untuk versi terkompresi)"""
         try:
-            # Buat nama backup unik dengan timestamp
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            backup_filename = f"shop_backup_{timestamp}.db"
+            # Backup online lewat SQLite backup API, konsisten walau bot sedang menulis
+            async with self.backup_lock:
+                manifest = await asyncio.to_thread(
+                    self.engine.create_backup, "shop_backup", mode.lower() in ('gz', 'gzip', 'compress')
+                )
+            backup_filename = manifest['file']
             backup_filepath = os.path.join(self.backup_dir, backup_filename)
-
-            # Buat backup secara asynchronous
-            await asyncio.to_thread(shutil.copy2, self.db_file, backup_filepath)
+            timestamp = manifest['created_at']
 
             # Buat embed modern
             embed = discord.Embed(
@@ -45,7 +80,9 @@ class AdminBackupCog(AdminBaseCog):
             embed.add_field(
                 name="Info Backup",
                 value=f"📁 Nama file: {backup_filename}\n"
-                      f"⏰ Waktu: {timestamp}",
+                      f"⏰ Waktu: {timestamp}\n"
+                      f"📦 Ukuran: {manifest['size'] / 1024:.1f} KB ({manifest['duration_ms']} ms)\n"
+                      f"🔐 SHA-256: `{manifest['sha256'][:16]}…`",
                 inline=False
             )
 
@@ -65,26 +102,73 @@ class AdminBackupCog(AdminBaseCog):
             )
             await ctx.send(embed=error_embed)
 
+    @commands.command(name="backups")
+    async def list_backups(self, ctx):
+        """Daftar backup lokal beserta manifest-nya"""
+        backups = await asyncio.to_thread(self.engine.list_backups)
+        embed = discord.Embed(
+            title="🗂️ Backup Database",
+            color=0x00aaff,
+            timestamp=datetime.utcnow()
+        )
+        if not backups:
+            embed.description = "Belum ada backup."
+        else:
+            embed.description = "\n".join(
+                f"`{m['file']}` • {m['size'] / 1024:.1f} KB • {m['created_at']}"
+                for m in backups[:15]
+            )
+            embed.set_footer(text=f"Total {len(backups)} backup • retensi terjadwal {self.backup_keep}")
+        await ctx.send(embed=embed)
+
     @commands.command(name="restore")
-    async def restore_database(self, ctx):
-        """Restore database dari file backup yang dilampirkan"""
+    async def restore_database(self, ctx, backup_name: str = None):
+        """Restore database dari file backup yang dilampirkan atau nama backup lokal"""
+        cleanup = []
         try:
-            if not ctx.message.attachments:
+            if ctx.message.attachments:
+                attachment = ctx.message.attachments[0]
+                if not attachment.filename.endswith(('.db', '.db.gz')):
+                    await ctx.send(embed=discord.Embed(
+                        title="❌ Error Restore",
+                        description="File harus berformat .db atau .db.gz",
+                        color=0xff0000
+                    ))
+                    return
+                source_name = attachment.filename
+                backup_path = os.path.join(self.backup_dir, f"temp_{os.path.basename(attachment.filename)}")
+                await attachment.save(backup_path)
+                cleanup.append(backup_path)
+            elif backup_name:
+                source_name = os.path.basename(backup_name)
+                backup_path = os.path.join(self.backup_dir, source_name)
+                if not os.path.isfile(backup_path):
+                    await ctx.send(embed=discord.Embed(
+                        title="❌ Error Restore",
+                        description=f"Backup `{source_name}` tidak ditemukan. Lihat `!backups`.",
+                        color=0xff0000
+                    ))
+                    return
+            else:
                 await ctx.send(embed=discord.Embed(
                     title="❌ Error Restore",
-                    description="Silakan lampirkan file backup database (.db)",
+                    description="Lampirkan file backup (.db/.db.gz) atau sebutkan nama backup lokal",
                     color=0xff0000
                 ))
                 return
 
-            attachment = ctx.message.attachments[0]
-            if not attachment.filename.endswith('.db'):
+            # Verifikasi (checksum manifest + integrity_check) sebelum restore ditawarkan
+            try:
+                verified_path, info = await asyncio.to_thread(self.engine.verify_backup, backup_path)
+            except BackupError as e:
                 await ctx.send(embed=discord.Embed(
-                    title="❌ Error Restore",
-                    description="File harus berformat .db",
+                    title="❌ Backup Tidak Valid",
+                    description=f"`{source_name}` gagal diverifikasi: {e}",
                     color=0xff0000
                 ))
                 return
+            if str(verified_path) != backup_path:
+                cleanup.append(str(verified_path))
 
             # Konfirmasi restore
             confirm_embed = discord.Embed(
@@ -93,6 +177,14 @@ class AdminBackupCog(AdminBaseCog):
                            "Ketik `ya` untuk konfirmasi atau `tidak` untuk batal.",
                 color=0xffaa00
             )
+            confirm_embed.add_field(
+                name="Verifikasi Backup",
+                value=f"✅ Integrity check: {info['integrity']}\n"
+                      f"📁 File: {source_name} ({info['size'] / 1024:.1f} KB)\n"
+                      f"🗃️ Tabel: {info['tables']}"
+                      + ("\n🔐 Checksum manifest cocok" if 'manifest' in info else ""),
+                inline=False
+            )
             await ctx.send(embed=confirm_embed)
 
             def check(m):
@@ -109,37 +201,29 @@ class AdminBackupCog(AdminBaseCog):
                     ))
                     return
 
-                # Download file backup ke temp
-                temp_filepath = os.path.join(self.backup_dir, f"temp_{attachment.filename}")
-                await attachment.save(temp_filepath)
-
                 # Aktifkan maintenance mode
                 self.bot.maintenance_mode = True
-                
-                # Tunggu sebentar agar koneksi database yang ada selesai
-                await asyncio.sleep(2)
 
-                # Backup database existing sebagai precaution
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                safety_backup = os.path.join(self.backup_dir, f"pre_restore_backup_{timestamp}.db")
-                await asyncio.to_thread(shutil.copy2, self.db_file, safety_backup)
+                async with self.backup_lock:
+                    # Backup database existing sebagai precaution
+                    safety = await asyncio.to_thread(self.engine.create_backup, SAFETY_PREFIX)
+                    safety_path = os.path.join(self.backup_dir, safety['file'])
+
+                    # Salin backup ke database aktif lewat backup API (aman untuk WAL dan koneksi terbuka)
+                    await asyncio.to_thread(self.engine.restore, verified_path)
 
-                # Replace database dengan file backup
-                await asyncio.to_thread(shutil.copy2, temp_filepath, self.db_file)
+                    # Verifikasi database
+                    if not await db_manager.verify_database():
+                        # Rollback jika verifikasi gagal
+                        logger.error("Database verification failed after restore, rolling back")
+                        await asyncio.to_thread(self.engine.restore, safety_path)
+                        raise Exception("Verifikasi database gagal setelah restore. Database dikembalikan ke kondisi sebelumnya.")
 
-                # Verifikasi database
-                if not await db_manager.verify_database():
-                    # Rollback jika verifikasi gagal
-                    logger.error("Database verification failed after restore, rolling back")
-                    await asyncio.to_thread(shutil.copy2, safety_backup, self.db_file)
-                    raise Exception("Verifikasi database gagal setelah restore. Database dikembalikan ke kondisi sebelumnya.")
+                    await asyncio.to_thread(self.engine.prune_backups, SAFETY_PREFIX, SAFETY_KEEP)
 
                 # Nonaktifkan maintenance mode
                 self.bot.maintenance_mode = False
 
-                # Hapus file temporary
-                os.remove(temp_filepath)
-
                 success_embed = discord.Embed(
                     title="📥 Restore Database",
                     description="Database berhasil direstore!",
@@ -148,12 +232,13 @@ class AdminBackupCog(AdminBaseCog):
                 )
                 success_embed.add_field(
                     name="Info Restore",
-                    value=f"📁 File backup: {attachment.filename}\n"
+                    value=f"📁 File backup: {source_name}\n"
+                          f"🛟 Backup sebelum restore: {safety['file']}\n"
                           f"⏰ Waktu: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}",
                     inline=False
                 )
                 await ctx.send(embed=success_embed)
-                logger.info(f"Database berhasil direstore dari {attachment.filename}")
+                logger.info(f"Database berhasil direstore dari {source_name}")
 
             except asyncio.TimeoutError:
                 await ctx.send(embed=discord.Embed(
@@ -173,6 +258,11 @@ class AdminBackupCog(AdminBaseCog):
                 color=0xff0000
             )
             await ctx.send(embed=error_embed)
+        finally:
+            # Hapus file temporary (upload dan hasil dekompresi)
+            for path in cleanup:
+                if os.path.exists(path):
+                    os.remove(path)
 
 async def setup(bot):
     """Setup admin backup cog"""
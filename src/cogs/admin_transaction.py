@@ -150,6 +150,35 @@ class AdminTransactionCog(AdminBaseCog):
             logger.error(f"Error reduce stock: {e}")
             await ctx.send(embed=message_formatter.error_embed("Terjadi error saat mengurangi stock"))
 
+    @commands.command(name="reconcilestock")
+    async def reconcile_stock(self, ctx):
+        """Hitung ulang counter stock dari tabel stock"""
+        try:
+            response = await self.product_service.reconcile_stock_counts()
+            
+            if not response.success:
+                await ctx.send(embed=message_formatter.error_embed(f"Gagal rekonsiliasi stock: {response.error}"))
+                return
+            
+            if not response.data:
+                await ctx.send(embed=message_formatter.success_embed("Counter stock sudah sesuai, tidak ada yang diperbaiki"))
+                return
+            
+            lines = [
+                f"{item['product_code']} ({item['status']}): {item['old']} → {item['new']}"
+                for item in response.data[:20]
+            ]
+            if len(response.data) > 20:
+                lines.append(f"... dan {len(response.data) - 20} counter lainnya")
+            
+            await ctx.send(embed=message_formatter.success_embed(
+                f"Counter stock diperbaiki ({len(response.data)}):\n" + "\n".join(lines)
+            ))
+            
+        except Exception as e:
+            logger.error(f"Error reconcile stock: {e}")
+            await ctx.send(embed=message_formatter.error_embed("Terjadi error saat rekonsiliasi stock"))
+
 async def setup(bot):
     """Setup admin transaction cog"""
     try:
@@ -1,10 +1,16 @@
 import discord
 from discord.ext import commands
-from datetime import datetime, timedelta
 import json
 import asyncio
+import time
+from datetime import datetime
+from typing import List, Optional, Tuple
 from .utils import Embed, Permissions, event_dispatcher
 from src.database.connection import get_connection
+from src.database.write_queue import get_write_queue
+from src.utils.lock_manager import KeyedLockTable
+from src.utils.rate_window import SlidingWindowCounter
+from src.utils.word_matcher import BannedWordMatcher
 import sqlite3
 from asyncio import Lock
 import os
@@ -13,26 +19,48 @@ import logging
 
 logger = logging.getLogger(__name__)
 
+# Jendela hitung warning untuk threshold mute (detik)
+WARNING_WINDOW = 24 * 3600
+# Warning yang di-buffer ditulis ke database setiap interval ini (detik) ...
+WARNING_FLUSH_INTERVAL = 5
+# ... atau lebih cepat begitu buffer mencapai ukuran ini
+WARNING_BATCH_SIZE = 200
+
+def _insert_warnings(conn, rows: List[Tuple]):
+    conn.executemany("""
+        INSERT INTO automod_warnings (user_id, guild_id, warning_type, reason, timestamp)
+        VALUES (?, ?, ?, ?, ?)
+    """, rows)
+
 class AutoMod(commands.Cog):
     """🛡️ Sistem Moderasi Otomatis"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.spam_check = {}
+        # Timestamp pesan per author untuk deteksi spam, tanpa lock dan dibatasi LRU/idle
+        self.spam_windows = SlidingWindowCounter()
         # Pastikan direktori config ada
         Path('config').mkdir(exist_ok=True)
         self.config = self.load_config()
         self.register_handlers()
-        self.locks = {}
-        self.spam_locks = {}
+        # Lock per user untuk handle_violation, entry dihapus otomatis setelah release
+        self.user_locks = KeyedLockTable("automod.users")
         self.mute_locks = {}
         self.config_lock = Lock()
-        # Cache untuk banned words
-        self._banned_words_cache = set(word.lower() for word in self.config["banned_words"]["words"])
+        # Matcher banned words, dikompilasi ulang setiap config berubah
+        self._banned_words = self.build_matcher(self.config)
         # Task untuk cleanup
         self.cleanup_task = self.bot.loop.create_task(self.periodic_cleanup())
         # Setup database
         self.setup_database()
+        # Warning 24 jam terakhir per (guild, user) di memory, sumber kebenaran threshold mute
+        self.warning_windows = SlidingWindowCounter(max_keys=100_000, idle_ttl=WARNING_WINDOW)
+        self.load_recent_warnings()
+        # Baris automod_warnings yang belum ditulis, di-flush batch oleh warning_flush_task
+        self._pending_warnings: List[Tuple] = []
+        self._warning_flush_event = asyncio.Event()
+        self._warning_flush_lock = asyncio.Lock()
+        self.warning_flush_task = self.bot.loop.create_task(self.warning_flush_loop())
 
     def setup_database(self):
         """Setup database tables for automod"""
@@ -46,12 +74,33 @@ class AutoMod(commands.Cog):
                          warning_type TEXT,
                          reason TEXT,
                          timestamp DATETIME DEFAULT CURRENT_TIMESTAMP)''')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_automod_warnings_timestamp
+                         ON automod_warnings(timestamp)''')
             conn.commit()
         except Exception as e:
             logger.error(f"Error setting up database: {e}")
         finally:
             conn.close()
 
+    def load_recent_warnings(self):
+        """Bangun ulang counter warning dari tabel (warning 24 jam terakhir)"""
+        conn = get_connection()
+        try:
+            rows = conn.execute("""
+                SELECT user_id, guild_id, CAST(strftime('%s', timestamp) AS INTEGER) AS ts
+                FROM automod_warnings
+                WHERE timestamp > datetime('now', ?)
+                ORDER BY timestamp
+            """, (f'-{WARNING_WINDOW} seconds',)).fetchall()
+            threshold = self.config["punishments"]["warn_threshold"]
+            for row in rows:
+                self.warning_windows.hit((row[1], row[0]), threshold, WARNING_WINDOW, now=row[2])
+            logger.info(f"Loaded {len(rows)} recent automod warnings")
+        except Exception as e:
+            logger.error(f"Error loading recent warnings: {e}")
+        finally:
+            conn.close()
+
     def register_handlers(self):
         """Register event handlers with dispatcher"""
         event_dispatcher.register('message', self.handle_message, priority=1)
@@ -61,21 +110,15 @@ class AutoMod(commands.Cog):
         """Periodic cleanup of old data"""
         while not self.bot.is_closed():
             try:
-                # Cleanup spam checks older than 1 hour
-                current_time = datetime.utcnow()
-                for user_id in list(self.spam_check.keys()):
-                    self.spam_check[user_id] = [
-                        msg_time for msg_time in self.spam_check[user_id]
-                        if current_time - msg_time < timedelta(hours=1)
-                    ]
-                    if not self.spam_check[user_id]:
-                        del self.spam_check[user_id]
+                # Cleanup spam windows yang idle
+                self.spam_windows.evict_idle()
+                # Counter warning memakai waktu wall-clock (time.time)
+                self.warning_windows.evict_idle(time.time())
                 
                 # Cleanup old locks
-                for dict_locks in [self.locks, self.spam_locks, self.mute_locks]:
-                    for key in list(dict_locks.keys()):
-                        if not dict_locks[key].locked():
-                            del dict_locks[key]
+                for key in list(self.mute_locks.keys()):
+                    if not self.mute_locks[key].locked():
+                        del self.mute_locks[key]
                 
                 # Cleanup old warnings from database
                 conn = get_connection()
@@ -92,21 +135,57 @@ class AutoMod(commands.Cog):
             
             await asyncio.sleep(3600)  # Run every hour
 
-    def cog_unload(self):
+    async def cog_unload(self):
         """Cleanup when cog is unloaded"""
         self.cleanup_task.cancel()
+        self.warning_flush_task.cancel()
+        await self.flush_warnings()
+
+    def record_warning(self, guild_id: int, user_id: int, warning_type: str, reason: str,
+                       now: Optional[float] = None) -> bool:
+        """Catat warning di memory dan buffer tulis; True jika threshold mute tercapai"""
+        if now is None:
+            now = time.time()
+        self._pending_warnings.append((
+            str(user_id), str(guild_id), warning_type, reason,
+            datetime.utcfromtimestamp(now).strftime('%Y-%m-%d %H:%M:%S')
+        ))
+        if len(self._pending_warnings) >= WARNING_BATCH_SIZE:
+            self._warning_flush_event.set()
+        return self.warning_windows.hit(
+            (str(guild_id), str(user_id)),
+            self.config["punishments"]["warn_threshold"],
+            WARNING_WINDOW,
+            now=now
+        )
 
-    async def get_user_lock(self, user_id: int) -> Lock:
-        """Get a lock for a specific user"""
-        if user_id not in self.locks:
-            self.locks[user_id] = Lock()
-        return self.locks[user_id]
-
-    async def get_spam_lock(self, user_id: int) -> Lock:
-        """Get a spam check lock for a specific user"""
-        if user_id not in self.spam_locks:
-            self.spam_locks[user_id] = Lock()
-        return self.spam_locks[user_id]
+    async def flush_warnings(self) -> int:
+        """Tulis warning yang di-buffer ke database dalam satu batch"""
+        async with self._warning_flush_lock:
+            if not self._pending_warnings:
+                return 0
+            rows, self._pending_warnings = self._pending_warnings, []
+            try:
+                await get_write_queue().submit(_insert_warnings, rows)
+            except Exception as e:
+                # Kembalikan ke buffer agar dicoba lagi di flush berikutnya
+                self._pending_warnings[:0] = rows
+                logger.error(f"Failed to flush {len(rows)} automod warnings: {e}")
+                return 0
+            return len(rows)
+
+    async def warning_flush_loop(self):
+        """Flush buffer warning berkala, atau segera saat buffer penuh"""
+        while not self.bot.is_closed():
+            try:
+                await asyncio.wait_for(self._warning_flush_event.wait(), timeout=WARNING_FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._warning_flush_event.clear()
+            try:
+                await self.flush_warnings()
+            except Exception as e:
+                logger.error(f"Error in warning flush loop: {e}")
 
     async def get_mute_lock(self, guild_id: int) -> Lock:
         """Get a mute lock for a specific guild"""
@@ -167,15 +246,24 @@ class AutoMod(commands.Cog):
                 else:
                     self._validate_config(config[key], default_value)
 
+    @staticmethod
+    def build_matcher(config: dict) -> BannedWordMatcher:
+        """Kompilasi banned words dan wildcards dari config"""
+        return BannedWordMatcher(config["banned_words"]["words"], config["banned_words"]["wildcards"])
+
+    def _write_config(self, config: dict):
+        """Tulis config dan ganti matcher; pemanggil harus memegang config_lock"""
+        # Matcher dibangun lebih dulu, lalu di-swap dalam satu assignment sehingga
+        # handle_message tidak pernah melihat matcher yang setengah jadi
+        matcher = self.build_matcher(config)
+        with open('config/automod.json', 'w') as f:
+            json.dump(config, f, indent=4)
+        self._banned_words = matcher
+
     async def save_config(self, config: dict = None):
         """Save automod configuration"""
         async with self.config_lock:
-            if config is None:
-                config = self.config
-            with open('config/automod.json', 'w') as f:
-                json.dump(config, f, indent=4)
-            # Update cache
-            self._banned_words_cache = set(word.lower() for word in config["banned_words"]["words"])
+            self._write_config(config if config is not None else self.config)
 
     async def handle_message(self, message: discord.Message):
         """Main message handler for automod"""
@@ -185,50 +273,35 @@ class AutoMod(commands.Cog):
         if not isinstance(message.channel, discord.TextChannel):
             return
 
-        async with await self.get_user_lock(message.author.id):
-            violations = []
+        # Semua check sinkron di event loop, tidak perlu lock per user
+        violations = []
 
-            # Check for spam
-            if self.config["spam"]["enabled"]:
-                if await self.check_spam(message):
-                    violations.append(("spam", "Sending messages too quickly"))
+        # Check for spam
+        if self.config["spam"]["enabled"]:
+            if await self.check_spam(message):
+                violations.append(("spam", "Sending messages too quickly"))
 
-            # Check for excessive caps
-            if self.config["caps"]["enabled"]:
-                if await self.check_caps(message):
-                    violations.append(("caps", "Excessive use of caps"))
+        # Check for excessive caps
+        if self.config["caps"]["enabled"]:
+            if await self.check_caps(message):
+                violations.append(("caps", "Excessive use of caps"))
 
-            # Check for banned words
-            if self.config["banned_words"]["enabled"]:
-                if word := await self.check_banned_words(message):
-                    violations.append(("banned_word", f"Used banned word: {word}"))
+        # Check for banned words
+        if self.config["banned_words"]["enabled"]:
+            if word := await self.check_banned_words(message):
+                violations.append(("banned_word", f"Used banned word: {word}"))
 
-            # Handle any violations
-            for violation_type, reason in violations:
-                await event_dispatcher.dispatch('automod_violation', message, violation_type, reason)
+        # Handle any violations
+        for violation_type, reason in violations:
+            await event_dispatcher.dispatch('automod_violation', message, violation_type, reason)
 
     async def check_spam(self, message: discord.Message) -> bool:
-        """Check for spam messages"""
-        author_id = str(message.author.id)
-        current_time = datetime.utcnow()
-        threshold = self.config["spam"]["threshold"]
-        timeframe = self.config["spam"]["timeframe"]
-
-        async with await self.get_spam_lock(message.author.id):
-            if author_id not in self.spam_check:
-                self.spam_check[author_id] = []
-
-            # Remove old messages
-            self.spam_check[author_id] = [
-                msg_time for msg_time in self.spam_check[author_id]
-                if current_time - msg_time < timedelta(seconds=timeframe)
-            ]
-
-            # Add new message
-            self.spam_check[author_id].append(current_time)
-
-            # Check if threshold is exceeded
-            return len(self.spam_check[author_id]) >= threshold
+        """Check for spam messages (sliding window O(1) per pesan)"""
+        return self.spam_windows.hit(
+            message.author.id,
+            self.config["spam"]["threshold"],
+            self.config["spam"]["timeframe"]
+        )
 
     async def check_caps(self, message: discord.Message) -> bool:
         """Check for excessive caps use"""
@@ -241,76 +314,46 @@ class AutoMod(commands.Cog):
         return caps_ratio > self.config["caps"]["threshold"]
 
     async def check_banned_words(self, message: discord.Message) -> str:
-        """Check for banned words using cached set"""
-        content_lower = message.content.lower()
-        
-        # Check exact matches from cache
-        for word in self._banned_words_cache:
-            if word in content_lower:
-                return word
-                
-        # Check wildcards
-        for pattern in self.config["banned_words"]["wildcards"]:
-            if pattern.lower() in content_lower:
-                return pattern
-                
-        return ""
+        """Check for banned words using the compiled matcher"""
+        return self._banned_words.search(message.content)
 
     async def handle_violation(self, message: discord.Message, violation_type: str, reason: str):
         """Handle automod violations"""
+        key = f"user_{message.author.id}"
+        await self.user_locks.acquire(key)
         try:
-            async with await self.get_user_lock(message.author.id):
-                # Create warning embed
-                embed = Embed.create(
-                    title="⚠️ AutoMod Warning",
-                    description=f"Violation detected in {message.channel.mention}",
-                    color=discord.Color.orange(),
-                    field_User=message.author.mention,
-                    field_Type=violation_type.title(),
-                    field_Reason=reason
-                )
-
-                # Delete violating message
-                try:
-                    await message.delete()
-                except (discord.Forbidden, discord.NotFound):
-                    pass
-
-                # Send warning
-                try:
-                    warning_msg = await message.channel.send(embed=embed)
-                    await warning_msg.delete(delay=5)
-                except discord.Forbidden:
-                    pass
+            # Create warning embed
+            embed = Embed.create(
+                title="⚠️ AutoMod Warning",
+                description=f"Violation detected in {message.channel.mention}",
+                color=discord.Color.orange(),
+                field_User=message.author.mention,
+                field_Type=violation_type.title(),
+                field_Reason=reason
+            )
+
+            # Delete violating message
+            try:
+                await message.delete()
+            except (discord.Forbidden, discord.NotFound):
+                pass
 
-                # Log warning to database
-                conn = get_connection()
-                try:
-                    cursor = conn.cursor()
-                    
-                    cursor.execute("""
-                        INSERT INTO automod_warnings (user_id, guild_id, warning_type, reason)
-                        VALUES (?, ?, ?, ?)
-                    """, (str(message.author.id), str(message.guild.id), violation_type, reason))
-                    
-                    # Check warning threshold
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM automod_warnings
-                        WHERE user_id = ? AND guild_id = ?
-                        AND timestamp > datetime('now', '-1 day')
-                    """, (str(message.author.id), str(message.guild.id)))
-                    
-                    warning_count = cursor.fetchone()[0]
-                    conn.commit()
+            # Send warning
+            try:
+                warning_msg = await message.channel.send(embed=embed)
+                await warning_msg.delete(delay=5)
+            except discord.Forbidden:
+                pass
 
-                    if warning_count >= self.config["punishments"]["warn_threshold"]:
-                        await self.mute_user(message.author)
-                finally:
-                    conn.close()
+            # Log warning (ditulis batch di background) dan cek threshold dari counter 24 jam
+            if self.record_warning(message.guild.id, message.author.id, violation_type, reason):
+                await self.mute_user(message.author)
 
         except Exception as e:
             logger.error(f"Error handling violation: {e}")
             await event_dispatcher.dispatch('error', None, e)
+        finally:
+            self.user_locks.release(key)
 
     async def mute_user(self, member: discord.Member):
         """Mute a user for the configured duration"""
@@ -442,10 +485,7 @@ class AutoMod(commands.Cog):
                 return
                 
             self.config["banned_words"]["words"].append(word)
-            await self.save_config()
-            
-            # Update cache
-            self._banned_words_cache.add(word)
+            self._write_config(self.config)
             
         await ctx.send(f"✅ Added '{word}' to banned words")
         try:
@@ -460,10 +500,7 @@ class AutoMod(commands.Cog):
             word = word.lower()
             try:
                 self.config["banned_words"]["words"].remove(word)
-                await self.save_config()
-                
-                # Update cache
-                self._banned_words_cache.remove(word)
+                self._write_config(self.config)
                 
                 await ctx.send(f"✅ Removed '{word}' from banned words")
             except ValueError:
@@ -483,7 +520,7 @@ class AutoMod(commands.Cog):
                 return
                 
             self.config["banned_words"]["wildcards"].append(pattern)
-            await self.save_config()
+            self._write_config(self.config)
             
         await ctx.send(f"✅ Added '{pattern}' to wildcards")
         try:
@@ -498,7 +535,7 @@ class AutoMod(commands.Cog):
             pattern = pattern.lower()
             try:
                 self.config["banned_words"]["wildcards"].remove(pattern)
-                await self.save_config()
+                self._write_config(self.config)
                 await ctx.send(f"✅ Removed '{pattern}' from wildcards")
             except ValueError:
                 await ctx.send("❌ Pattern not found in wildcards list")
@@ -526,7 +563,7 @@ class AutoMod(commands.Cog):
             else:
                 await ctx.send("❌ Invalid feature. Available features: spam, caps")
             
-            await self.save_config()
+            self._write_config(self.config)
 
     @automod.command(name="timeframe")
     async def set_timeframe(self, ctx, seconds: int):
@@ -534,7 +571,7 @@ class AutoMod(commands.Cog):
         async with self.config_lock:
             if 1 <= seconds <= 60:
                 self.config["spam"]["timeframe"] = seconds
-                await self.save_config()
+                self._write_config(self.config)
                 await ctx.send(f"✅ Spam timeframe set to {seconds} seconds")
             else:
                 await ctx.send("❌ Timeframe must be between 1 and 60 seconds")
@@ -553,7 +590,7 @@ class AutoMod(commands.Cog):
             
             # Reset to default
             self.config = self.load_config(force_default=True)
-            self._banned_words_cache = set(word.lower() for word in self.config["banned_words"]["words"])
+            self._banned_words = self.build_matcher(self.config)
             
             await ctx.send("✅ AutoMod settings have been reset to default!")
             
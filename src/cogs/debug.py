@@ -8,6 +8,8 @@ from discord.ext import commands
 import logging
 
 from src.bot.config import config_manager
+from src.utils.lock_manager import lock_stats
+from src.utils.rank_index import LEVEL_RANKS, REPUTATION_RANKS
 
 logger = logging.getLogger(__name__)
 
@@ -141,6 +143,123 @@ class DebugCog(commands.Cog):
             logger.error(f"Error config info: {e}")
             await ctx.send(f"❌ Error saat mengambil config: {e}")
 
+    @commands.command(name="dbpool")
+    async def db_pool_stats(self, ctx):
+        """Tampilkan metrics pool koneksi database"""
+        try:
+            stats = self.bot.db_manager.get_pool_stats()
+
+            embed = discord.Embed(
+                title="🗄️ Database Pool",
+                description="Metrics pool koneksi SQLite:",
+                color=0x0099ff
+            )
+            embed.add_field(
+                name="📦 Ukuran",
+                value=f"Max: {stats['max_size']}\nDibuat: {stats['created']}\n"
+                      f"Idle: {stats['idle']}\nDipakai: {stats['in_use']}",
+                inline=True
+            )
+            embed.add_field(
+                name="⏱️ Checkout",
+                value=f"Total: {stats['checkouts']}\nMenunggu: {stats['waits']}\n"
+                      f"Timeout: {stats['timeouts']}\n"
+                      f"Rata-rata tunggu: {stats['avg_wait_ms']} ms\n"
+                      f"Maks tunggu: {stats['max_wait_ms']} ms",
+                inline=True
+            )
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            logger.error(f"Error db pool stats: {e}")
+            await ctx.send(f"❌ Error saat mengambil metrics pool: {e}")
+
+    @commands.command(name="lockstats")
+    async def show_lock_stats(self, ctx):
+        """Tampilkan statistik lock per prefix key"""
+        try:
+            embed = discord.Embed(
+                title="🔒 Lock Stats",
+                description="Contention, waktu tunggu dan timeout per prefix key:",
+                color=0x0099ff
+            )
+
+            for table_name, stats in list(lock_stats().items())[:25]:
+                lines = [f"Key aktif: {stats['active_keys']}"]
+                for prefix, data in stats['prefixes'].items():
+                    lines.append(
+                        f"`{prefix}`: {data['acquired']} ok, {data['contended']} antri, "
+                        f"{data['timeouts']} timeout, avg {data['avg_wait_ms']} ms"
+                    )
+                embed.add_field(name=table_name, value="\n".join(lines)[:1024], inline=False)
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            logger.error(f"Error lock stats: {e}")
+            await ctx.send(f"❌ Error saat mengambil statistik lock: {e}")
+
+    @commands.command(name="livestats")
+    async def live_stock_stats(self, ctx):
+        """Tampilkan counter edit pesan live stock"""
+        try:
+            live_stock_cog = self.bot.get_cog('LiveStockCog')
+            if not live_stock_cog:
+                await ctx.send("❌ LiveStockCog tidak aktif")
+                return
+
+            stats = live_stock_cog.stock_manager.get_update_stats()
+            total = stats['edits_sent'] + stats['edits_skipped']
+
+            embed = discord.Embed(
+                title="📊 Live Stock Updates",
+                description="Edit pesan live stock yang dikirim dan dilewati:",
+                color=0x0099ff
+            )
+            embed.add_field(
+                name="✉️ Edit",
+                value=f"Terkirim: {stats['edits_sent']}\nDilewati: {stats['edits_skipped']}\n"
+                      f"Hemat: {round(stats['edits_skipped'] / total * 100, 1) if total else 0.0}%",
+                inline=True
+            )
+            embed.add_field(
+                name="🔔 Permintaan Update",
+                value=f"Total: {stats['update_requests']}",
+                inline=True
+            )
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            logger.error(f"Error live stock stats: {e}")
+            await ctx.send(f"❌ Error saat mengambil statistik live stock: {e}")
+
+    @commands.command(name="rankstats")
+    async def rank_index_stats(self, ctx):
+        """Tampilkan statistik rank index leveling dan reputation"""
+        try:
+            embed = discord.Embed(
+                title="🏆 Rank Index",
+                description="Urutan skor per guild di memory dan query SQL:",
+                color=0x0099ff
+            )
+            for name, index in (("Leveling", LEVEL_RANKS), ("Reputation", REPUTATION_RANKS)):
+                stats = index.get_stats()
+                embed.add_field(
+                    name=name,
+                    value=f"Guild dimuat: {stats['guilds_loaded']}\nEntry: {stats['entries']}\n"
+                          f"Hit memory: {stats['memory_hits']}\nLoad: {stats['loads']}\n"
+                          f"Query SQL: {stats['sql_queries']}",
+                    inline=True
+                )
+
+            await ctx.send(embed=embed)
+
+        except Exception as e:
+            logger.error(f"Error rank stats: {e}")
+            await ctx.send(f"❌ Error saat mengambil statistik rank: {e}")
+
 async def setup(bot):
     """Setup debug cog"""
     try:
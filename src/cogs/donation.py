@@ -28,6 +28,7 @@ class DonationCog(commands.Cog):
         
     async def cog_unload(self):
         """Cleanup saat cog di-unload"""
+        await self.donation_manager.close()
         self.logger.info("DonationCog unloaded")
 
     @commands.Cog.listener()
@@ -42,8 +42,9 @@ class HelpManager(commands.Cog):
                 (f"{self.PREFIX}systeminfo", "Show bot system information"),
                 (f"{self.PREFIX}maintenance <on/off>", "Toggle maintenance mode"),
                 (f"{self.PREFIX}blacklist <add/remove> <growid>", "Manage blacklisted users"),
-                (f"{self.PREFIX}backup", "Create and send database backup"),
-                (f"{self.PREFIX}restore", "Restore database from backup file")
+                (f"{self.PREFIX}backup [gz]", "Create and send database backup"),
+                (f"{self.PREFIX}backups", "List local database backups"),
+                (f"{self.PREFIX}restore [name]", "Restore database from backup file")
             ],
             "User Commands": [
                 (f"{self.PREFIX}balance", "Check your balance"),
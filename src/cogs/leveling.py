@@ -4,19 +4,114 @@ import sqlite3
 from datetime import datetime
 import random
 import asyncio
-from typing import Optional, Dict, List
+import time
+from typing import Optional, Dict, FrozenSet, List, Tuple
 from .utils import Embed, event_dispatcher
 from src.database.connection import get_connection
+from src.database.pool import get_pool
+from src.database.write_queue import get_write_queue
+from src.utils.leveling_curve import DEFAULT_CURVE
+from src.utils.rank_index import LEVEL_RANKS
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Interval flush XP yang di-buffer ke database (detik)
+XP_FLUSH_INTERVAL = 30
+# State user tanpa XP pending yang tidak aktif selama ini dibuang dari memory (detik)
+XP_STATE_IDLE_TTL = 3600
+
+class _XPState:
+    """XP user di memory: nilai tersimpan + delta yang belum di-flush"""
+    __slots__ = ('xp', 'level', 'pending_xp', 'pending_messages', 'last_message', 'last_gain')
+
+    def __init__(self, xp: int, level: int):
+        self.xp = xp                  # total XP termasuk delta pending
+        self.level = level
+        self.pending_xp = 0
+        self.pending_messages = 0
+        self.last_message = None
+        self.last_gain = 0.0          # time.monotonic() gain XP terakhir, untuk cooldown
+
+def _parse_ids(value: Optional[str]) -> FrozenSet[int]:
+    """'123,456' -> frozenset({123, 456}), entri kosong/tidak valid dilewati"""
+    if not value:
+        return frozenset()
+    return frozenset(int(part) for part in value.split(',') if part.strip().isdigit())
+
+class GuildLevelSettings:
+    """Settings leveling per guild yang sudah di-parse untuk hot path on_message"""
+    __slots__ = (
+        'enabled', 'announcement_channel', 'min_xp', 'max_xp', 'cooldown',
+        'stack_rewards', 'ignored_channels', 'ignored_roles', 'double_xp_roles'
+    )
+
+    def __init__(self, data: Dict):
+        self.enabled = bool(data['enabled'])
+        self.announcement_channel = int(data['announcement_channel']) if data['announcement_channel'] else None
+        self.min_xp = data['min_xp']
+        self.max_xp = data['max_xp']
+        self.cooldown = data['cooldown']
+        self.stack_rewards = bool(data['stack_rewards'])
+        self.ignored_channels = _parse_ids(data['ignored_channels'])
+        self.ignored_roles = _parse_ids(data['ignored_roles'])
+        self.double_xp_roles = _parse_ids(data['double_xp_roles'])
+
+DEFAULT_LEVEL_SETTINGS = {
+    'enabled': True,
+    'announcement_channel': None,
+    'min_xp': 15,
+    'max_xp': 25,
+    'cooldown': 60,
+    'stack_rewards': True,
+    'ignored_channels': None,
+    'ignored_roles': None,
+    'double_xp_roles': None
+}
+
+def _load_level_settings(conn, guild_id: str) -> Optional[Dict]:
+    row = conn.execute("SELECT * FROM leveling_settings WHERE guild_id = ?", (guild_id,)).fetchone()
+    return dict(row) if row else None
+
+def _insert_default_settings(conn, guild_id: str):
+    conn.execute("INSERT OR IGNORE INTO leveling_settings (guild_id) VALUES (?)", (guild_id,))
+
+def _load_user_level(conn, guild_id: str, user_id: str) -> Tuple[int, int]:
+    row = conn.execute(
+        "SELECT xp, level FROM user_levels WHERE guild_id = ? AND user_id = ?",
+        (guild_id, user_id)
+    ).fetchone()
+    return (row['xp'], row['level']) if row else (0, 0)
+
+def _flush_user_levels(conn, rows: List[Tuple]):
+    # Delta ditambahkan, bukan ditimpa, sehingga aman terhadap perubahan XP dari jalur lain
+    conn.executemany("""
+        INSERT INTO user_levels (guild_id, user_id, xp, level, messages, last_message)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(guild_id, user_id) DO UPDATE SET
+        xp = xp + excluded.xp,
+        level = MAX(level, excluded.level),
+        messages = messages + excluded.messages,
+        last_message = excluded.last_message
+    """, rows)
+
 class Leveling(commands.Cog):
     """⭐ Advanced Leveling System"""
     
     def __init__(self, bot):
         self.bot = bot
-        self.xp_cooldown = {}
+        # XP buffer per (guild_id, user_id); di-flush berkala dengan satu executemany
+        self.xp_states: Dict[Tuple[str, str], _XPState] = {}
+        self._flush_lock = asyncio.Lock()
+        self.xp_metrics = {
+            'buffered': 0,
+            'flushed_rows': 0,
+            'flushes': 0,
+            'flush_errors': 0
+        }
+        # Settings per guild yang sudah di-parse; di-invalidate oleh subcommand levelset
+        self.settings_cache: Dict[int, GuildLevelSettings] = {}
+        self.flush_task = bot.loop.create_task(self.xp_flush_loop())
         self.register_handlers()
 
     def setup_tables(self):
@@ -65,6 +160,9 @@ class Leveling(commands.Cog):
                 )
             """)
             
+            # Index rank/leaderboard (guild_id, xp DESC, user_id)
+            LEVEL_RANKS.ensure_index(cursor)
+            
             conn.commit()
             logger.info("Leveling tables created successfully")
             
@@ -138,57 +236,32 @@ class Leveling(commands.Cog):
             if conn:
                 conn.close()
 
-    def get_settings(self, guild_id: int) -> Dict:
-        """Get leveling settings for a guild"""
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT * FROM leveling_settings WHERE guild_id = ?
-            """, (str(guild_id),))
-            data = cursor.fetchone()
-            
-            if not data:
-                default_settings = {
-                    'enabled': True,
-                    'announcement_channel': None,
-                    'min_xp': 15,
-                    'max_xp': 25,
-                    'cooldown': 60,
-                    'stack_rewards': True,
-                    'ignored_channels': None,
-                    'ignored_roles': None,
-                    'double_xp_roles': None
-                }
-                
-                cursor.execute("""
-                    INSERT INTO leveling_settings (guild_id)
-                    VALUES (?)
-                """, (str(guild_id),))
-                conn.commit()
-                return default_settings
-                
-            return dict(data)
-            
-        except sqlite3.Error as e:
-            logger.error(f"Failed to get leveling settings: {e}")
-            raise
-        finally:
-            if conn:
-                conn.close()
+    async def get_guild_settings(self, guild_id: int) -> GuildLevelSettings:
+        """Settings guild dari cache; database hanya dibaca saat cache kosong"""
+        settings = self.settings_cache.get(guild_id)
+        if settings is not None:
+            return settings
+        
+        data = await get_pool().run(_load_level_settings, str(guild_id))
+        if data is None:
+            # Baris default dibutuhkan oleh UPDATE di subcommand levelset
+            await get_write_queue().submit(_insert_default_settings, str(guild_id))
+            data = DEFAULT_LEVEL_SETTINGS
+        
+        settings = self.settings_cache[guild_id] = GuildLevelSettings(data)
+        return settings
+
+    def invalidate_settings(self, guild_id: int):
+        """Buang settings guild dari cache setelah diubah"""
+        self.settings_cache.pop(guild_id, None)
 
     def calculate_xp_for_level(self, level: int) -> int:
         """Calculate XP required for a specific level"""
-        return 5 * (level ** 2) + 50 * level + 100
+        return DEFAULT_CURVE.xp_for_level(level)
 
     def calculate_level_for_xp(self, xp: int) -> int:
         """Calculate level for a specific amount of XP"""
-        level = 0
-        while self.calculate_xp_for_level(level + 1) <= xp:
-            level += 1
-        return level
+        return DEFAULT_CURVE.level_for_xp(xp)
 
     @commands.Cog.listener()
     async def on_message(self, message):
@@ -196,104 +269,140 @@ class Leveling(commands.Cog):
         if message.author.bot or not message.guild:
             return
             
-        # Get settings
-        settings = self.get_settings(message.guild.id)
-        if not settings['enabled']:
+        # Get settings (cache, tanpa I/O setelah pesan pertama di guild)
+        try:
+            settings = await self.get_guild_settings(message.guild.id)
+        except sqlite3.Error as e:
+            logger.error(f"Failed to get leveling settings: {e}")
+            return
+        if not settings.enabled:
             return
             
-        # Check cooldown
         user_id = str(message.author.id)
         guild_id = str(message.guild.id)
-        current_time = datetime.utcnow()
+        key = (guild_id, user_id)
+        now = time.monotonic()
         
-        cooldown_key = f"{guild_id}-{user_id}"
-        if cooldown_key in self.xp_cooldown:
-            time_diff = (current_time - self.xp_cooldown[cooldown_key]).total_seconds()
-            if time_diff < settings['cooldown']:
-                return
+        # Check cooldown
+        state = self.xp_states.get(key)
+        if state is not None and now - state.last_gain < settings.cooldown:
+            return
                 
         # Check ignored channels
-        if settings['ignored_channels']:
-            ignored_channels = settings['ignored_channels'].split(',')
-            if str(message.channel.id) in ignored_channels:
-                return
+        if message.channel.id in settings.ignored_channels:
+            return
                 
         # Check ignored roles
-        if settings['ignored_roles']:
-            ignored_roles = settings['ignored_roles'].split(',')
-            if any(str(role.id) in ignored_roles for role in message.author.roles):
+        if settings.ignored_roles and not settings.ignored_roles.isdisjoint(
+            role.id for role in message.author.roles
+        ):
+            return
+        
+        if state is None:
+            # XP tersimpan hanya dibaca sekali per user, selanjutnya dari memory
+            try:
+                xp, level = await get_pool().run(_load_user_level, guild_id, user_id)
+            except sqlite3.Error as e:
+                logger.error(f"Failed to load user XP: {e}")
+                return
+            state = self.xp_states.get(key)
+            if state is None:
+                state = self.xp_states[key] = _XPState(xp, level)
+            elif now - state.last_gain < settings.cooldown:
                 return
         
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            # Calculate XP gain
-            xp_gain = random.randint(settings['min_xp'], settings['max_xp'])
-            
-            # Check double XP roles
-            if settings['double_xp_roles']:
-                double_xp_roles = settings['double_xp_roles'].split(',')
-                if any(str(role.id) in double_xp_roles for role in message.author.roles):
-                    xp_gain *= 2
-            
-            # Update or insert user data
-            cursor.execute("""
-                INSERT INTO user_levels (guild_id, user_id, xp, messages, last_message)
-                VALUES (?, ?, ?, 1, ?)
-                ON CONFLICT(guild_id, user_id) DO UPDATE SET
-                xp = xp + ?,
-                messages = messages + 1,
-                last_message = ?
-            """, (
-                guild_id,
-                user_id,
-                xp_gain,
-                current_time,
-                xp_gain,
-                current_time
-            ))
-            
-            # Get updated XP
-            cursor.execute("""
-                SELECT xp, level FROM user_levels
-                WHERE guild_id = ? AND user_id = ?
-            """, (guild_id, user_id))
-            data = cursor.fetchone()
-            
-            if data:
-                new_level = self.calculate_level_for_xp(data['xp'])
-                if new_level > data['level']:
-                    # Update level
-                    cursor.execute("""
-                        UPDATE user_levels
-                        SET level = ?
-                        WHERE guild_id = ? AND user_id = ?
-                    """, (new_level, guild_id, user_id))
-                    
-                    # Handle level up
-                    await self.handle_level_up(message.author, new_level)
-            
-            conn.commit()
-            self.xp_cooldown[cooldown_key] = current_time
-            
-        except sqlite3.Error as e:
-            logger.error(f"Failed to update user XP: {e}")
-            if conn:
-                conn.rollback()
-        finally:
-            if conn:
-                conn.close()
+        # Calculate XP gain
+        xp_gain = random.randint(settings.min_xp, settings.max_xp)
+        
+        # Check double XP roles
+        if settings.double_xp_roles and not settings.double_xp_roles.isdisjoint(
+            role.id for role in message.author.roles
+        ):
+            xp_gain *= 2
+        
+        state.xp += xp_gain
+        state.pending_xp += xp_gain
+        state.pending_messages += 1
+        state.last_message = datetime.utcnow()
+        state.last_gain = now
+        self.xp_metrics['buffered'] += 1
+        LEVEL_RANKS.record(guild_id, user_id, state.xp)
+        
+        new_level = self.calculate_level_for_xp(state.xp)
+        if new_level > state.level:
+            state.level = new_level
+            await self.handle_level_up(message.author, new_level)
+
+    async def flush_xp(self) -> int:
+        """Tulis semua delta XP yang di-buffer ke database dalam satu batch"""
+        async with self._flush_lock:
+            pending = [(key, state) for key, state in self.xp_states.items() if state.pending_messages]
+            if not pending:
+                return 0
+            
+            rows = []
+            for (guild_id, user_id), state in pending:
+                rows.append((
+                    guild_id, user_id, state.pending_xp, state.level,
+                    state.pending_messages, state.last_message
+                ))
+                # Reset sebelum await; XP yang masuk selama flush masuk batch berikutnya
+                state.pending_xp = 0
+                state.pending_messages = 0
+            
+            try:
+                await get_write_queue().submit(_flush_user_levels, rows)
+            except Exception as e:
+                # Kembalikan delta ke buffer agar tidak hilang
+                for (_, state), row in zip(pending, rows):
+                    state.pending_xp += row[2]
+                    state.pending_messages += row[4]
+                self.xp_metrics['flush_errors'] += 1
+                logger.error(f"Failed to flush {len(rows)} XP rows: {e}")
+                return 0
+            
+            self.xp_metrics['flushes'] += 1
+            self.xp_metrics['flushed_rows'] += len(rows)
+            
+            # Buang state idle yang sudah tersimpan semua
+            cutoff = time.monotonic() - XP_STATE_IDLE_TTL
+            for key in [key for key, state in self.xp_states.items()
+                        if not state.pending_messages and state.last_gain < cutoff]:
+                del self.xp_states[key]
+            
+            return len(rows)
+
+    async def xp_flush_loop(self):
+        """Flush XP buffer secara berkala"""
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            await asyncio.sleep(XP_FLUSH_INTERVAL)
+            try:
+                await self.flush_xp()
+            except Exception as e:
+                logger.error(f"Error in XP flush loop: {e}")
+
+    async def cog_unload(self):
+        """Flush XP yang tersisa sebelum cog di-unload"""
+        self.flush_task.cancel()
+        await self.flush_xp()
+
+    def get_xp_metrics(self) -> Dict:
+        """Metrics XP buffer: pesan yang di-buffer vs baris yang di-flush"""
+        return {
+            **self.xp_metrics,
+            'pending_rows': sum(1 for state in self.xp_states.values() if state.pending_messages),
+            'tracked_users': len(self.xp_states)
+        }
 
     async def handle_level_up(self, member, new_level):
         """Handle level up events"""
         try:
-            settings = self.get_settings(member.guild.id)
+            settings = await self.get_guild_settings(member.guild.id)
             
             # Send level up message
-            if settings['announcement_channel']:
-                channel = member.guild.get_channel(int(settings['announcement_channel']))
+            if settings.announcement_channel:
+                channel = member.guild.get_channel(settings.announcement_channel)
                 if channel:
                     await channel.send(
                         f"🎉 Congratulations {member.mention}! You've reached level {new_level}!"
@@ -316,6 +425,9 @@ class Leveling(commands.Cog):
         """Show rank for a user"""
         member = member or ctx.author
         
+        # Pastikan XP yang masih di-buffer ikut terhitung
+        await self.flush_xp()
+        
         conn = None
         try:
             conn = get_connection()
@@ -331,14 +443,7 @@ class Leveling(commands.Cog):
                 return await ctx.send(f"❌ {member.mention} hasn't gained any XP yet!")
             
             # Get rank
-            cursor.execute("""
-                SELECT COUNT(*) as rank
-                FROM user_levels
-                WHERE guild_id = ? AND xp > ?
-            """, (str(ctx.guild.id), data['xp']))
-            rank_data = cursor.fetchone()
-            
-            rank = rank_data['rank'] + 1
+            rank = LEVEL_RANKS.rank(conn, ctx.guild.id, member.id)
             
             # Calculate progress to next level
             current_level_xp = self.calculate_xp_for_level(data['level'])
@@ -372,18 +477,15 @@ class Leveling(commands.Cog):
         if page < 1:
             return await ctx.send("❌ Page number must be 1 or higher!")
             
+        # Pastikan XP yang masih di-buffer ikut terhitung
+        await self.flush_xp()
+        
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
             
             # Get total pages
-            cursor.execute("""
-                SELECT COUNT(*) as count
-                FROM user_levels
-                WHERE guild_id = ?
-            """, (str(ctx.guild.id),))
-            total = cursor.fetchone()['count']
+            total = LEVEL_RANKS.count(conn, ctx.guild.id)
             
             per_page = 10
             pages = (total + per_page - 1) // per_page
@@ -391,15 +493,8 @@ class Leveling(commands.Cog):
             if page > pages and pages > 0:
                 return await ctx.send(f"❌ Invalid page! Total pages: {pages}")
             
-            # Get leaderboard data
-            cursor.execute("""
-                SELECT user_id, xp, level, messages
-                FROM user_levels
-                WHERE guild_id = ?
-                ORDER BY xp DESC
-                LIMIT ? OFFSET ?
-            """, (str(ctx.guild.id), per_page, (page - 1) * per_page))
-            leaders = cursor.fetchall()
+            # Get leaderboard data (keyset dari batas halaman, tanpa OFFSET scan)
+            leaders = LEVEL_RANKS.page(conn, ctx.guild.id, page, per_page)
             
             if not leaders:
                 return await ctx.send("❌ No users have gained XP yet!")
@@ -436,36 +531,54 @@ class Leveling(commands.Cog):
     async def levelset(self, ctx):
         """⚙️ Leveling system settings"""
         if ctx.invoked_subcommand is None:
-            settings = self.get_settings(ctx.guild.id)
+            settings = await self.get_guild_settings(ctx.guild.id)
             
             embed = Embed.create(
                 title="⚙️ Leveling Settings",
                 color=discord.Color.blue(),
-                field_Enabled=str(settings['enabled']),
-                field_XP_Range=f"{settings['min_xp']} - {settings['max_xp']}",
-                field_Cooldown=f"{settings['cooldown']} seconds",
-                field_Stack_Rewards=str(settings['stack_rewards'])
+                field_Enabled=str(settings.enabled),
+                field_XP_Range=f"{settings.min_xp} - {settings.max_xp}",
+                field_Cooldown=f"{settings.cooldown} seconds",
+                field_Stack_Rewards=str(settings.stack_rewards)
             )
             
-            if settings['announcement_channel']:
-                channel = ctx.guild.get_channel(int(settings['announcement_channel']))
+            if settings.announcement_channel:
+                channel = ctx.guild.get_channel(settings.announcement_channel)
                 if channel:
                     embed.add_field(name="Announcement Channel", value=channel.mention)
             
-            if settings['ignored_channels']:
-                channels = [f"<#{c}>" for c in settings['ignored_channels'].split(',')]
+            if settings.ignored_channels:
+                channels = [f"<#{c}>" for c in sorted(settings.ignored_channels)]
                 embed.add_field(name="Ignored Channels", value="\n".join(channels))
             
-            if settings['ignored_roles']:
-                roles = [f"<@&{r}>" for r in settings['ignored_roles'].split(',')]
+            if settings.ignored_roles:
+                roles = [f"<@&{r}>" for r in sorted(settings.ignored_roles)]
                 embed.add_field(name="Ignored Roles", value="\n".join(roles))
             
-            if settings['double_xp_roles']:
-                roles = [f"<@&{r}>" for r in settings['double_xp_roles'].split(',')]
+            if settings.double_xp_roles:
+                roles = [f"<@&{r}>" for r in sorted(settings.double_xp_roles)]
                 embed.add_field(name="Double XP Roles", value="\n".join(roles))
             
             await ctx.send(embed=embed)
 
+    @levelset.command(name="xpstats")
+    async def show_xp_metrics(self, ctx):
+        """Show XP buffer metrics"""
+        metrics = self.get_xp_metrics()
+        
+        embed = Embed.create(
+            title="📊 XP Buffer Metrics",
+            color=discord.Color.blue(),
+            field_Buffered_Messages=f"{metrics['buffered']:,}",
+            field_Flushed_Rows=f"{metrics['flushed_rows']:,}",
+            field_Flushes=f"{metrics['flushes']:,}",
+            field_Flush_Errors=str(metrics['flush_errors']),
+            field_Pending_Rows=str(metrics['pending_rows']),
+            field_Tracked_Users=str(metrics['tracked_users'])
+        )
+        
+        await ctx.send(embed=embed)
+
     @levelset.command(name="toggle")
     async def toggle_leveling(self, ctx, enabled: bool):
         """Toggle leveling system"""
@@ -480,6 +593,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (enabled, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             status = "enabled" if enabled else "disabled"
             await ctx.send(f"✅ Leveling system {status}!")
@@ -507,6 +621,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (channel_id, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             if channel:
                 await ctx.send(f"✅ Level up announcements will be sent to {channel.mention}")
@@ -537,6 +652,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (min_xp, max_xp, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             await ctx.send(f"✅ XP gain range set to {min_xp}-{max_xp}")
             
@@ -564,6 +680,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (seconds, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             await ctx.send(f"✅ XP gain cooldown set to {seconds} seconds")
             
@@ -588,6 +705,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (enabled, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             status = "will now stack" if enabled else "will no longer stack"
             await ctx.send(f"✅ Level rewards {status}")
@@ -724,6 +842,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (','.join(ignored) if ignored else None, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             await ctx.send(f"✅ XP gain {action} in {channel.mention}")
             
@@ -764,6 +883,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (','.join(ignored) if ignored else None, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             await ctx.send(f"✅ XP gain {action} for {role.mention}")
             
@@ -804,6 +924,7 @@ class Leveling(commands.Cog):
                 WHERE guild_id = ?
             """, (','.join(double_xp) if double_xp else None, str(ctx.guild.id)))
             conn.commit()
+            self.invalidate_settings(ctx.guild.id)
             
             await ctx.send(f"✅ Double XP {action} for {role.mention}")
             
@@ -8,6 +8,9 @@ from discord.ext import commands
 
 logger = logging.getLogger(__name__)
 
+# LiveButtonsCog memakai LiveStockCog, jadi dimuat setelah live_stock
+COG_DEPENDENCIES = ('src.cogs.live_stock',)
+
 class LiveButtonsWrapper(commands.Cog):
     """Wrapper cog untuk live buttons functionality"""
     
@@ -7,6 +7,7 @@ from datetime import datetime, timedelta
 from typing import Optional, Dict, List
 from .utils import Embed, event_dispatcher
 from src.database.connection import get_connection
+from src.utils.rank_index import REPUTATION_RANKS
 import logging
 
 logger = logging.getLogger(__name__)
@@ -112,6 +113,9 @@ class Reputation(commands.Cog):
                 )
             """)
             
+            # Index rank/leaderboard (guild_id, reputation DESC, user_id)
+            REPUTATION_RANKS.ensure_index(cursor)
+            
             conn.commit()
             logger.info("Reputation tables created successfully")
             
@@ -367,6 +371,7 @@ class Reputation(commands.Cog):
                     """, (str(member.id), str(ctx.guild.id)))
                     data = cursor.fetchone()
                     new_rep = data['reputation']
+                    REPUTATION_RANKS.record(ctx.guild.id, member.id, new_rep)
                     
                     await self.check_reputation_roles(member, new_rep)
                     await self.log_reputation(ctx.guild, ctx.author, member, "Give", 1, reason)
@@ -427,6 +432,8 @@ class Reputation(commands.Cog):
                 """, (str(member.id), str(ctx.guild.id)))
                 data = cursor.fetchone()
                 new_rep = data['reputation'] if data else 0
+                if data:
+                    REPUTATION_RANKS.record(ctx.guild.id, member.id, new_rep)
                 
                 await self.check_reputation_roles(member, new_rep)
                 await self.log_reputation(ctx.guild, ctx.author, member, "Remove", amount, reason)
@@ -465,14 +472,7 @@ class Reputation(commands.Cog):
                     return await self.send_response_once(ctx, "❌ This user has no reputation yet!")
                     
                 # Get rank
-                cursor.execute("""
-                    SELECT COUNT(*) as rank
-                    FROM user_reputation
-                    WHERE guild_id = ? AND reputation > ?
-                """, (str(ctx.guild.id), data['reputation']))
-                rank_data = cursor.fetchone()
-                
-                rank = rank_data['rank'] + 1
+                rank = REPUTATION_RANKS.rank(conn, ctx.guild.id, member.id)
                 
                 embed = Embed.create(
                     title=f"⭐ Reputation - {member.display_name}",
@@ -505,16 +505,7 @@ class Reputation(commands.Cog):
             conn = None
             try:
                 conn = get_connection()
-                cursor = conn.cursor()
-                
-                cursor.execute("""
-                    SELECT user_id, reputation
-                    FROM user_reputation
-                    WHERE guild_id = ?
-                    ORDER BY reputation DESC
-                    LIMIT 10
-                """, (str(ctx.guild.id),))
-                top_users = cursor.fetchall()
+                top_users = REPUTATION_RANKS.after(conn, ctx.guild.id, 10)
                 
                 if not top_users:
                     return await self.send_response_once(ctx, "❌ No one has any reputation yet!")
@@ -1,10 +1,22 @@
 import discord
 from discord.ext import commands
+import asyncio
 import datetime
 from collections import Counter
-import pandas as pd
 import io
 from .utils import Embed, get_connection, logger
+from src.database.activity_rollups import (
+    activity_totals, ensure_activity_rollups, member_counts, prune_activity
+)
+from src.database.batch_insert import BatchInsertQueue
+from src.database.write_queue import get_write_queue
+
+ACTIVITY_INSERT_SQL = """
+    INSERT INTO activity_logs (guild_id, user_id, activity_type, details, channel_id, timestamp)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+# Interval job retensi log mentah (detik)
+RETENTION_INTERVAL = 3600
 
 class ServerStats(commands.Cog):
     """📊 Sistem Statistik Server (ASCII Charts - Ramah HP Low-End)"""
@@ -13,6 +25,70 @@ class ServerStats(commands.Cog):
         self.bot = bot
         self.message_history = {}
         self.voice_time = {}
+        # Activity log di-buffer dan ditulis batch oleh flusher background
+        self.activity_queue = BatchInsertQueue(ACTIVITY_INSERT_SQL)
+        self.retention_task = bot.loop.create_task(self.retention_loop())
+        
+    def setup_tables(self):
+        """Setup tabel statistik"""
+        conn = None
+        try:
+            conn = get_connection()
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS activity_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    activity_type TEXT NOT NULL,
+                    details TEXT,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                    channel_id TEXT
+                )
+            """)
+            cursor.execute("""
+                CREATE INDEX IF NOT EXISTS idx_activity_logs_guild_time
+                ON activity_logs(guild_id, timestamp)
+            """)
+            
+            cursor.execute("""
+                CREATE TABLE IF NOT EXISTS member_history (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    guild_id TEXT NOT NULL,
+                    member_count INTEGER NOT NULL,
+                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            
+            # Rollup per jam/hari yang dibaca command statistik
+            ensure_activity_rollups(cursor)
+            
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Error setting up stats tables: {e}")
+            if conn:
+                conn.rollback()
+        finally:
+            if conn:
+                conn.close()
+
+    async def cog_unload(self):
+        """Tulis sisa activity log sebelum cog di-unload"""
+        self.retention_task.cancel()
+        await self.activity_queue.close()
+
+    async def retention_loop(self):
+        """Hapus log mentah dan rollup per jam yang melewati retensi"""
+        await self.bot.wait_until_ready()
+        while not self.bot.is_closed():
+            try:
+                removed = await prune_activity(get_write_queue().submit)
+                if any(removed.values()):
+                    logger.info(f"Activity retention: {removed}")
+            except Exception as e:
+                logger.error(f"Error in activity retention: {e}")
+            await asyncio.sleep(RETENTION_INTERVAL)
         
     def create_ascii_bar_chart(self, data, labels, title="Chart", max_width=30):
         """Create ASCII bar chart yang ramah untuk HP low-end"""
@@ -88,26 +164,25 @@ class ServerStats(commands.Cog):
         chart_lines.append("=" * max_width)
         return "\n".join(chart_lines)
         
-    def log_activity(self, guild_id: int, user_id: int, activity_type: str, details: str = None):
-        """Log any server activity"""
-        conn = None
-        try:
-            conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                INSERT INTO activity_logs (guild_id, user_id, activity_type, details)
-                VALUES (?, ?, ?, ?)
-            """, (str(guild_id), str(user_id), activity_type, details))
-            
-            conn.commit()
-        except Exception as e:
-            logger.error(f"Error logging activity: {e}")
-            if conn:
-                conn.rollback()
-        finally:
-            if conn:
-                conn.close()
+    @staticmethod
+    def _activity_row(guild_id: int, user_id: int, activity_type: str,
+                      details: str = None, channel_id: int = None) -> tuple:
+        timestamp = datetime.datetime.utcnow().strftime('%Y-%m-%d %H:%M:%S')
+        return (
+            str(guild_id), str(user_id), activity_type, details,
+            str(channel_id) if channel_id else None, timestamp
+        )
+
+    def log_activity(self, guild_id: int, user_id: int, activity_type: str,
+                     details: str = None, channel_id: int = None) -> bool:
+        """Log any server activity (non-blocking; di-sample/dibuang saat antrian penuh)"""
+        return self.activity_queue.put_nowait(
+            self._activity_row(guild_id, user_id, activity_type, details, channel_id)
+        )
+
+    async def log_activity_wait(self, guild_id: int, user_id: int, activity_type: str, details: str = None):
+        """Log activity yang tidak boleh hilang; menunggu saat antrian penuh"""
+        await self.activity_queue.put(self._activity_row(guild_id, user_id, activity_type, details))
 
     def log_message_activity(self, message):
         """Log message activity"""
@@ -118,7 +193,8 @@ class ServerStats(commands.Cog):
             message.guild.id,
             message.author.id,
             'message',
-            f'Channel: {message.channel.name}'
+            f'Channel: {message.channel.name}',
+            message.channel.id
         )
 
     def log_voice_activity(self, member, before, after):
@@ -131,16 +207,61 @@ class ServerStats(commands.Cog):
                 member.guild.id,
                 member.id,
                 'voice_join',
-                f'Channel: {after.channel.name}'
+                f'Channel: {after.channel.name}',
+                after.channel.id
             )
         elif before.channel is not None and after.channel is None:
             self.log_activity(
                 member.guild.id,
                 member.id,
                 'voice_leave',
-                f'Channel: {before.channel.name}'
+                f'Channel: {before.channel.name}',
+                before.channel.id
             )
 
+    @commands.Cog.listener()
+    async def on_message(self, message):
+        """Track message activity"""
+        self.log_message_activity(message)
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """Track voice activity"""
+        self.log_voice_activity(member, before, after)
+
+    @commands.command(name="activityqueue")
+    @commands.has_permissions(administrator=True)
+    async def activity_queue_stats(self, ctx):
+        """📥 Tampilkan statistik antrian activity log"""
+        stats = self.activity_queue.stats()
+        
+        embed = Embed(
+            title="📥 Activity Log Queue",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Antrian",
+            value=f"Queued: {stats['queued']}\n"
+                  f"Enqueued: {stats['enqueued']:,}\n"
+                  f"Flushed: {stats['flushed']:,}",
+            inline=True
+        )
+        embed.add_field(
+            name="Hilang",
+            value=f"Sampled out: {stats['sampled_out']:,}\n"
+                  f"Dropped: {stats['dropped']:,}\n"
+                  f"Failed: {stats['failed']:,}",
+            inline=True
+        )
+        embed.add_field(
+            name="Batch",
+            value=f"Total: {stats['batches']:,}\n"
+                  f"Rata-rata: {stats['avg_batch']}",
+            inline=True
+        )
+        
+        await ctx.send(embed=embed)
+
     @commands.command(name="serverstats")
     async def show_server_stats(self, ctx):
         """📊 Tampilkan statistik server"""
@@ -219,32 +340,15 @@ class ServerStats(commands.Cog):
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT activity_type, COUNT(*) as count, 
-                       strftime('%Y-%m-%d', timestamp) as date
-                FROM activity_logs
-                WHERE guild_id = ?
-                AND timestamp > datetime('now', ?)
-                GROUP BY activity_type, date
-                ORDER BY date
-            """, (str(ctx.guild.id), f'-{days} days'))
+            # Dibaca dari rollup harian/per jam, bukan dari activity_logs mentah
+            totals = activity_totals(conn, ctx.guild.id, days)
             
-            data = cursor.fetchall()
-            
-            if not data:
+            if not totals:
                 return await ctx.send("❌ Tidak ada data aktivitas!")
                 
-            # Process data for chart
-            df = pd.DataFrame(data, columns=['activity_type', 'count', 'date'])
-            
-            # Create summary chart
-            activity_totals = df.groupby('activity_type')['count'].sum().to_dict()
-            
             chart = self.create_ascii_bar_chart(
-                list(activity_totals.values()),
-                list(activity_totals.keys()),
+                list(totals.values()),
+                list(totals.keys()),
                 f"Activity Summary - Last {days} Days"
             )
             
@@ -269,30 +373,20 @@ class ServerStats(commands.Cog):
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT member_count, 
-                       strftime('%m-%d', timestamp) as date
-                FROM member_history
-                WHERE guild_id = ?
-                ORDER BY timestamp
-                LIMIT 30
-            """, (str(ctx.guild.id),))
-            
-            data = cursor.fetchall()
+            # Jumlah member terakhir per hari dari rollup
+            data = member_counts(conn, ctx.guild.id, 30)
             
             if not data:
                 return await ctx.send("❌ Tidak ada data history member!")
                 
             # Create line chart
-            dates = [row[1] for row in data]
-            counts = [row[0] for row in data]
+            dates = [day[5:] for day, _ in data]
+            counts = [count for _, count in data]
             
             chart = self.create_ascii_line_chart(
                 counts,
                 dates,
-                "Member Growth History (Last 30 Records)"
+                "Member Growth History (Last 30 Days)"
             )
             
             embed = Embed(
@@ -313,7 +407,7 @@ class ServerStats(commands.Cog):
     @commands.Cog.listener()
     async def on_member_join(self, member):
         """Track member joins"""
-        self.log_activity(member.guild.id, member.id, 'member_join')
+        await self.log_activity_wait(member.guild.id, member.id, 'member_join')
         
         # Update member history
         conn = None
@@ -338,7 +432,7 @@ class ServerStats(commands.Cog):
     @commands.Cog.listener()
     async def on_member_remove(self, member):
         """Track member leaves"""
-        self.log_activity(member.guild.id, member.id, 'member_leave')
+        await self.log_activity_wait(member.guild.id, member.id, 'member_leave')
         
         # Update member history
         conn = None
@@ -362,4 +456,6 @@ class ServerStats(commands.Cog):
 
 async def setup(bot):
     """Setup the Stats cog"""
-    await bot.add_cog(ServerStats(bot))
+    cog = ServerStats(bot)
+    cog.setup_tables()
+    await bot.add_cog(cog)
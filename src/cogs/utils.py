@@ -197,15 +197,6 @@ def update_user(conn, user_id: int, **kwargs):
     params = tuple(kwargs.values()) + (str(user_id),)
     cursor.execute(query, params)
 
-@transaction
-def log_activity(conn, guild_id: int, user_id: int, activity_type: str, details: str = None):
-    """Log activity to database"""
-    cursor = conn.cursor()
-    cursor.execute("""
-        INSERT INTO activity_logs (guild_id, user_id, activity_type, details)
-        VALUES (?, ?, ?, ?)
-    """, (str(guild_id), str(user_id), activity_type, details))
-
 # Export commonly used functions and classes
 __all__ = [
     'Embed',
@@ -216,7 +207,6 @@ __all__ = [
     'transaction',
     'get_user',
     'update_user',
-    'log_activity',
     'logger',
     'event_dispatcher',
     'permissions'
@@ -1,12 +1,11 @@
 import discord
 from discord.ext import commands
-from PIL import Image, ImageDraw, ImageFont, ImageFilter
 import io
-import aiohttp
 from datetime import datetime
 from typing import Optional
 from .utils import Embed, event_dispatcher
 from src.database.connection import get_connection
+from src.utils.welcome_card import WelcomeCardRenderer
 import sqlite3
 import asyncio
 from asyncio import Lock
@@ -23,10 +22,15 @@ class Welcome(commands.Cog):
         self.background_path = "assets/backgrounds/"
         # Initialize locks
         self.db_lock = Lock()  # For database operations
-        self.welcome_lock = Lock()  # For welcome card creation and sending
         self.response_lock = Lock()  # For preventing multiple responses
+        # Render kartu di thread pool dengan concurrency terbatas
+        self.card_renderer = WelcomeCardRenderer(self.font_path, self.background_path)
         self.register_handlers()
 
+    async def cog_unload(self):
+        """Tutup session HTTP dan thread pool renderer"""
+        await self.card_renderer.close()
+
     async def acquire_lock(self, lock: Lock, timeout: float = 10.0) -> bool:
         """Helper method to acquire a lock with timeout"""
         try:
@@ -97,126 +101,15 @@ class Welcome(commands.Cog):
 
     async def create_welcome_card(self, member: discord.Member, settings: dict) -> io.BytesIO:
         """Create a customized welcome card"""
-        if not await self.acquire_lock(self.welcome_lock):
-            logger.error("Failed to acquire welcome lock for card creation")
-            return None
-
-        try:
-            # Load background
-            try:
-                if settings['custom_background']:
-                    background = Image.open(f"{self.background_path}{settings['custom_background']}")
-                else:
-                    background = Image.open(f"{self.background_path}welcome_bg.png")
-            except Exception as e:
-                logger.error(f"Failed to load background: {e}")
-                return None
-                
-            # Apply blur effect to background
-            background = background.filter(ImageFilter.GaussianBlur(5))
-            
-            # Create drawing context
-            draw = ImageDraw.Draw(background)
-            
-            try:
-                # Load fonts
-                title_font = ImageFont.truetype(
-                    f"{self.font_path}{settings.get('custom_font', 'title.ttf')}", 
-                    60
-                )
-                subtitle_font = ImageFont.truetype(
-                    f"{self.font_path}{settings.get('custom_font', 'subtitle.ttf')}", 
-                    40
-                )
-            except Exception as e:
-                logger.error(f"Failed to load fonts: {e}")
-                return None
-            
-            # Download and process avatar
-            try:
-                async with aiohttp.ClientSession() as session:
-                    async with session.get(str(member.display_avatar.url)) as resp:
-                        if resp.status != 200:
-                            logger.error(f"Failed to download avatar: {resp.status}")
-                            return None
-                        avatar_bytes = await resp.read()
-            except Exception as e:
-                logger.error(f"Failed to download avatar: {e}")
-                return None
-                    
-            try:
-                with Image.open(io.BytesIO(avatar_bytes)) as avatar:
-                    # Create circular mask
-                    mask = Image.new("L", avatar.size, 0)
-                    draw_mask = ImageDraw.Draw(mask)
-                    draw_mask.ellipse((0, 0, *avatar.size), fill=255)
-                    
-                    # Apply mask and resize
-                    avatar = avatar.resize((200, 200))
-                    mask = mask.resize((200, 200))
-                    
-                    # Create circular border
-                    border = Image.new("RGBA", (220, 220), (255, 255, 255, 0))
-                    draw_border = ImageDraw.Draw(border)
-                    draw_border.ellipse((0, 0, 219, 219), outline=(255, 255, 255, 255), width=3)
-                    
-                    # Composite images
-                    background.paste(avatar, (340, 50), mask)
-                    background.paste(border, (330, 40), border)
-            except Exception as e:
-                logger.error(f"Failed to process avatar: {e}")
-                return None
-                
-            # Add text with shadow effect
-            def draw_text_with_shadow(text, position, font, fill, shadow_color=(0, 0, 0)):
-                # Draw shadow
-                draw.text((position[0]+2, position[1]+2), text, font=font, fill=shadow_color)
-                # Draw main text
-                draw.text(position, text, font=font, fill=fill)
-                
-            # Welcome text
-            draw_text_with_shadow(
-                f"Welcome {member.name}!",
-                (450, 280),
-                title_font,
-                "white"
-            )
-            
-            # Member count
-            draw_text_with_shadow(
-                f"Member #{len(member.guild.members)}",
-                (450, 340),
-                subtitle_font,
-                "lightgray"
-            )
-            
-            # Server name
-            draw_text_with_shadow(
-                member.guild.name,
-                (450, 400),
-                subtitle_font,
-                "white"
-            )
-            
-            # Convert to bytes
-            buffer = io.BytesIO()
-            background.save(buffer, format="PNG")
-            buffer.seek(0)
-            
-            return buffer
-
-        except Exception as e:
-            logger.error(f"Error creating welcome card: {e}")
-            return None
-        finally:
-            self.welcome_lock.release()
+        lines = [
+            (f"Welcome {member.name}!", (450, 280), 'title', "white"),
+            (f"Member #{len(member.guild.members)}", (450, 340), 'subtitle', "lightgray"),
+            (member.guild.name, (450, 400), 'subtitle', "white")
+        ]
+        return await self.card_renderer.render(str(member.display_avatar.url), lines, settings)
 
     async def handle_member_join(self, member: discord.Member):
         """Handle new member joins"""
-        if not await self.acquire_lock(self.welcome_lock):
-            logger.error("Failed to acquire welcome lock for member join")
-            return
-
         try:
             settings = await self.get_guild_settings(member.guild.id)
             
@@ -227,10 +120,8 @@ class Welcome(commands.Cog):
             if not channel:
                 return
                 
-            # Create welcome card
+            # Create welcome card (None saat render gagal atau antrian penuh, embed tetap dikirim)
             card_buffer = await self.create_welcome_card(member, settings)
-            if not card_buffer:
-                return
             
             # Create embed
             embed = Embed.create(
@@ -258,14 +149,16 @@ class Welcome(commands.Cog):
                 )
                 
             # Send welcome message
-            file = discord.File(card_buffer, "welcome.png")
-            embed.set_image(url="attachment://welcome.png")
-            
-            welcome_msg = await channel.send(
-                content=member.mention,
-                embed=embed,
-                file=file
-            )
+            if card_buffer:
+                file = discord.File(card_buffer, "welcome.png")
+                embed.set_image(url="attachment://welcome.png")
+                welcome_msg = await channel.send(
+                    content=member.mention,
+                    embed=embed,
+                    file=file
+                )
+            else:
+                welcome_msg = await channel.send(content=member.mention, embed=embed)
             
             # Add verification reaction if required
             if settings['verification_required']:
@@ -285,17 +178,12 @@ class Welcome(commands.Cog):
         
         except Exception as e:
             logger.error(f"Error handling member join: {e}")
-        finally:
-            self.welcome_lock.release()
 
     async def handle_verification(self, payload):
         """Handle verification reactions"""
         if str(payload.emoji) != "✅":
             return
 
-        if not await self.acquire_lock(self.welcome_lock):
-            return
-            
         try:
             settings = await self.get_guild_settings(payload.guild_id)
             if not settings['verification_required']:
@@ -319,8 +207,8 @@ class Welcome(commands.Cog):
                     await self.log_welcome(guild.id, member.id, 'verify')
                 except discord.Forbidden:
                     logger.error(f"Failed to add verification role to {member.id}: Missing permissions")
-        finally:
-            self.welcome_lock.release()
+        except Exception as e:
+            logger.error(f"Error handling verification: {e}")
 
     async def log_welcome(self, guild_id: int, user_id: int, action_type: str):
         """Log welcome events"""
@@ -453,17 +341,37 @@ class Welcome(commands.Cog):
     @welcome.command(name="test")
     async def test_welcome(self, ctx):
         """Test welcome message"""
-        if not await self.acquire_lock(self.welcome_lock):
-            return await self.send_response_once(ctx, "❌ System is busy, please try again later")
-            
         try:
             await self.handle_member_join(ctx.author)
             await self.send_response_once(ctx, "✅ Test welcome message sent!")
         except Exception as e:
             logger.error(f"Error testing welcome message: {e}")
             await self.send_response_once(ctx, "❌ Failed to send test welcome message")
-        finally:
-            self.welcome_lock.release()
+
+    @welcome.command(name="stats")
+    async def welcome_card_stats(self, ctx):
+        """Tampilkan statistik renderer kartu welcome"""
+        stats = self.card_renderer.stats()
+        
+        embed = discord.Embed(
+            title="🖼️ Welcome Card Renderer",
+            color=discord.Color.blue()
+        )
+        embed.add_field(
+            name="Render",
+            value=f"Pending: {stats['pending']}\n"
+                  f"Rendered: {stats['rendered']:,}\n"
+                  f"Skipped: {stats['skipped']:,}",
+            inline=True
+        )
+        embed.add_field(
+            name="Cache",
+            value=f"Avatar: {stats['avatar_cache']} "
+                  f"({stats['avatar_hits']:,} hit / {stats['avatar_misses']:,} miss)\n"
+                  f"Background: {stats['background_cache']}",
+            inline=True
+        )
+        await self.send_response_once(ctx, None, embed=embed)
 
 async def setup(bot):
     """Setup the Welcome cog"""
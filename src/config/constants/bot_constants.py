@@ -36,6 +36,7 @@ class TIMEOUTS:
     CACHE_OPERATION = 2 # 2 seconds
     SYNC_RETRY = 5     # 5 seconds retry interval
     MAX_RETRIES = 3    # Maximum number of retries
+    COLD_START_BUDGET = 15  # 15 seconds from setup_hook until all modules are loaded
 
 # Live System Status States
 class LIVE_STATUS:
@@ -462,6 +463,8 @@ class UPDATE_INTERVAL:
     BUTTONS = 30.0       # Update buttons every 30 seconds
     CACHE = 300.0        # Cache timeout 5 minutes
     STATUS = 15.0        # Status update every 15 seconds
+    LIVE_STOCK_DEBOUNCE = 2.0          # Jeda penggabungan update live stock setelah stock berubah
+    LIVE_STOCK_MAX_STALENESS = 300.0   # Edit paksa live stock jika pesan lebih tua dari ini
 
 # Cache Settings (Existing)
 class CACHE_TIMEOUT:
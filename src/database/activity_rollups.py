@@ -0,0 +1,190 @@
+"""
+Activity Rollups
+Agregat activity_logs per jam dan per hari (guild, activity type, channel)
+dan snapshot member_history per hari, dipelihara trigger saat baris masuk
+sehingga command statistik membaca ratusan baris rollup, bukan jutaan
+baris log mentah. Log mentah punya retensi; rollup harian disimpan terus
+"""
+
+import logging
+from typing import Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Log mentah dan snapshot member dihapus setelah sekian hari (rollup tetap ada)
+RAW_RETENTION_DAYS = 30
+# Rollup per jam hanya dibutuhkan untuk sisi awal jendela query harian
+HOURLY_RETENTION_DAYS = 90
+# Jumlah baris per DELETE saat pruning, agar transaksi tetap pendek
+PRUNE_CHUNK = 5000
+
+ACTIVITY_ROLLUP_SCHEMA: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS activity_rollup_hourly (
+        guild_id TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        activity_type TEXT NOT NULL,
+        channel_id TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, bucket, activity_type, channel_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS activity_rollup_daily (
+        guild_id TEXT NOT NULL,
+        bucket TEXT NOT NULL,
+        activity_type TEXT NOT NULL,
+        channel_id TEXT NOT NULL DEFAULT '',
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (guild_id, bucket, activity_type, channel_id)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS member_count_daily (
+        guild_id TEXT NOT NULL,
+        day TEXT NOT NULL,
+        member_count INTEGER NOT NULL,
+        PRIMARY KEY (guild_id, day)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_activity_rollup_insert
+    AFTER INSERT ON activity_logs
+    BEGIN
+        INSERT INTO activity_rollup_hourly (guild_id, bucket, activity_type, channel_id, count)
+        VALUES (NEW.guild_id, strftime('%Y-%m-%d %H:00:00', COALESCE(NEW.timestamp, 'now')),
+                NEW.activity_type, COALESCE(NEW.channel_id, ''), 1)
+        ON CONFLICT (guild_id, bucket, activity_type, channel_id) DO UPDATE SET count = count + 1;
+        INSERT INTO activity_rollup_daily (guild_id, bucket, activity_type, channel_id, count)
+        VALUES (NEW.guild_id, date(COALESCE(NEW.timestamp, 'now')),
+                NEW.activity_type, COALESCE(NEW.channel_id, ''), 1)
+        ON CONFLICT (guild_id, bucket, activity_type, channel_id) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_member_count_daily_insert
+    AFTER INSERT ON member_history
+    BEGIN
+        INSERT INTO member_count_daily (guild_id, day, member_count)
+        VALUES (NEW.guild_id, date(COALESCE(NEW.timestamp, 'now')), NEW.member_count)
+        ON CONFLICT (guild_id, day) DO UPDATE SET member_count = excluded.member_count;
+    END
+    """,
+)
+
+def _table_exists(cursor, name: str) -> bool:
+    return cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (name,)
+    ).fetchone() is not None
+
+def _columns(cursor, table: str) -> List[str]:
+    return [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+
+def rebuild_activity_rollups(cursor):
+    """Hitung ulang semua rollup dari activity_logs dan member_history yang tersisa"""
+    cursor.execute("DELETE FROM activity_rollup_hourly")
+    cursor.execute("DELETE FROM activity_rollup_daily")
+    cursor.execute("DELETE FROM member_count_daily")
+    cursor.execute("""
+        INSERT INTO activity_rollup_hourly (guild_id, bucket, activity_type, channel_id, count)
+        SELECT guild_id, strftime('%Y-%m-%d %H:00:00', timestamp), activity_type,
+               COALESCE(channel_id, ''), COUNT(*)
+        FROM activity_logs
+        GROUP BY 1, 2, 3, 4
+    """)
+    cursor.execute("""
+        INSERT INTO activity_rollup_daily (guild_id, bucket, activity_type, channel_id, count)
+        SELECT guild_id, substr(bucket, 1, 10), activity_type, channel_id, SUM(count)
+        FROM activity_rollup_hourly
+        GROUP BY 1, 2, 3, 4
+    """)
+    # Snapshot terakhir per hari (max id = baris terbaru)
+    cursor.execute("""
+        INSERT INTO member_count_daily (guild_id, day, member_count)
+        SELECT m.guild_id, date(m.timestamp), m.member_count
+        FROM member_history m
+        JOIN (
+            SELECT MAX(id) AS id FROM member_history GROUP BY guild_id, date(timestamp)
+        ) latest ON latest.id = m.id
+    """)
+
+def ensure_activity_rollups(cursor):
+    """
+    Pastikan kolom channel_id, tabel rollup dan trigger ada.
+    Tabel activity_logs dan member_history harus sudah dibuat.
+    Rollup di-backfill sekali dari data lama saat pertama kali dibuat
+    """
+    if 'channel_id' not in _columns(cursor, 'activity_logs'):
+        cursor.execute("ALTER TABLE activity_logs ADD COLUMN channel_id TEXT")
+    exists = _table_exists(cursor, 'activity_rollup_daily')
+    for statement in ACTIVITY_ROLLUP_SCHEMA:
+        cursor.execute(statement)
+    if not exists:
+        rebuild_activity_rollups(cursor)
+        logger.info("Activity rollups di-backfill dari log mentah")
+
+def activity_totals(conn, guild_id, days: int) -> Dict[str, int]:
+    """
+    Jumlah aktivitas per type dalam `days` hari terakhir (presisi jam):
+    hari penuh dari rollup harian, hari paling awal dari rollup per jam
+    """
+    offset = f'-{int(days)} days'
+    rows = conn.execute("""
+        SELECT activity_type, SUM(count) AS total FROM (
+            SELECT activity_type, count FROM activity_rollup_daily
+            WHERE guild_id = ? AND bucket > date('now', ?)
+            UNION ALL
+            SELECT activity_type, count FROM activity_rollup_hourly
+            WHERE guild_id = ?
+              AND bucket >= strftime('%Y-%m-%d %H:00:00', 'now', ?)
+              AND bucket < date('now', ?, '+1 day')
+        )
+        GROUP BY activity_type
+        ORDER BY total DESC
+    """, (str(guild_id), offset, str(guild_id), offset, offset)).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+def member_counts(conn, guild_id, limit: int = 30) -> List[Tuple[str, int]]:
+    """(hari, jumlah member terakhir hari itu) untuk `limit` hari terakhir, urut naik"""
+    rows = conn.execute("""
+        SELECT day, member_count FROM member_count_daily
+        WHERE guild_id = ?
+        ORDER BY day DESC
+        LIMIT ?
+    """, (str(guild_id), limit)).fetchall()
+    return [(row[0], row[1]) for row in reversed(rows)]
+
+def _prune_chunk(conn, table: str, offset: str) -> int:
+    # Log ditulis berurutan waktu, jadi cukup periksa PRUNE_CHUNK rowid tertua:
+    # biaya per chunk tetap walaupun tabel berisi puluhan juta baris
+    return conn.execute(f"""
+        DELETE FROM {table} WHERE rowid IN (
+            SELECT rowid FROM (
+                SELECT rowid, timestamp FROM {table} ORDER BY rowid LIMIT {PRUNE_CHUNK}
+            ) WHERE timestamp < datetime('now', ?)
+        )
+    """, (offset,)).rowcount
+
+def _prune_hourly(conn, offset: str) -> int:
+    return conn.execute(
+        "DELETE FROM activity_rollup_hourly WHERE bucket < strftime('%Y-%m-%d %H:00:00', 'now', ?)",
+        (offset,)
+    ).rowcount
+
+async def prune_activity(submit, raw_days: int = RAW_RETENTION_DAYS,
+                         hourly_days: int = HOURLY_RETENTION_DAYS) -> Dict[str, int]:
+    """
+    Retensi: hapus log mentah dan rollup per jam yang sudah lewat batas.
+    Log mentah dihapus per chunk lewat submit (mis. write queue) supaya
+    writer lain tidak tertahan lama; rollup harian tidak disentuh
+    """
+    removed = {'activity_logs': 0, 'member_history': 0, 'activity_rollup_hourly': 0}
+    raw_cutoff = f'-{int(raw_days)} days'
+    for table in ('activity_logs', 'member_history'):
+        while True:
+            deleted = await submit(_prune_chunk, table, raw_cutoff)
+            removed[table] += deleted
+            if deleted < PRUNE_CHUNK:
+                break
+    removed['activity_rollup_hourly'] = await submit(_prune_hourly, f'-{int(hourly_days)} days')
+    return removed
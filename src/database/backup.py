@@ -0,0 +1,256 @@
+"""
+Database Backup Engine
+Backup online memakai SQLite backup API: halaman disalin bertahap dengan
+jeda antar langkah sehingga writer (WAL) tetap jalan, hasilnya konsisten
+termasuk isi file -wal. Setiap backup diverifikasi dengan integrity_check,
+bisa dikompres gzip, dan ditulisi manifest (sha256, ukuran, durasi).
+Restore juga lewat backup API sehingga koneksi yang sedang terbuka tetap
+valid dan langsung melihat data hasil restore
+"""
+
+import gzip
+import hashlib
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+logger = logging.getLogger(__name__)
+
+# Halaman per langkah backup dan jeda antar langkah (detik)
+PAGES_PER_STEP = 256
+STEP_SLEEP = 0.005
+MANIFEST_SUFFIX = ".manifest.json"
+_CHUNK = 1024 * 1024
+
+PathLike = Union[str, Path]
+
+class BackupError(Exception):
+    """Backup atau verifikasi backup gagal"""
+    pass
+
+def file_sha256(path: PathLike) -> str:
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def integrity_check(db_path: PathLike) -> str:
+    """Jalankan PRAGMA integrity_check pada file database, return 'ok' jika sehat"""
+    conn = None
+    try:
+        conn = sqlite3.connect(f"file:{Path(db_path).resolve()}?mode=ro", uri=True)
+        rows = conn.execute("PRAGMA integrity_check").fetchall()
+        return "; ".join(str(row[0]) for row in rows[:5])
+    except sqlite3.DatabaseError as e:
+        return str(e)
+    finally:
+        if conn:
+            conn.close()
+
+def manifest_path(backup_path: PathLike) -> Path:
+    return Path(f"{backup_path}{MANIFEST_SUFFIX}")
+
+def read_manifest(backup_path: PathLike) -> Optional[Dict[str, Any]]:
+    path = manifest_path(backup_path)
+    if not path.exists():
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+class BackupEngine:
+    """Buat, verifikasi, rotasi dan restore backup satu file database"""
+
+    def __init__(
+        self,
+        db_path: PathLike = "shop.db",
+        backup_dir: PathLike = "backups",
+        pages_per_step: int = PAGES_PER_STEP,
+        step_sleep: float = STEP_SLEEP
+    ):
+        self.db_path = Path(db_path)
+        self.backup_dir = Path(backup_dir)
+        self.pages_per_step = pages_per_step
+        self.step_sleep = step_sleep
+        self.backup_dir.mkdir(parents=True, exist_ok=True)
+
+    # ---- backup ----
+
+    def _copy_online(self, dest: Path) -> int:
+        """Salin database ke dest lewat backup API, return jumlah halaman"""
+        progress = {'pages': 0}
+
+        def _progress(status, remaining, total):
+            progress['pages'] = total
+
+        source = sqlite3.connect(str(self.db_path), timeout=30)
+        target = sqlite3.connect(str(dest))
+        try:
+            source.backup(target, pages=self.pages_per_step, progress=_progress, sleep=self.step_sleep)
+            # Backup berdiri sendiri sebagai satu file, tanpa -wal
+            target.execute("PRAGMA journal_mode=DELETE")
+        finally:
+            target.close()
+            source.close()
+        return progress['pages']
+
+    def create_backup(self, prefix: str = "shop_backup", compress: bool = False,
+                      skip_if_unchanged: bool = False) -> Optional[Dict[str, Any]]:
+        """
+        Buat backup online dan manifest-nya.
+        skip_if_unchanged: lewati jika isi database sama dengan backup terakhir
+        ber-prefix sama (untuk backup terjadwal), return None jika dilewati
+        """
+        started = time.perf_counter()
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        name = f"{prefix}_{timestamp}.db"
+        suffix = 0
+        while list(self.backup_dir.glob(f"{name}*")):
+            suffix += 1
+            name = f"{prefix}_{timestamp}_{suffix}.db"
+        raw_path = self.backup_dir / f".{name}.tmp"
+
+        try:
+            pages = self._copy_online(raw_path)
+
+            result = integrity_check(raw_path)
+            if result != 'ok':
+                raise BackupError(f"Integrity check backup gagal: {result}")
+
+            content_sha256 = file_sha256(raw_path)
+            if skip_if_unchanged:
+                latest = self.latest_backup(prefix)
+                if latest and latest.get('content_sha256') == content_sha256:
+                    logger.info(f"Backup {prefix} dilewati, database tidak berubah sejak {latest['file']}")
+                    return None
+
+            if compress:
+                name += ".gz"
+                final_path = self.backup_dir / name
+                with open(raw_path, 'rb') as src, gzip.open(final_path, 'wb', compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst, _CHUNK)
+            else:
+                final_path = self.backup_dir / name
+                os.replace(raw_path, final_path)
+        finally:
+            if raw_path.exists():
+                raw_path.unlink()
+
+        manifest = {
+            'file': name,
+            'prefix': prefix,
+            'source': str(self.db_path),
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'compressed': compress,
+            'pages': pages,
+            'size': final_path.stat().st_size,
+            'sha256': file_sha256(final_path),
+            'content_sha256': content_sha256,
+            'integrity': 'ok',
+            'duration_ms': round((time.perf_counter() - started) * 1000, 1)
+        }
+        with open(manifest_path(final_path), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        logger.info(f"Backup database dibuat: {name} ({manifest['size']} bytes, {manifest['duration_ms']} ms)")
+        return manifest
+
+    # ---- listing dan retensi ----
+
+    def list_backups(self, prefix: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Manifest semua backup (terbaru dulu), opsional difilter per prefix"""
+        manifests = []
+        for path in self.backup_dir.glob(f"*{MANIFEST_SUFFIX}"):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    manifest = json.load(f)
+            except (OSError, ValueError) as e:
+                logger.warning(f"Manifest {path.name} tidak bisa dibaca: {e}")
+                continue
+            if prefix is None or manifest.get('prefix') == prefix:
+                manifests.append(manifest)
+        manifests.sort(key=lambda m: m.get('file', ''), reverse=True)
+        return manifests
+
+    def latest_backup(self, prefix: str) -> Optional[Dict[str, Any]]:
+        backups = self.list_backups(prefix)
+        return backups[0] if backups else None
+
+    def prune_backups(self, prefix: str, keep: int) -> List[str]:
+        """Hapus backup ber-prefix sama selain `keep` terbaru, return nama yang dihapus"""
+        removed = []
+        for manifest in self.list_backups(prefix)[max(keep, 0):]:
+            path = self.backup_dir / manifest['file']
+            for target in (path, manifest_path(path)):
+                if target.exists():
+                    target.unlink()
+            removed.append(manifest['file'])
+        if removed:
+            logger.info(f"Retensi backup {prefix}: {len(removed)} backup lama dihapus")
+        return removed
+
+    # ---- verifikasi dan restore ----
+
+    def verify_backup(self, backup_path: PathLike, work_dir: Optional[PathLike] = None) -> Tuple[Path, Dict[str, Any]]:
+        """
+        Verifikasi file backup sebelum restore: checksum manifest (jika ada),
+        dekompresi .gz, lalu integrity_check. Return (path database siap
+        restore, info). Raise BackupError jika tidak valid
+        """
+        backup_path = Path(backup_path)
+        info: Dict[str, Any] = {'file': backup_path.name, 'size': backup_path.stat().st_size}
+
+        manifest = read_manifest(backup_path)
+        if manifest:
+            checksum = file_sha256(backup_path)
+            if checksum != manifest.get('sha256'):
+                raise BackupError("Checksum backup tidak cocok dengan manifest")
+            info['manifest'] = manifest
+
+        db_path = backup_path
+        if backup_path.suffix == '.gz':
+            db_path = Path(work_dir or self.backup_dir) / f".verify_{backup_path.stem}"
+            try:
+                with gzip.open(backup_path, 'rb') as src, open(db_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, _CHUNK)
+            except (OSError, EOFError) as e:
+                if db_path.exists():
+                    db_path.unlink()
+                raise BackupError(f"Backup terkompresi rusak: {e}")
+
+        result = integrity_check(db_path)
+        if result != 'ok':
+            if db_path != backup_path and db_path.exists():
+                db_path.unlink()
+            raise BackupError(f"Integrity check gagal: {result}")
+
+        conn = sqlite3.connect(f"file:{db_path.resolve()}?mode=ro", uri=True)
+        try:
+            info['tables'] = conn.execute(
+                "SELECT COUNT(*) FROM sqlite_master WHERE type = 'table'"
+            ).fetchone()[0]
+        finally:
+            conn.close()
+        info['integrity'] = 'ok'
+        return db_path, info
+
+    def restore(self, verified_db_path: PathLike):
+        """
+        Salin backup yang sudah diverifikasi ke database aktif lewat backup API.
+        Penulisan melewati locking SQLite, jadi aman terhadap WAL dan koneksi
+        pool yang masih terbuka
+        """
+        source = sqlite3.connect(f"file:{Path(verified_db_path).resolve()}?mode=ro", uri=True)
+        target = sqlite3.connect(str(self.db_path), timeout=30)
+        try:
+            source.backup(target)
+        finally:
+            target.close()
+            source.close()
+        logger.info(f"Database {self.db_path} direstore dari {Path(verified_db_path).name}")
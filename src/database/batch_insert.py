@@ -0,0 +1,159 @@
+"""
+Batch Insert Queue
+Antrian baris bounded untuk tabel log bervolume tinggi (mis. activity_logs):
+producer hanya memasukkan tuple ke asyncio queue tanpa I/O, satu flusher task
+menulisnya dengan executemany per batch (berdasarkan ukuran atau waktu).
+Saat antrian hampir penuh baris di-sample, saat penuh baris dibuang; caller
+yang tidak boleh kehilangan data memakai put() yang menunggu (backpressure)
+"""
+
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Sequence
+
+from src.database.write_queue import get_write_queue
+
+logger = logging.getLogger(__name__)
+
+def _executemany(conn, sql: str, rows: List[Sequence[Any]]):
+    conn.executemany(sql, rows)
+
+class BatchInsertQueue:
+    """Antrian insert bounded dengan flusher background"""
+
+    def __init__(
+        self,
+        sql: str,
+        max_queue: int = 10_000,
+        batch_size: int = 500,
+        flush_interval: float = 2.0,
+        high_watermark: float = 0.8,
+        sample_every: int = 10,
+        submit: Optional[Callable[..., Awaitable[Any]]] = None
+    ):
+        self.sql = sql
+        self.max_queue = max_queue
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Di atas high_watermark hanya 1 dari sample_every baris put_nowait() yang diterima
+        self.high_watermark = int(max_queue * high_watermark)
+        self.sample_every = max(sample_every, 1)
+        # Default: tulis lewat single-writer queue (group commit)
+        self._submit = submit
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+        self._sample_counter = 0
+
+        # Metrics
+        self._enqueued = 0
+        self._flushed = 0
+        self._dropped = 0
+        self._sampled_out = 0
+        self._failed = 0
+        self._batches = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._task = asyncio.create_task(self._flush_loop(), name="batch-insert")
+
+    def put_nowait(self, row: Sequence[Any]) -> bool:
+        """Antrikan baris tanpa menunggu; False jika baris di-sample keluar atau dibuang"""
+        if self._closed:
+            self._dropped += 1
+            return False
+        self._ensure_started()
+
+        if self._queue.qsize() >= self.high_watermark:
+            self._sample_counter += 1
+            if self._sample_counter % self.sample_every:
+                self._sampled_out += 1
+                return False
+
+        try:
+            self._queue.put_nowait(row)
+        except asyncio.QueueFull:
+            self._dropped += 1
+            return False
+        self._enqueued += 1
+        return True
+
+    async def put(self, row: Sequence[Any]):
+        """Antrikan baris, menunggu jika antrian penuh (backpressure)"""
+        if self._closed:
+            self._dropped += 1
+            return
+        self._ensure_started()
+        await self._queue.put(row)
+        self._enqueued += 1
+
+    async def _flush_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            row = await self._queue.get()
+            if row is None:
+                break
+
+            batch = [row]
+            deadline = loop.time() + self.flush_interval
+
+            # Kumpulkan sampai batch_size atau flush_interval habis
+            while len(batch) < self.batch_size:
+                try:
+                    row = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        row = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+                if row is None:
+                    stopping = True
+                    break
+                batch.append(row)
+
+            await self._write(batch)
+
+    async def _write(self, batch: List[Sequence[Any]]):
+        self._batches += 1
+        try:
+            submit = self._submit or get_write_queue().submit
+            await submit(_executemany, self.sql, batch)
+            self._flushed += len(batch)
+        except Exception as e:
+            self._failed += len(batch)
+            logger.error(f"Batch insert gagal untuk {len(batch)} baris: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics antrian: queued, flushed, dropped/sampled dan batch"""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'enqueued': self._enqueued,
+            'flushed': self._flushed,
+            'dropped': self._dropped,
+            'sampled_out': self._sampled_out,
+            'failed': self._failed,
+            'batches': self._batches,
+            'avg_batch': round((self._flushed + self._failed) / self._batches, 2) if self._batches else 0.0
+        }
+
+    async def close(self):
+        """Tulis sisa antrian lalu hentikan flusher"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task and not self._task.done():
+            await self._queue.put(None)
+            await self._task
@@ -13,6 +13,10 @@ from typing import Optional, Any, Dict, List
 from contextlib import asynccontextmanager
 from datetime import datetime
 
+from src.database.pool import ConnectionPool, get_pool
+from src.database.write_queue import get_write_queue
+from src.database.migrations import ensure_schema
+
 logger = logging.getLogger(__name__)
 
 class DatabaseManager:
@@ -32,6 +36,7 @@ class DatabaseManager:
             self.db_path = Path(db_path)
             self.max_retries = 3
             self.timeout = 5
+            self.pool_size = 5
             self.initialized = True
     
     async def initialize(self) -> bool:
@@ -60,58 +65,70 @@ class DatabaseManager:
             logger.error(f"Gagal inisialisasi database: {e}")
             return False
     
+    @property
+    def pool(self) -> ConnectionPool:
+        """Pool koneksi untuk file database ini"""
+        return get_pool(self.db_path, max_size=self.pool_size, timeout=self.timeout)
+    
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Metrics pool koneksi (ukuran, waktu tunggu, checkout)"""
+        return self.pool.stats()
+    
     @asynccontextmanager
     async def get_connection(self):
-        """Context manager untuk koneksi database"""
+        """Context manager untuk koneksi database dari pool"""
         conn = None
         for attempt in range(self.max_retries):
             try:
-                conn = sqlite3.connect(str(self.db_path), timeout=self.timeout)
-                conn.row_factory = sqlite3.Row
-                
-                # Konfigurasi database
-                cursor = conn.cursor()
-                cursor.execute("PRAGMA busy_timeout = 5000")
-                cursor.execute("PRAGMA journal_mode = WAL")
-                cursor.execute("PRAGMA synchronous = NORMAL")
-                cursor.execute("PRAGMA foreign_keys = ON")
-                
-                yield conn
+                conn = await self.pool.acquire()
                 break
-                
             except sqlite3.Error as e:
                 if attempt == self.max_retries - 1:
                     logger.error(f"Gagal koneksi database setelah {self.max_retries} percobaan: {e}")
                     raise
                 logger.warning(f"Percobaan koneksi {attempt + 1} gagal: {e}")
                 await asyncio.sleep(0.1 * (attempt + 1))
-            finally:
-                if conn:
-                    conn.close()
+        
+        discard = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            discard = not isinstance(e, (sqlite3.IntegrityError, sqlite3.OperationalError))
+            raise
+        finally:
+            await self.pool.release(conn, discard=discard)
     
     async def execute_query(self, query: str, params: tuple = ()) -> Optional[List[sqlite3.Row]]:
-        """Eksekusi query SELECT"""
+        """Eksekusi query SELECT di executor thread"""
+        def _fetch(conn: sqlite3.Connection) -> List[sqlite3.Row]:
+            return conn.execute(query, params).fetchall()
+        
         try:
-            async with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                return cursor.fetchall()
+            return await self.pool.run(_fetch)
         except Exception as e:
             logger.error(f"Error eksekusi query: {e}")
             return None
     
     async def execute_update(self, query: str, params: tuple = ()) -> bool:
-        """Eksekusi query INSERT/UPDATE/DELETE"""
+        """Eksekusi query INSERT/UPDATE/DELETE di executor thread"""
+        def _update(conn: sqlite3.Connection):
+            conn.execute(query, params)
+            conn.commit()
+        
         try:
-            async with self.get_connection() as conn:
-                cursor = conn.cursor()
-                cursor.execute(query, params)
-                conn.commit()
-                return True
+            await self.pool.run(_update)
+            return True
         except Exception as e:
             logger.error(f"Error eksekusi update: {e}")
             return False
     
+    async def execute_write(self, func, *args) -> Any:
+        """
+        Jalankan func(conn, *args) lewat single-writer queue (group commit).
+        Exception dari func diteruskan ke pemanggil.
+        """
+        return await get_write_queue(self.db_path).submit(func, *args)
+    
     async def setup_database(self) -> bool:
         """Setup semua tabel database"""
         try:
@@ -131,6 +148,7 @@ class DatabaseManager:
                     await self._create_product_tables(cursor)
                     await self._create_system_tables(cursor)
                     await self._create_feature_tables(cursor)
+                    ensure_schema(cursor)
                     
                     # Commit transaction
                     conn.commit()
@@ -355,6 +373,9 @@ class DatabaseManager:
                         return await self.verify_database()
                     return False
                 
+                # Index dan counter baru untuk database yang dibuat versi sebelumnya
+                ensure_schema(cursor)
+                
                 # Cleanup expired cache
                 cursor.execute("DELETE FROM cache WHERE expires_at < strftime('%s', 'now')")
                 conn.commit()
@@ -473,12 +494,16 @@ class DatabaseManager:
     async def close(self):
         """Cleanup database connections"""
         try:
+            # Selesaikan write yang masih antri sebelum vacuum
+            await get_write_queue(self.db_path).close()
+            
             # Vacuum database untuk optimasi
-            async with self.get_connection() as conn:
-                conn.execute("VACUUM")
+            await self.pool.run(lambda conn: conn.execute("VACUUM"))
             logger.info("Database cleanup selesai")
         except Exception as e:
             logger.error(f"Error saat cleanup database: {e}")
+        finally:
+            await self.pool.close()
 
 # Instance global untuk digunakan di seluruh aplikasi
 db_manager = DatabaseManager()
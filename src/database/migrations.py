@@ -7,10 +7,119 @@ import sqlite3
 import logging
 import asyncio
 from pathlib import Path
-from typing import List, Tuple
+from typing import Dict, List, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Index yang dibuat saat setup dan dipastikan ada saat startup (untuk database lama)
+INDEXES: Tuple[str, ...] = (
+    # Covering index untuk ringkasan jumlah stock per product dan status
+    "CREATE INDEX IF NOT EXISTS idx_stock_product_status ON stock(product_code, status)",
+)
+
+# Counter jumlah stock per product dan status. Trigger memperbarui counter
+# dalam transaksi yang sama dengan perubahan di tabel stock, sehingga semua
+# jalur write (service, transaksi pembelian, query manual) tetap konsisten
+STOCK_COUNTER_SCHEMA: Tuple[str, ...] = (
+    """
+    CREATE TABLE IF NOT EXISTS stock_counts (
+        product_code TEXT NOT NULL,
+        status TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (product_code, status)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_counts_insert
+    AFTER INSERT ON stock
+    BEGIN
+        INSERT INTO stock_counts (product_code, status, count)
+        VALUES (NEW.product_code, COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (product_code, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_counts_delete
+    AFTER DELETE ON stock
+    BEGIN
+        UPDATE stock_counts SET count = count - 1
+        WHERE product_code = OLD.product_code AND status = COALESCE(OLD.status, '');
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS trg_stock_counts_update
+    AFTER UPDATE OF product_code, status ON stock
+    WHEN OLD.product_code IS NOT NEW.product_code OR OLD.status IS NOT NEW.status
+    BEGIN
+        UPDATE stock_counts SET count = count - 1
+        WHERE product_code = OLD.product_code AND status = COALESCE(OLD.status, '');
+        INSERT INTO stock_counts (product_code, status, count)
+        VALUES (NEW.product_code, COALESCE(NEW.status, ''), 1)
+        ON CONFLICT (product_code, status) DO UPDATE SET count = count + 1;
+    END
+    """,
+)
+
+# Message id donasi yang sudah dikreditkan, ditulis dalam transaksi yang sama
+# dengan update balance sehingga webhook yang terkirim ulang tidak dikredit dua kali
+DONATION_LEDGER_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS processed_donations (
+        message_id TEXT PRIMARY KEY,
+        growid TEXT NOT NULL,
+        wl INTEGER NOT NULL DEFAULT 0,
+        dl INTEGER NOT NULL DEFAULT 0,
+        bgl INTEGER NOT NULL DEFAULT 0,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+"""
+
+def ensure_indexes(cursor: sqlite3.Cursor):
+    """Buat index yang belum ada (idempotent)"""
+    for statement in INDEXES:
+        cursor.execute(statement)
+
+def rebuild_stock_counts(cursor: sqlite3.Cursor) -> Dict[Tuple[str, str], Tuple[int, int]]:
+    """
+    Hitung ulang stock_counts dari tabel stock.
+    Return selisih yang diperbaiki: (product_code, status) -> (lama, baru)
+    """
+    old = {
+        (row[0], row[1]): row[2]
+        for row in cursor.execute("SELECT product_code, status, count FROM stock_counts")
+    }
+    cursor.execute("DELETE FROM stock_counts")
+    cursor.execute("""
+        INSERT INTO stock_counts (product_code, status, count)
+        SELECT product_code, COALESCE(status, ''), COUNT(*)
+        FROM stock
+        GROUP BY product_code, COALESCE(status, '')
+    """)
+    new = {
+        (row[0], row[1]): row[2]
+        for row in cursor.execute("SELECT product_code, status, count FROM stock_counts")
+    }
+    return {
+        key: (old.get(key, 0), new.get(key, 0))
+        for key in old.keys() | new.keys()
+        if old.get(key, 0) != new.get(key, 0)
+    }
+
+def ensure_stock_counters(cursor: sqlite3.Cursor):
+    """Buat tabel counter dan trigger, isi dari tabel stock jika baru dibuat"""
+    exists = cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stock_counts'"
+    ).fetchone()
+    for statement in STOCK_COUNTER_SCHEMA:
+        cursor.execute(statement)
+    if not exists:
+        rebuild_stock_counts(cursor)
+
+def ensure_schema(cursor: sqlite3.Cursor):
+    """Objek schema turunan (index, counter) yang dipastikan ada saat startup"""
+    ensure_indexes(cursor)
+    ensure_stock_counters(cursor)
+    cursor.execute(DONATION_LEDGER_SCHEMA)
+
 async def setup_database() -> bool:
     """Setup semua tabel database"""
     try:
@@ -35,6 +144,7 @@ async def setup_database() -> bool:
         
         for table_func in tables:
             await table_func(cursor)
+        ensure_schema(cursor)
         
         # Commit transaction
         conn.commit()
@@ -0,0 +1,192 @@
+"""
+SQLite Connection Pool
+Pool koneksi SQLite yang berumur panjang dan dilayani lewat executor thread,
+sehingga query tidak memblokir event loop bot
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Union
+
+logger = logging.getLogger(__name__)
+
+# PRAGMA yang dijalankan sekali saat koneksi dibuat
+CONNECTION_PRAGMAS = (
+    "PRAGMA busy_timeout = 5000",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA foreign_keys = ON",
+)
+
+class ConnectionPool:
+    """Pool koneksi SQLite dengan ukuran terbatas"""
+
+    def __init__(
+        self,
+        db_path: Union[str, Path] = "shop.db",
+        max_size: int = 5,
+        timeout: int = 5,
+        acquire_timeout: float = 10.0
+    ):
+        self.db_path = Path(db_path)
+        self.max_size = max_size
+        self.timeout = timeout
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[sqlite3.Connection] = []
+        self._semaphore = asyncio.Semaphore(max_size)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_size,
+            thread_name_prefix="sqlite-pool"
+        )
+        self._closed = False
+
+        # Metrics
+        self._created = 0
+        self._in_use = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _connect(self) -> sqlite3.Connection:
+        """Buat koneksi baru (dijalankan di executor thread)"""
+        conn = sqlite3.connect(
+            str(self.db_path),
+            timeout=self.timeout,
+            check_same_thread=False
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+
+    async def _in_executor(self, func: Callable, *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def acquire(self) -> sqlite3.Connection:
+        """Ambil koneksi dari pool, tunggu jika semua sedang dipakai"""
+        if self._closed:
+            raise sqlite3.ProgrammingError("Connection pool sudah ditutup")
+
+        start = time.perf_counter()
+        if self._semaphore.locked():
+            self._waits += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), self.acquire_timeout)
+            except asyncio.TimeoutError:
+                self._timeouts += 1
+                raise
+        else:
+            await self._semaphore.acquire()
+
+        waited = time.perf_counter() - start
+        self._total_wait += waited
+        self._max_wait = max(self._max_wait, waited)
+
+        try:
+            if self._idle:
+                conn = self._idle.pop()
+            else:
+                conn = await self._in_executor(self._connect)
+                self._created += 1
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+        self._in_use += 1
+        self._checkouts += 1
+        return conn
+
+    async def release(self, conn: sqlite3.Connection, discard: bool = False):
+        """Kembalikan koneksi ke pool"""
+        try:
+            if not discard and conn.in_transaction:
+                # Jangan biarkan transaksi menggantung di koneksi yang dipakai ulang
+                await self._in_executor(conn.rollback)
+        except sqlite3.Error as e:
+            logger.warning(f"Rollback koneksi pool gagal, koneksi dibuang: {e}")
+            discard = True
+        finally:
+            self._in_use -= 1
+            if discard or self._closed:
+                conn.close()
+            else:
+                self._idle.append(conn)
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def connection(self):
+        """Context manager untuk meminjam satu koneksi"""
+        conn = await self.acquire()
+        discard = False
+        try:
+            yield conn
+        except sqlite3.DatabaseError as e:
+            # Koneksi yang rusak tidak dikembalikan ke pool
+            discard = not isinstance(e, (sqlite3.IntegrityError, sqlite3.OperationalError))
+            raise
+        finally:
+            await self.release(conn, discard=discard)
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """Jalankan func(conn, *args) di executor thread dengan koneksi dari pool"""
+        async with self.connection() as conn:
+            return await self._in_executor(func, conn, *args)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics pool untuk monitoring"""
+        return {
+            'max_size': self.max_size,
+            'created': self._created,
+            'idle': len(self._idle),
+            'in_use': self._in_use,
+            'checkouts': self._checkouts,
+            'waits': self._waits,
+            'timeouts': self._timeouts,
+            'avg_wait_ms': round(self._total_wait / self._checkouts * 1000, 3) if self._checkouts else 0.0,
+            'max_wait_ms': round(self._max_wait * 1000, 3)
+        }
+
+    async def close(self):
+        """Tutup semua koneksi idle dan executor"""
+        if self._closed:
+            return
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            try:
+                conn.close()
+            except sqlite3.Error as e:
+                logger.warning(f"Gagal menutup koneksi pool: {e}")
+        self._executor.shutdown(wait=False)
+        logger.info(f"Connection pool {self.db_path} ditutup")
+
+# Registry pool per file database
+_pools: Dict[str, ConnectionPool] = {}
+
+def get_pool(db_path: Union[str, Path] = "shop.db", **kwargs: Any) -> ConnectionPool:
+    """Ambil pool untuk db_path, buat baru jika belum ada atau sudah ditutup"""
+    key = str(Path(db_path).resolve())
+    pool = _pools.get(key)
+    if pool is None or pool.closed:
+        pool = ConnectionPool(db_path, **kwargs)
+        _pools[key] = pool
+    return pool
+
+async def close_all_pools():
+    """Tutup semua pool yang terdaftar"""
+    for pool in list(_pools.values()):
+        await pool.close()
+    _pools.clear()
@@ -11,6 +11,8 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
 from src.database.connection import get_connection
+from src.utils.leveling_curve import DEFAULT_CURVE
+from src.utils.rank_index import LEVEL_RANKS
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,9 @@ class LevelingRepository:
                 )
             """)
             
+            # Index rank/leaderboard (guild_id, xp DESC, user_id)
+            LEVEL_RANKS.ensure_index(cursor)
+            
             conn.commit()
             logger.info("Leveling tables created successfully")
             
@@ -139,6 +144,7 @@ class LevelingRepository:
             """, (str(guild_id), str(user_id), new_xp, new_level, new_messages, datetime.utcnow()))
             
             conn.commit()
+            LEVEL_RANKS.record(guild_id, user_id, new_xp)
             return new_xp, new_level, level_up
             
         except sqlite3.Error as e:
@@ -155,17 +161,7 @@ class LevelingRepository:
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT user_id, xp, level, messages 
-                FROM user_levels 
-                WHERE guild_id = ? 
-                ORDER BY xp DESC 
-                LIMIT ?
-            """, (str(guild_id), limit))
-            
-            return [dict(row) for row in cursor.fetchall()]
+            return LEVEL_RANKS.after(conn, guild_id, limit)
             
         except sqlite3.Error as e:
             logger.error(f"Error getting leaderboard: {e}")
@@ -179,19 +175,7 @@ class LevelingRepository:
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT COUNT(*) + 1 as rank
-                FROM user_levels 
-                WHERE guild_id = ? AND xp > (
-                    SELECT COALESCE(xp, 0) FROM user_levels 
-                    WHERE guild_id = ? AND user_id = ?
-                )
-            """, (str(guild_id), str(guild_id), str(user_id)))
-            
-            result = cursor.fetchone()
-            return result['rank'] if result else None
+            return LEVEL_RANKS.rank(conn, guild_id, user_id)
             
         except sqlite3.Error as e:
             logger.error(f"Error getting user rank: {e}")
@@ -352,18 +336,13 @@ class LevelingRepository:
                 conn.close()
 
     def _calculate_level(self, xp: int) -> int:
-        """Calculate level from XP"""
-        # Formula: level = floor(sqrt(xp / 100))
-        # This means: level 1 = 100 XP, level 2 = 400 XP, level 3 = 900 XP, etc.
-        import math
-        return int(math.sqrt(xp / 100))
+        """Calculate level from XP (kurva bersama dengan cog Leveling)"""
+        return DEFAULT_CURVE.level_for_xp(xp)
 
     def get_xp_for_level(self, level: int) -> int:
         """Get XP required for a specific level"""
-        return level * level * 100
+        return DEFAULT_CURVE.xp_for_level(level)
 
     def get_xp_for_next_level(self, current_xp: int) -> int:
         """Get XP required for next level"""
-        current_level = self._calculate_level(current_xp)
-        next_level = current_level + 1
-        return self.get_xp_for_level(next_level)
+        return DEFAULT_CURVE.xp_for_next_level(current_xp)
@@ -11,6 +11,7 @@ from typing import Dict, List, Optional, Tuple
 from datetime import datetime, timedelta
 
 from src.database.connection import get_connection
+from src.utils.rank_index import REPUTATION_RANKS
 
 logger = logging.getLogger(__name__)
 
@@ -83,6 +84,9 @@ class ReputationRepository:
                 )
             """)
             
+            # Index rank/leaderboard (guild_id, reputation DESC, user_id)
+            REPUTATION_RANKS.ensure_index(cursor)
+            
             conn.commit()
             logger.info("Reputation tables created successfully")
             
@@ -240,6 +244,7 @@ class ReputationRepository:
                 """, (str(guild_id), str(user_id), new_reputation, new_total_given, new_total_received, str(guild_id), str(user_id), now, now))
             
             conn.commit()
+            REPUTATION_RANKS.record(guild_id, user_id, new_reputation)
             return True
             
         except sqlite3.Error as e:
@@ -314,17 +319,7 @@ class ReputationRepository:
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT user_id, reputation, total_given, total_received 
-                FROM user_reputation 
-                WHERE guild_id = ? AND reputation > 0
-                ORDER BY reputation DESC 
-                LIMIT ?
-            """, (str(guild_id), limit))
-            
-            return [dict(row) for row in cursor.fetchall()]
+            return REPUTATION_RANKS.after(conn, guild_id, limit)
             
         except sqlite3.Error as e:
             logger.error(f"Error getting reputation leaderboard: {e}")
@@ -338,19 +333,7 @@ class ReputationRepository:
         conn = None
         try:
             conn = get_connection()
-            cursor = conn.cursor()
-            
-            cursor.execute("""
-                SELECT COUNT(*) + 1 as rank
-                FROM user_reputation 
-                WHERE guild_id = ? AND reputation > (
-                    SELECT COALESCE(reputation, 0) FROM user_reputation 
-                    WHERE guild_id = ? AND user_id = ?
-                )
-            """, (str(guild_id), str(guild_id), str(user_id)))
-            
-            result = cursor.fetchone()
-            return result['rank'] if result else None
+            return REPUTATION_RANKS.rank(conn, guild_id, user_id)
             
         except sqlite3.Error as e:
             logger.error(f"Error getting user rank: {e}")
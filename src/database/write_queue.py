@@ -0,0 +1,187 @@
+"""
+Single-Writer Queue
+Satu writer task yang mengambil write intent dari asyncio queue dan
+menggabungkan beberapa transaksi kecil ke dalam satu commit (group commit)
+"""
+
+import asyncio
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from src.database.pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+# Write intent: (func, args, future). func(conn, *args) dijalankan di writer thread
+WriteIntent = Tuple[Callable[..., Any], tuple, asyncio.Future]
+
+class WriteQueue:
+    """Writer tunggal dengan group commit untuk write kecil yang sering"""
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        window: float = 0.005,
+        max_batch: int = 64
+    ):
+        self.pool = pool
+        self.window = window
+        self.max_batch = max_batch
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+        # Metrics
+        self._submitted = 0
+        self._succeeded = 0
+        self._failed = 0
+        self._batches = 0
+        self._max_batch_seen = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _ensure_started(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._writer_loop(), name="sqlite-writer")
+
+    async def submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Antrikan write intent dan tunggu hasilnya.
+        func(conn, *args) tidak boleh commit sendiri; exception dari func
+        hanya membatalkan intent tersebut, bukan seluruh batch.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Write queue sudah ditutup")
+
+        self._ensure_started()
+        future = asyncio.get_running_loop().create_future()
+        self._submitted += 1
+        await self._queue.put((func, args, future))
+        return await future
+
+    async def _writer_loop(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+
+        while not stopping:
+            intent = await self._queue.get()
+            if intent is None:
+                break
+
+            batch: List[WriteIntent] = [intent]
+            deadline = loop.time() + self.window
+
+            # Kumpulkan intent lain yang datang dalam window yang sama
+            while len(batch) < self.max_batch:
+                try:
+                    intent = self._queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        intent = await asyncio.wait_for(self._queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+
+                if intent is None:
+                    stopping = True
+                    break
+                batch.append(intent)
+
+            await self._commit_batch(batch)
+
+    @staticmethod
+    def _apply_batch(conn: sqlite3.Connection, batch: List[WriteIntent]) -> List[Tuple[bool, Any]]:
+        """Jalankan semua intent dalam satu transaksi (di executor thread)"""
+        results: List[Tuple[bool, Any]] = []
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for index, (func, args, _) in enumerate(batch):
+                savepoint = f"write_{index}"
+                conn.execute(f"SAVEPOINT {savepoint}")
+                try:
+                    result = func(conn, *args)
+                    conn.execute(f"RELEASE {savepoint}")
+                    results.append((True, result))
+                except Exception as e:
+                    conn.execute(f"ROLLBACK TO {savepoint}")
+                    conn.execute(f"RELEASE {savepoint}")
+                    results.append((False, e))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        return results
+
+    async def _commit_batch(self, batch: List[WriteIntent]):
+        self._batches += 1
+        self._max_batch_seen = max(self._max_batch_seen, len(batch))
+
+        try:
+            results = await self.pool.run(self._apply_batch, batch)
+        except Exception as e:
+            logger.error(f"Group commit gagal untuk {len(batch)} write: {e}")
+            self._failed += len(batch)
+            for _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, _, future), (ok, value) in zip(batch, results):
+            if ok:
+                self._succeeded += 1
+            else:
+                self._failed += 1
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+
+    def stats(self) -> Dict[str, Any]:
+        """Metrics writer queue"""
+        return {
+            'queued': self._queue.qsize() if self._queue else 0,
+            'submitted': self._submitted,
+            'succeeded': self._succeeded,
+            'failed': self._failed,
+            'batches': self._batches,
+            'avg_batch': round((self._succeeded + self._failed) / self._batches, 2) if self._batches else 0.0,
+            'max_batch': self._max_batch_seen
+        }
+
+    async def close(self):
+        """Selesaikan write yang masih antri lalu hentikan writer"""
+        if self._closed:
+            return
+        self._closed = True
+        if self._task and not self._task.done():
+            await self._queue.put(None)
+            await self._task
+        logger.info(f"Write queue {self.pool.db_path} ditutup")
+
+# Registry writer per file database
+_writers: Dict[str, WriteQueue] = {}
+
+def get_write_queue(db_path: Union[str, Path] = "shop.db", **kwargs: Any) -> WriteQueue:
+    """Ambil writer untuk db_path, buat baru jika belum ada atau sudah ditutup"""
+    key = str(Path(db_path).resolve())
+    writer = _writers.get(key)
+    if writer is None or writer.closed or writer.pool.closed:
+        writer = WriteQueue(get_pool(db_path), **kwargs)
+        _writers[key] = writer
+    return writer
+
+async def close_all_writers():
+    """Tutup semua writer yang terdaftar"""
+    for writer in list(_writers.values()):
+        await writer.close()
+    _writers.clear()
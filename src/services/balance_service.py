@@ -28,6 +28,7 @@ from src.config.constants.bot_constants import (
     COLORS
 )
 from src.database.connection import get_connection
+from src.database.write_queue import get_write_queue
 from src.utils.base_handler import BaseLockHandler
 from src.services.cache_service import CacheManager
 
@@ -82,6 +83,10 @@ class BalanceResponse:
     def error(cls, error: str, message: str = "") -> 'BalanceResponse':
         return cls(False, None, message, error)
 
+class BalanceUpdateRejected(Exception):
+    """Update balance ditolak (balance tidak ada, tidak cukup, atau tidak valid)"""
+    pass
+
 class BalanceManagerService(BaseLockHandler):
     _instance = None
     _instance_lock = asyncio.Lock()
@@ -497,6 +502,35 @@ class BalanceManagerService(BaseLockHandler):
                 conn.close()
             self.release_lock(cache_key)
 
+    def _apply_balance_change(
+        self,
+        current_balance: Balance,
+        wl: int,
+        dl: int,
+        bgl: int,
+        bypass_validation: bool
+    ) -> Balance:
+        """Hitung balance baru dari balance saat ini, raise BalanceUpdateRejected jika tidak valid"""
+        # Balance negatif dibulatkan ke 0 (untuk operasi admin); DL display dipertahankan
+        new_balance = Balance(
+            max(0, current_balance.wl + wl),
+            max(0, current_balance.dl + dl),
+            max(0, current_balance.bgl + bgl)
+        )
+        normalized_new_balance = self.normalize_balance(new_balance, auto_convert_to_bgl=False)
+        if not normalized_new_balance.validate():
+            raise BalanceUpdateRejected(MESSAGES.ERROR['INVALID_AMOUNT'])
+
+        # Validate withdrawals (skip for admin operations)
+        if not bypass_validation:
+            if wl < 0 and abs(wl) > current_balance.wl:
+                raise BalanceUpdateRejected(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
+            if dl < 0 and abs(dl) > current_balance.dl:
+                raise BalanceUpdateRejected(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
+            if bgl < 0 and abs(bgl) > current_balance.bgl:
+                raise BalanceUpdateRejected(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
+        return normalized_new_balance
+
     async def update_balance(
         self, 
         growid: str, 
@@ -505,63 +539,47 @@ class BalanceManagerService(BaseLockHandler):
         bgl: int = 0,
         details: str = "", 
         transaction_type: TransactionType = TransactionType.DEPOSIT,
-        bypass_validation: bool = False
+        bypass_validation: bool = False,
+        extra_write: Optional[Callable[[Any], None]] = None
     ) -> BalanceResponse:
-        """Update balance with proper locking and validation"""
+        """
+        Update balance with proper locking and validation.
+        extra_write(conn) dijalankan dalam transaksi yang sama dengan update
+        balance; jika raise, update balance ikut dibatalkan
+        """
         lock = await self.acquire_lock(f"balance_update_{growid}")
         if not lock:
             return BalanceResponse.error(MESSAGES.ERROR['LOCK_ACQUISITION_FAILED'])
 
-        conn = None
         try:
-            # Get current balance
-            balance_response = await self.get_balance(growid)
-            if not balance_response.success:
-                return balance_response
-            
-            current_balance = balance_response.data
-            
-            # Calculate new balance
-            new_wl = max(0, current_balance.wl + wl)
-            new_dl = max(0, current_balance.dl + dl)
-            new_bgl = max(0, current_balance.bgl + bgl)
-            
-            new_balance = Balance(new_wl, new_dl, new_bgl)
-            # For balance updates, allow WL->DL conversion but preserve DL display
-            normalized_new_balance = self.normalize_balance(new_balance, auto_convert_to_bgl=False)
-            
-            if not normalized_new_balance.validate():
-                return BalanceResponse.error(MESSAGES.ERROR['INVALID_AMOUNT'])
-
-            # Validate withdrawals (skip for admin operations)
-            if not bypass_validation:
-                if wl < 0 and abs(wl) > current_balance.wl:
-                    return BalanceResponse.error(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
-                if dl < 0 and abs(dl) > current_balance.dl:
-                    return BalanceResponse.error(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
-                if bgl < 0 and abs(bgl) > current_balance.bgl:
-                    return BalanceResponse.error(MESSAGES.ERROR['INSUFFICIENT_BALANCE'])
-            
-            # For admin operations, allow negative balances to be set to 0
-            if bypass_validation:
-                new_wl = max(0, current_balance.wl + wl)
-                new_dl = max(0, current_balance.dl + dl)
-                new_bgl = max(0, current_balance.bgl + bgl)
-                new_balance = Balance(new_wl, new_dl, new_bgl)
-                # For admin operations, preserve DL display unless explicitly converting to BGL
-                normalized_new_balance = self.normalize_balance(new_balance, auto_convert_to_bgl=False)
-            
-            # Always normalize the final balance to ensure proper currency conversion
-            # Preserve DL display for user experience
-            normalized_new_balance = self.normalize_balance(normalized_new_balance, auto_convert_to_bgl=False)
-
-            conn = get_connection()
-            cursor = conn.cursor()
+            # Handle both enum and string transaction types
+            if isinstance(transaction_type, TransactionType):
+                transaction_type_value = transaction_type.value
+            else:
+                transaction_type_value = str(transaction_type)
             
-            try:
-                conn.execute("BEGIN TRANSACTION")
-                
-                cursor.execute(
+            def _write_balance(conn):
+                # Balance dibaca di dalam transaksi writer, bukan dari cache, sehingga
+                # perubahan dari jalur lain (mis. pembelian) tidak tertimpa
+                row = conn.execute(
+                    """
+                    SELECT balance_wl, balance_dl, balance_bgl
+                    FROM users
+                    WHERE growid = ? COLLATE binary
+                    """,
+                    (growid,)
+                ).fetchone()
+                if not row:
+                    raise BalanceUpdateRejected(MESSAGES.ERROR['BALANCE_NOT_FOUND'])
+                current_balance = self.normalize_balance(
+                    Balance(row['balance_wl'], row['balance_dl'], row['balance_bgl']),
+                    auto_convert_to_bgl=False
+                )
+                normalized_new_balance = self._apply_balance_change(
+                    current_balance, wl, dl, bgl, bypass_validation
+                )
+
+                conn.execute(
                     """
                     UPDATE users 
                     SET balance_wl = ?, balance_dl = ?, balance_bgl = ?,
@@ -571,13 +589,7 @@ class BalanceManagerService(BaseLockHandler):
                     (normalized_new_balance.wl, normalized_new_balance.dl, normalized_new_balance.bgl, growid)
                 )
                 
-                # Handle both enum and string transaction types
-                if isinstance(transaction_type, TransactionType):
-                    transaction_type_value = transaction_type.value
-                else:
-                    transaction_type_value = str(transaction_type)
-                
-                cursor.execute(
+                conn.execute(
                     """
                     INSERT INTO balance_transactions 
                     (growid, type, details, old_balance, new_balance, created_at)
@@ -591,8 +603,16 @@ class BalanceManagerService(BaseLockHandler):
                         normalized_new_balance.format()
                     )
                 )
-                
-                conn.commit()
+                if extra_write is not None:
+                    extra_write(conn)
+                return current_balance, normalized_new_balance
+            
+            try:
+                # Lewat single-writer queue: digabung dalam satu commit dengan write lain
+                try:
+                    current_balance, normalized_new_balance = await get_write_queue().submit(_write_balance)
+                except BalanceUpdateRejected as e:
+                    return BalanceResponse.error(str(e))
                 
                 # Update cache
                 await self.cache_manager.set(
@@ -624,7 +644,6 @@ class BalanceManagerService(BaseLockHandler):
                 )
 
             except Exception as e:
-                conn.rollback()
                 raise Exception(str(e))
         
         except Exception as e:
@@ -632,8 +651,6 @@ class BalanceManagerService(BaseLockHandler):
             await self.callback_manager.trigger('error', 'update_balance', str(e))
             return BalanceResponse.error(MESSAGES.ERROR['TRANSACTION_FAILED'])
         finally:
-            if conn:
-                conn.close()
             self.release_lock(f"balance_update_{growid}")
 
     async def get_transaction_history(self, growid: str, limit: int = 10) -> BalanceResponse:
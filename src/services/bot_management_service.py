@@ -4,14 +4,15 @@ Menangani business logic untuk manajemen bot instances
 """
 
 import logging
-import subprocess
-import psutil
 import asyncio
+import os
+import sys
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 from src.database.connection import DatabaseManager
 from src.database.models.bot_instance import BotInstance, BotStatus
 from src.services.base_service import BaseService, ServiceResponse
+from src.utils.process_supervisor import get_port_registry, get_supervisor
 
 class BotManagementService(BaseService):
     """Service untuk menangani operasi bot instances"""
@@ -20,12 +21,19 @@ class BotManagementService(BaseService):
         super().__init__(db_manager)
         self.db = db_manager
         self.base_port = 8000  # Port dasar untuk bot instances
+        # Child process bot tenant diawasi supervisor asyncio (log dirotasi, heartbeat, restart)
+        self.supervisor = get_supervisor(log_dir="logs/tenants")
+        self.supervisor.on_start = self._on_process_start
+        self.supervisor.on_exit = self._on_process_exit
+        self.supervisor.on_heartbeat = self._on_heartbeat
+        self.ports = get_port_registry(base_port=self.base_port)
+        self._ports_loaded = False
     
     async def create_bot_instance(self, tenant_id: str, bot_token: str, guild_id: str) -> ServiceResponse:
         """Buat bot instance baru"""
         try:
             # Cari port yang tersedia
-            port = await self._find_available_port()
+            port = await self._find_available_port(tenant_id)
             
             bot_instance = BotInstance(
                 tenant_id=tenant_id,
@@ -77,7 +85,8 @@ class BotManagementService(BaseService):
             
             bot_instance = BotInstance.from_dict(instance_response.data)
             
-            if bot_instance.is_running():
+            # Child yang sedang menunggu backoff restart berstatus STARTING, tetap dianggap berjalan
+            if bot_instance.is_running() or self.supervisor.is_supervised(tenant_id):
                 return ServiceResponse.error_response(
                     error="Bot sudah berjalan",
                     message=f"Bot instance untuk tenant {tenant_id} sudah berjalan"
@@ -131,14 +140,19 @@ class BotManagementService(BaseService):
             
             bot_instance = BotInstance.from_dict(instance_response.data)
             
-            if not bot_instance.is_running() or not bot_instance.process_id:
+            supervised = tenant_id in self.supervisor
+            if not supervised and (not bot_instance.is_running() or not bot_instance.process_id):
                 return ServiceResponse.error_response(
                     error="Bot tidak berjalan",
                     message=f"Bot instance untuk tenant {tenant_id} tidak berjalan"
                 )
             
             # Stop bot process
-            success = await self._stop_bot_process(bot_instance.process_id)
+            if supervised:
+                success = await self.supervisor.stop(tenant_id)
+            else:
+                # Process dari sesi bot sebelumnya, tidak diawasi supervisor ini
+                success = await self._stop_bot_process(bot_instance.process_id)
             
             if success:
                 # Update database
@@ -198,52 +212,50 @@ class BotManagementService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "mengambil bot instance")
     
-    async def _find_available_port(self) -> int:
-        """Cari port yang tersedia"""
-        for port in range(self.base_port, self.base_port + 1000):
-            if not self._is_port_in_use(port):
-                return port
-        raise Exception("Tidak ada port yang tersedia")
-    
-    def _is_port_in_use(self, port: int) -> bool:
-        """Cek apakah port sedang digunakan"""
-        import socket
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            return s.connect_ex(('localhost', port)) == 0
+    async def _find_available_port(self, tenant_id: str) -> int:
+        """Alokasikan port dari registry in-memory"""
+        if not self._ports_loaded:
+            # Port yang sudah tercatat di database tidak boleh dibagikan lagi
+            rows = await self.db.execute_query(
+                "SELECT tenant_id, port FROM bot_instances WHERE port IS NOT NULL"
+            )
+            for row in rows or []:
+                if not self.ports.reserve(row['tenant_id'], row['port']):
+                    logging.warning(f"Port {row['port']} tenant {row['tenant_id']} bentrok di database")
+            self._ports_loaded = True
+        return self.ports.allocate(tenant_id)
     
     async def _start_bot_process(self, bot_instance: BotInstance) -> Optional[int]:
-        """Start bot process dan return process ID"""
+        """Start bot process lewat supervisor dan return process ID"""
         try:
             # Command untuk menjalankan bot dengan konfigurasi tenant
             cmd = [
-                'python3', 'main.py',
+                sys.executable, 'main.py',
                 '--tenant-id', bot_instance.tenant_id,
                 '--token', bot_instance.bot_token,
                 '--guild-id', bot_instance.guild_id,
                 '--port', str(bot_instance.port)
             ]
             
-            # Start process di background
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                cwd='/home/user/workspace'
-            )
+            if bot_instance.port:
+                self.ports.reserve(bot_instance.tenant_id, bot_instance.port)
             
-            return process.pid
+            # Output child dialirkan ke logs/tenants/<tenant_id>.log
+            return await self.supervisor.start(bot_instance.tenant_id, cmd, cwd=os.getcwd())
             
         except Exception as e:
             logging.error(f"Gagal start bot process: {e}")
             return None
     
     async def _stop_bot_process(self, process_id: int) -> bool:
-        """Stop bot process"""
+        """Stop bot process yang tidak diawasi supervisor (mis. dari sesi sebelumnya)"""
+        import psutil
         try:
             if psutil.pid_exists(process_id):
                 process = psutil.Process(process_id)
                 process.terminate()
-                process.wait(timeout=10)
+                # wait() psutil blocking, jalankan di thread
+                await asyncio.to_thread(process.wait, 10)
                 return True
             return True  # Process sudah tidak ada
             
@@ -251,6 +263,44 @@ class BotManagementService(BaseService):
             logging.error(f"Gagal stop bot process {process_id}: {e}")
             return False
     
+    async def _on_process_start(self, tenant_id: str, process_id: int):
+        """Catat process ID baru (start pertama dan setiap restart)"""
+        await self.db.execute_update(
+            """
+                UPDATE bot_instances 
+                SET process_id = ?, status = ?, last_heartbeat = ?, updated_at = ? 
+                WHERE tenant_id = ?
+            """,
+            (process_id, BotStatus.RUNNING.value, datetime.utcnow().isoformat(),
+             datetime.utcnow().isoformat(), tenant_id)
+        )
+    
+    async def _on_process_exit(self, tenant_id: str, returncode: int, will_restart: bool):
+        """Child keluar tanpa diminta: status error dan hitung restart"""
+        await self.db.execute_update(
+            """
+                UPDATE bot_instances 
+                SET process_id = NULL, status = ?, error_message = ?,
+                    restart_count = restart_count + ?, updated_at = ? 
+                WHERE tenant_id = ?
+            """,
+            (
+                BotStatus.STARTING.value if will_restart else BotStatus.ERROR.value,
+                f"Process keluar dengan code {returncode}",
+                1 if will_restart else 0,
+                datetime.utcnow().isoformat(),
+                tenant_id
+            )
+        )
+    
+    async def _on_heartbeat(self, tenant_ids: List[str]):
+        """Perbarui last_heartbeat semua bot yang masih hidup dalam satu query"""
+        placeholders = ",".join("?" * len(tenant_ids))
+        await self.db.execute_update(
+            f"UPDATE bot_instances SET last_heartbeat = ? WHERE tenant_id IN ({placeholders})",
+            (datetime.utcnow().isoformat(), *tenant_ids)
+        )
+    
     async def _update_bot_status(self, tenant_id: str, status: str, error_message: str = None):
         """Update status bot instance"""
         query = "UPDATE bot_instances SET status = ?, updated_at = ?"
@@ -8,21 +8,26 @@ Last Modified: 2025-03-08 08:46:47 UTC
 import logging
 import time
 import json
-from typing import Optional, Any, Dict
+import heapq
+import copy
+from collections import OrderedDict
+from typing import Optional, Any, Dict, List, Set, Tuple
 from datetime import datetime, timedelta
-from sqlite3 import Connection, Error as SQLiteError
-from src.database.connection import get_connection
+from sqlite3 import Connection, IntegrityError, Error as SQLiteError
+from src.database.pool import get_pool
+from src.database.write_queue import get_write_queue
 import asyncio
 from functools import wraps
 
 from src.config.constants.bot_constants import CACHE_TIMEOUT, Balance
+from src.database.models.balance import Balance as ModelBalance
 
 logger = logging.getLogger(__name__)
 
 class CustomJSONEncoder(json.JSONEncoder):
     """Custom JSON Encoder untuk menangani object khusus"""
     def default(self, obj):
-        if isinstance(obj, Balance):
+        if isinstance(obj, _BALANCE_TYPES):
             return {
                 '__class__': 'Balance',
                 'wl': obj.wl,
@@ -35,28 +40,112 @@ class CustomJSONEncoder(json.JSONEncoder):
             return {'__timedelta__': obj.total_seconds()}
         return super().default(obj)
 
+def _decode_object(obj: Dict) -> Any:
+    """object_hook untuk mengembalikan object khusus dari JSON"""
+    if '__class__' in obj:
+        if obj['__class__'] == 'Balance':
+            return Balance(obj['wl'], obj['dl'], obj['bgl'])
+    if '__datetime__' in obj:
+        return datetime.fromisoformat(obj['__datetime__'])
+    if '__timedelta__' in obj:
+        return timedelta(seconds=obj['__timedelta__'])
+    return obj
+
 class CustomJSONDecoder(json.JSONDecoder):
     """Custom JSON Decoder untuk mengembalikan object khusus"""
     def __init__(self, *args, **kwargs):
         super().__init__(object_hook=self.object_hook, *args, **kwargs)
     
     def object_hook(self, obj):
-        if '__class__' in obj:
-            if obj['__class__'] == 'Balance':
-                return Balance(obj['wl'], obj['dl'], obj['bgl'])
-        if '__datetime__' in obj:
-            return datetime.fromisoformat(obj['__datetime__'])
-        if '__timedelta__' in obj:
-            return timedelta(seconds=obj['__timedelta__'])
-        return obj
+        return _decode_object(obj)
+
+_BALANCE_TYPES = (Balance, ModelBalance)
+
+# Value bertipe ini immutable, boleh dibagi langsung tanpa salinan
+_IMMUTABLE_TYPES = (str, int, float, bool, bytes, type(None), datetime, timedelta)
+
+# Encoder dipakai ulang, tidak dibuat per panggilan json.dumps
+_ENCODER = CustomJSONEncoder(separators=(',', ':'))
+
+def _serialize(value: Any) -> str:
+    """Serialize value untuk tabel cache SQLite"""
+    return _ENCODER.encode(value)
+
+def _deserialize(raw: str) -> Any:
+    """Deserialize value dari tabel cache SQLite"""
+    # object_hook hanya dibutuhkan jika ada object khusus ('"__class__"' dsb.)
+    if '"__' in raw:
+        return json.loads(raw, object_hook=_decode_object)
+    return json.loads(raw)
+
+def _snapshot(value: Any) -> Any:
+    """Salinan value yang terlepas dari object milik pemanggil"""
+    if isinstance(value, _IMMUTABLE_TYPES):
+        return value
+    if isinstance(value, _BALANCE_TYPES):
+        return Balance(value.wl, value.dl, value.bgl)
+    if isinstance(value, dict):
+        return {k: _snapshot(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        # Sama seperti round-trip JSON sebelumnya: tuple menjadi list
+        return [_snapshot(v) for v in value]
+    return copy.deepcopy(value)
+
+# Query tabel cache, dijalankan di thread pool/writer dengan koneksi dari pool
+
+def _select_entry(conn: Connection, key: str, now: float) -> Optional[Tuple[str, Optional[float]]]:
+    row = conn.execute(
+        "SELECT value, expires_at FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
+        (key, now)
+    ).fetchone()
+    return (row[0], row[1]) if row else None
+
+def _upsert_entries(conn: Connection, rows: List[Tuple[str, str, Optional[float]]]):
+    sql = "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)"
+    try:
+        conn.executemany(sql, rows)
+    except IntegrityError:
+        # Satu baris yang melanggar constraint tidak boleh menggagalkan seluruh batch
+        for row in rows:
+            try:
+                conn.execute(sql, row)
+            except IntegrityError as e:
+                logger.warning(f"Cache {row[0]} tidak dipersist: {e}")
+
+def _delete_entries(conn: Connection, keys: List[str]):
+    conn.executemany("DELETE FROM cache WHERE key = ?", [(key,) for key in keys])
+
+def _apply_changes(conn: Connection, rows: List[Tuple[str, str, Optional[float]]], deleted: List[str]):
+    if rows:
+        _upsert_entries(conn, rows)
+    if deleted:
+        _delete_entries(conn, deleted)
+
+def _clear_entries(conn: Connection):
+    conn.execute("DELETE FROM cache")
+
+def _delete_expired(conn: Connection, now: float):
+    conn.execute("DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+
+def _delete_prefix(conn: Connection, prefix: str):
+    # Range pada primary key: hanya baris yang cocok yang disentuh
+    upper = prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else '\U0010ffff'
+    conn.execute("DELETE FROM cache WHERE key >= ? AND key < ?", (prefix, upper))
 
 class CacheManager:
     """Enhanced Cache Manager dengan Database Integration"""
     _instance = None
-    _lock = asyncio.Lock()
     
     MAX_MEMORY_ITEMS = 10000  # Batasan item di memory
     
+    # Key yang tidak pernah perlu dipersist ke tabel cache
+    MEMORY_ONLY_PREFIXES: Tuple[str, ...] = ('stock_count_',)
+    
+    # Write-behind: key dirty digabung lalu di-flush per batch
+    WRITE_BEHIND = True
+    FLUSH_INTERVAL = 2.0  # detik
+    MAX_DIRTY_KEYS = 500  # flush lebih awal jika key dirty sebanyak ini
+    
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super().__new__(cls)
@@ -64,22 +153,104 @@ class CacheManager:
 
     def __init__(self):
         if not hasattr(self, 'initialized'):
-            self.memory_cache: Dict[str, Dict] = {}
+            # Urutan OrderedDict = urutan LRU (paling lama diakses di depan)
+            self.memory_cache: "OrderedDict[str, Dict]" = OrderedDict()
+            # Heap (expires_at, key) untuk expiry; entry basi dilewati saat pop
+            self._expiry_heap: List[Tuple[float, str]] = []
+            # Index prefix: namespace (bagian sebelum '_' pertama) -> keys
+            self._prefix_index: Dict[str, Set[str]] = {}
+            # Perubahan yang belum ditulis ke SQLite: key -> (value, expires_at), None = delete
+            self._dirty: Dict[str, Optional[Tuple[Any, Optional[float]]]] = {}
+            # Batch yang sedang ditulis, tetap terbaca sampai commit selesai
+            self._flushing: Dict[str, Optional[Tuple[Any, Optional[float]]]] = {}
+            self._flush_task: Optional[asyncio.Task] = None
+            self._flush_wakeup: Optional[asyncio.Event] = None
+            self._write_stats = {'flushes': 0, 'flushed_keys': 0, 'coalesced': 0, 'errors': 0}
             self.logger = logging.getLogger('CacheManager')
             self.initialized = True
+
+    def _is_memory_only(self, key: str) -> bool:
+        return key.startswith(self.MEMORY_ONLY_PREFIXES)
+
+    @staticmethod
+    def _namespace(key: str) -> str:
+        return key.split('_', 1)[0]
+
+    def _memory_get(self, key: str, now: float) -> Optional[Dict]:
+        """Ambil entry memory (O(1)), hapus jika sudah expired"""
+        cache_data = self.memory_cache.get(key)
+        if cache_data is None:
+            return None
+        expires_at = cache_data.get('expires_at')
+        if expires_at is not None and expires_at <= now:
+            self._memory_remove(key)
+            return None
+        self.memory_cache.move_to_end(key)
+        return cache_data
+
+    def _memory_store(self, key: str, cache_data: Dict):
+        """Simpan entry ke memory sebagai item paling baru (O(1) amortized)"""
+        self.memory_cache[key] = cache_data
+        self.memory_cache.move_to_end(key)
+        self._prefix_index.setdefault(self._namespace(key), set()).add(key)
+        if cache_data.get('expires_at') is not None:
+            heapq.heappush(self._expiry_heap, (cache_data['expires_at'], key))
+            # Rebuild heap jika terlalu banyak entry basi
+            if len(self._expiry_heap) > 2 * len(self.memory_cache) + 64:
+                self._rebuild_expiry_heap()
+        self._enforce_memory_limit()
+
+    def _memory_remove(self, key: str) -> bool:
+        """Hapus entry dari memory dan index prefix"""
+        if self.memory_cache.pop(key, None) is None:
+            return False
+        namespace = self._namespace(key)
+        keys = self._prefix_index.get(namespace)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._prefix_index[namespace]
+        return True
+
+    def _rebuild_expiry_heap(self):
+        self._expiry_heap = [
+            (data['expires_at'], key)
+            for key, data in self.memory_cache.items()
+            if data.get('expires_at') is not None
+        ]
+        heapq.heapify(self._expiry_heap)
+
+    def _expire_due(self, now: float) -> int:
+        """Hapus entry yang sudah expired, biaya sebanding jumlah yang expired"""
+        removed = 0
+        heap = self._expiry_heap
+        while heap and heap[0][0] <= now:
+            expires_at, key = heapq.heappop(heap)
+            cache_data = self.memory_cache.get(key)
+            # Lewati entry basi (key sudah dihapus atau di-set ulang dengan expiry lain)
+            if cache_data is not None and cache_data.get('expires_at') == expires_at:
+                self._memory_remove(key)
+                removed += 1
+        return removed
+
+    def _keys_with_prefix(self, prefix: str) -> List[str]:
+        """Keys di memory yang diawali prefix, lewat index namespace"""
+        if '_' in prefix:
+            candidates = self._prefix_index.get(self._namespace(prefix), ())
+        else:
+            candidates = [
+                key
+                for namespace, keys in self._prefix_index.items()
+                if namespace.startswith(prefix)
+                for key in keys
+            ]
+        return [key for key in candidates if key.startswith(prefix)]
             
-    async def _enforce_memory_limit(self):
-        """Enforces memory cache limit by removing oldest items"""
-        if len(self.memory_cache) > self.MAX_MEMORY_ITEMS:
-            # Sort by last access time and remove oldest
-            sorted_items = sorted(
-                self.memory_cache.items(),
-                key=lambda x: x[1].get('last_accessed', 0)
-            )
-            # Remove oldest items until we're under limit
-            items_to_remove = len(sorted_items) - self.MAX_MEMORY_ITEMS
-            for key, _ in sorted_items[:items_to_remove]:
-                del self.memory_cache[key]
+    def _enforce_memory_limit(self):
+        """Enforces memory cache limit by removing least recently used items"""
+        while len(self.memory_cache) > self.MAX_MEMORY_ITEMS:
+            oldest_key = next(iter(self.memory_cache))
+            self._memory_remove(oldest_key)
 
     async def get(self, key: str) -> Optional[Any]:
         """
@@ -88,39 +259,40 @@ class CacheManager:
         """
         try:
             # Check memory cache first
-            if key in self.memory_cache:
-                cache_data = self.memory_cache[key]
-                now = time.time()
-                
-                # Check expiry
-                if 'expires_at' in cache_data and cache_data['expires_at'] <= now:
-                    del self.memory_cache[key]
+            cache_data = self._memory_get(key, time.time())
+            if cache_data is not None:
+                # Memory menyimpan object Python; salin hanya jika mutable
+                if cache_data['mutable']:
+                    return _snapshot(cache_data['value'])
+                return cache_data['value']
+            
+            if self._is_memory_only(key):
+                return None
+            
+            # Perubahan yang belum di-flush lebih baru dari isi database
+            pending_source = self._dirty if key in self._dirty else self._flushing
+            if key in pending_source:
+                pending = pending_source[key]
+                if pending is None:
                     return None
-                
-                # Update last accessed time
-                cache_data['last_accessed'] = now
-                return json.loads(cache_data['value'], cls=CustomJSONDecoder)
+                value, expires_at = pending
+                if expires_at is not None and expires_at <= time.time():
+                    return None
+                return _snapshot(value)
             
             # Try database
-            async with self._lock:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    "SELECT value, expires_at FROM cache WHERE key = ? AND (expires_at IS NULL OR expires_at > ?)",
-                    (key, time.time())
-                )
-                result = cursor.fetchone()
-                
-                if result:
-                    value, expires_at = result
-                    # Store in memory cache
-                    self.memory_cache[key] = {
-                        'value': value,
-                        'expires_at': expires_at,
-                        'last_accessed': time.time()
-                    }
-                    await self._enforce_memory_limit()
-                    return json.loads(value, cls=CustomJSONDecoder)
+            result = await get_pool().run(_select_entry, key, time.time())
+            if result and key not in self.memory_cache and key not in self._dirty and key not in self._flushing:
+                raw, expires_at = result
+                value = _deserialize(raw)
+                mutable = not isinstance(value, _IMMUTABLE_TYPES)
+                # Store in memory cache
+                self._memory_store(key, {
+                    'value': value,
+                    'mutable': mutable,
+                    'expires_at': expires_at
+                })
+                return _snapshot(value) if mutable else value
                 
             return None
 
@@ -138,30 +310,24 @@ class CacheManager:
             if expires_in is not None:
                 expires_at = time.time() + expires_in
 
-            # Serialize value
-            serialized_value = json.dumps(value, cls=CustomJSONEncoder)
+            snapshot = _snapshot(value)
             
             # Update memory cache
-            self.memory_cache[key] = {
-                'value': serialized_value,
-                'expires_at': expires_at,
-                'last_accessed': time.time()
-            }
+            self._memory_store(key, {
+                'value': snapshot,
+                'mutable': not isinstance(value, _IMMUTABLE_TYPES),
+                'expires_at': expires_at
+            })
+            
+            if self._is_memory_only(key):
+                return
             
-            await self._enforce_memory_limit()
+            if self.WRITE_BEHIND:
+                self._mark_dirty(key, (snapshot, expires_at))
+                return
             
-            # Update database
-            async with self._lock:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    """
-                    INSERT OR REPLACE INTO cache (key, value, expires_at)
-                    VALUES (?, ?, ?)
-                    """,
-                    (key, serialized_value, expires_at)
-                )
-                conn.commit()
+            # Write-through: serialize hanya untuk tabel SQLite
+            await get_write_queue().submit(_upsert_entries, [(key, _serialize(value), expires_at)])
 
         except Exception as e:
             self.logger.error(f"Error setting cache: {e}")
@@ -171,39 +337,124 @@ class CacheManager:
         """Delete value from cache"""
         try:
             # Remove from memory cache
-            if key in self.memory_cache:
-                del self.memory_cache[key]
+            self._memory_remove(key)
+            
+            if self._is_memory_only(key):
+                return
+            
+            if self.WRITE_BEHIND:
+                self._mark_dirty(key, None)
+                return
             
             # Remove from database
-            async with self._lock:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute("DELETE FROM cache WHERE key = ?", (key,))
-                conn.commit()
+            await get_write_queue().submit(_delete_entries, [key])
 
         except Exception as e:
             self.logger.error(f"Error deleting from cache: {e}")
             raise
 
+    def _mark_dirty(self, key: str, pending: Optional[Tuple[Any, Optional[float]]]):
+        """Catat perubahan key; perubahan berulang sebelum flush digabung"""
+        if key in self._dirty:
+            self._write_stats['coalesced'] += 1
+        self._dirty[key] = pending
+        self._ensure_flusher()
+        if len(self._dirty) >= self.MAX_DIRTY_KEYS and self._flush_wakeup is not None:
+            self._flush_wakeup.set()
+
+    def _ensure_flusher(self):
+        if self._flush_task is not None and not self._flush_task.done():
+            return
+        self._flush_wakeup = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._flush_loop(), name="cache-write-behind")
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_wakeup.wait(), self.FLUSH_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._flush_wakeup.clear()
+            await self.flush()
+
+    async def flush(self) -> int:
+        """Tulis semua perubahan dirty ke tabel cache dalam satu batch"""
+        if not self._dirty:
+            return 0
+        
+        dirty, self._dirty = self._dirty, {}
+        self._flushing = dirty
+        rows: List[Tuple[str, str, Optional[float]]] = []
+        deleted: List[str] = []
+        for key, pending in dirty.items():
+            if pending is None:
+                deleted.append(key)
+                continue
+            value, expires_at = pending
+            try:
+                rows.append((key, _serialize(value), expires_at))
+            except (TypeError, ValueError) as e:
+                self._write_stats['errors'] += 1
+                self.logger.error(f"Error serializing cache {key}: {e}")
+        
+        try:
+            await get_write_queue().submit(_apply_changes, rows, deleted)
+        except Exception as e:
+            self._write_stats['errors'] += 1
+            self.logger.error(f"Error flushing {len(dirty)} cache entries: {e}")
+            # Kembalikan ke antrian kecuali sudah ditimpa perubahan yang lebih baru
+            for key, pending in dirty.items():
+                self._dirty.setdefault(key, pending)
+            return 0
+        finally:
+            self._flushing = {}
+        
+        self._write_stats['flushes'] += 1
+        self._write_stats['flushed_keys'] += len(dirty)
+        return len(dirty)
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistik cache dan write-behind"""
+        return {
+            'memory_items': len(self.memory_cache),
+            'dirty': len(self._dirty),
+            **self._write_stats
+        }
+
+    async def close(self, flush: bool = True):
+        """
+        Hentikan flusher dan tulis perubahan yang tersisa (dipanggil saat shutdown).
+        flush=False membuang perubahan yang belum ditulis, untuk shutdown yang
+        langsung mengosongkan cache lewat clear_all()
+        """
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        if flush:
+            await self.flush()
+        else:
+            self._dirty.clear()
+
     async def clear_all(self):
         """Clear all cache data"""
         try:
             # Clear memory cache
             self.memory_cache.clear()
+            self._expiry_heap.clear()
+            self._prefix_index.clear()
+            self._dirty.clear()
             
             # Clear database cache
-            conn = get_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM cache")
-            conn.commit()
+            await get_write_queue().submit(_clear_entries)
             
             self.logger.info("Cache cleared successfully")
         except Exception as e:
             self.logger.error(f"Error clearing cache: {e}")
             raise
-        finally:
-            if 'conn' in locals():
-                conn.close()
 
     async def cleanup_expired(self):
         """Remove expired items from cache"""
@@ -211,47 +462,34 @@ class CacheManager:
             now = time.time()
             
             # Cleanup memory cache
-            expired_keys = [
-                key for key, data in self.memory_cache.items()
-                if 'expires_at' in data and data['expires_at'] <= now
-            ]
-            for key in expired_keys:
-                del self.memory_cache[key]
+            self._expire_due(now)
             
             # Cleanup database
-            async with self._lock:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    "DELETE FROM cache WHERE expires_at IS NOT NULL AND expires_at <= ?",
-                    (now,)
-                )
-                conn.commit()
+            await get_write_queue().submit(_delete_expired, now)
 
         except Exception as e:
             self.logger.error(f"Error cleaning up expired cache: {e}")
-# Tambahkan method baru setelah method cleanup_expired (setelah line 232)
-# Line 233-249 (Method Baru):
+            
     async def delete_pattern(self, pattern: str):
-        """Delete all cache keys matching the pattern"""
+        """
+        Delete all cache keys yang diawali pattern.
+        Wildcard '*' di akhir diabaikan ('growid_*' sama dengan 'growid_').
+        """
         try:
+            prefix = pattern.rstrip('*')
+            
             # Hapus dari memory cache
-            keys_to_delete = [
-                key for key in self.memory_cache.keys()
-                if pattern in key
-            ]
+            keys_to_delete = self._keys_with_prefix(prefix)
             for key in keys_to_delete:
-                del self.memory_cache[key]
+                self._memory_remove(key)
+            
+            # Perubahan dirty untuk prefix ini tidak perlu ditulis lagi
+            for pending in (self._dirty, self._flushing):
+                for key in [key for key in pending if key.startswith(prefix)]:
+                    del pending[key]
                 
             # Hapus dari database
-            async with self._lock:
-                conn = get_connection()
-                cursor = conn.cursor()
-                cursor.execute(
-                    "DELETE FROM cache WHERE key LIKE ?",
-                    (f"%{pattern}%",)
-                )
-                conn.commit()
+            await get_write_queue().submit(_delete_prefix, prefix)
                 
             self.logger.info(f"Deleted {len(keys_to_delete)} cache entries matching pattern: {pattern}")
                 
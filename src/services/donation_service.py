@@ -1,12 +1,15 @@
 import discord
 from discord.ext import commands
+import asyncio
 import logging
 from datetime import datetime
 import json
-import re
+from typing import Hashable, List, Tuple
 from src.database.connection import get_connection
 from src.services.base_service import ServiceResponse
 from src.config.constants.bot_constants import Balance, TransactionType
+from src.utils.coalescer import KeyedCoalescer
+from src.utils.donation_parser import parse_deposit, parse_donation
 
 # Constants yang diperlukan - sementara hardcode sampai constants diperbaiki
 CURRENCY_RATES = {
@@ -30,9 +33,20 @@ from src.bot.config import config_manager
 # Load config akan dilakukan saat setup, bukan saat import
 DONATION_CHANNEL_ID = None
 
+# Donasi untuk GrowID yang sama dalam jendela ini digabung jadi satu transaksi balance
+DONATION_MERGE_WINDOW = 1.5
+DONATION_MERGE_MAX = 25
+
 # Update imports for tenant files moved
 # No direct tenant imports here, so no changes needed in this file for tenant move
 
+class DonationAlreadyCredited(Exception):
+    """Sebagian message id donasi sudah tercatat di processed_donations"""
+
+    def __init__(self, message_ids: List[str]):
+        super().__init__(f"Donasi sudah dikreditkan: {', '.join(message_ids)}")
+        self.message_ids = message_ids
+
 class DonationManager:
     """Manager class for handling donations"""
     _instance = None
@@ -47,6 +61,12 @@ class DonationManager:
             self.bot = bot
             self.logger = logging.getLogger("DonationManager")
             self.balance_manager = None
+            # Kredit per GrowID digabung per jendela, message id duplikat diabaikan
+            self.credit_queue = KeyedCoalescer(
+                self._flush_credits,
+                window=DONATION_MERGE_WINDOW,
+                max_items=DONATION_MERGE_MAX
+            )
 
             # Load donation channel ID from config_manager
             global DONATION_CHANNEL_ID
@@ -113,115 +133,103 @@ class DonationManager:
                     content = "\n".join([f.value for f in embed.fields])
             
             # Parse pesan dengan format: GrowID: Fdy\nDeposit: 1 Diamond Lock
-            patterns = [
-                r"GrowID:\s*(\w+).*?Deposit:\s*(.+)",  # Format utama
-                r"GrowID:\s*(\w+).*?Jumlah:\s*(.+)",   # Format alternatif
-            ]
-            
-            match = None
-            for pattern in patterns:
-                match = re.search(pattern, content, re.DOTALL | re.IGNORECASE)
-                if match:
-                    break
-            
-            if not match:
+            parsed = parse_donation(content)
+            if not parsed:
                 self.logger.debug(f"Format pesan tidak sesuai: {content}")
                 return
 
-            growid = match.group(1).strip()
-            deposit_str = match.group(2).strip()
+            growid, deposit_str = parsed
+            wl, dl, bgl = self.parse_deposit(deposit_str)
+            if wl == 0 and dl == 0 and bgl == 0:
+                self.logger.warning(f"Donation failed: Deposit amounts zero for growid {growid}")
+                await message.channel.send(f"Failed to find growid {growid}")
+                return
 
             self.logger.info(f"Processing donation: GrowID={growid}, Deposit={deposit_str}")
 
-            # Validasi GrowID menggunakan user service
-            is_valid, message_text = await self.validate_growid(growid)
-            if not is_valid:
-                self.logger.warning(f"Donation failed: {message_text} for growid {growid}")
-                await message.channel.send(f"Failed to find growid {growid}")
-                return
+            # Masuk antrian kredit; webhook yang terkirim ulang (message id sama) diabaikan
+            if not self.credit_queue.add(growid, message.id, (wl, dl, bgl, message.channel)):
+                self.logger.info(f"Donation message {message.id} sudah diproses, dilewati")
 
-            # Get current balance via user service
-            from src.services.user_service import UserService
-            user_service = UserService(self.bot.db_manager)
-            user_response = await user_service.get_user_by_growid(growid)
-            if not user_response.success or not user_response.data:
-                self.logger.warning(f"Donation failed: User data not found for growid {growid}")
-                await message.channel.send(f"Failed to find growid {growid}")
-                return
+        except Exception as e:
+            self.logger.error(f"Error processing donation message: {e}")
+            await message.channel.send(f"Failed to find growid")
 
-            current_balance = Balance(
-                wl=user_response.data.get('balance_wl', 0),
-                dl=user_response.data.get('balance_dl', 0),
-                bgl=user_response.data.get('balance_bgl', 0)
-            )
+    async def _flush_credits(self, growid: str, items: List[Tuple[Hashable, tuple]]):
+        """
+        Kreditkan semua donasi tertunda untuk satu GrowID dalam satu transaksi
+        balance. Dedupe message id terjadi di dalam transaksi write queue: id
+        yang sudah ada di processed_donations (restart atau race) membatalkan
+        transaksi, lalu kredit diulang hanya untuk id yang belum tercatat
+        """
+        items = list(items)
+        while items:
+            rows = [(str(message_id), growid, item[0], item[1], item[2]) for message_id, item in items]
+            already_credited: List[str] = []
+
+            def _record_messages(conn, rows=rows, already_credited=already_credited):
+                for row in rows:
+                    cursor = conn.execute(
+                        "INSERT OR IGNORE INTO processed_donations (message_id, growid, wl, dl, bgl) "
+                        "VALUES (?, ?, ?, ?, ?)",
+                        row
+                    )
+                    if cursor.rowcount == 0:
+                        already_credited.append(row[0])
+                if already_credited:
+                    raise DonationAlreadyCredited(already_credited)
+
+            wl = sum(item[0] for _, item in items)
+            dl = sum(item[1] for _, item in items)
+            bgl = sum(item[2] for _, item in items)
+            channel = items[-1][1][3]
 
-            # Parse deposit amounts
             try:
-                wl, dl, bgl = self.parse_deposit(deposit_str)
-                if wl == 0 and dl == 0 and bgl == 0:
-                    self.logger.warning(f"Donation failed: Deposit amounts zero for growid {growid}")
-                    await message.channel.send(f"Failed to find growid {growid}")
-                    return
+                new_balance = await self.process_donation(growid, wl, dl, bgl, extra_write=_record_messages)
+                break
             except Exception as e:
-                self.logger.error(f"Error parsing deposit: {e}")
-                await message.channel.send(f"Failed to find growid {growid}")
+                if already_credited:
+                    self.logger.info(f"{len(already_credited)} donasi {growid} sudah pernah dikreditkan, dilewati")
+                    skip = set(already_credited)
+                    items = [(message_id, item) for message_id, item in items if str(message_id) not in skip]
+                    continue
+                self.logger.error(f"Error processing donation: {e}")
+                await channel.send(f"Failed to find growid {growid}")
                 return
+        else:
+            return
 
-            # Process donation
-            try:
-                new_balance = await self.process_donation(growid, wl, dl, bgl, current_balance)
-                
-                # Format balance untuk response
-                balance_text = f"{new_balance.wl:,} WL"
-                if new_balance.dl > 0:
-                    balance_text += f", {new_balance.dl:,} DL"
-                if new_balance.bgl > 0:
-                    balance_text += f", {new_balance.bgl:,} BGL"
-                
-                await message.channel.send(f"Successfully filled {growid}. Current growid balance {balance_text}")
-                
-            except Exception as e:
-                self.logger.error(f"Error processing donation: {e}")
-                await message.channel.send(f"Failed to find growid {growid}")
+        # Format balance untuk response
+        balance_text = f"{new_balance.wl:,} WL"
+        if new_balance.dl > 0:
+            balance_text += f", {new_balance.dl:,} DL"
+        if new_balance.bgl > 0:
+            balance_text += f", {new_balance.bgl:,} BGL"
 
-        except Exception as e:
-            self.logger.error(f"Error processing donation message: {e}")
-            await message.channel.send(f"Failed to find growid")
+        merged = f" ({len(items)} donations)" if len(items) > 1 else ""
+        await channel.send(f"Successfully filled {growid}{merged}. Current growid balance {balance_text}")
 
     def parse_deposit(self, deposit: str) -> tuple[int, int, int]:
         """Parse deposit string into WL, DL, BGL amounts"""
-        wl = dl = bgl = 0
-        
-        if 'World Lock' in deposit:
-            wl = int(re.search(r'(\d+) World Lock', deposit).group(1))
-        if 'Diamond Lock' in deposit:
-            dl = int(re.search(r'(\d+) Diamond Lock', deposit).group(1))
-        if 'Blue Gem Lock' in deposit:
-            bgl = int(re.search(r'(\d+) Blue Gem Lock', deposit).group(1))
-                
-        return wl, dl, bgl
+        return parse_deposit(deposit)
 
-    async def process_donation(self, growid: str, wl: int, dl: int, bgl: int, current_balance: Balance) -> Balance:
-        """Process a donation"""
+    async def process_donation(self, growid: str, wl: int, dl: int, bgl: int, extra_write=None) -> Balance:
+        """Process a donation, return balance baru"""
         try:
-            # Calculate new balance
-            new_balance = Balance(
-                current_balance.wl + wl,
-                current_balance.dl + dl,
-                current_balance.bgl + bgl
-            )
-
             # Update balance menggunakan balance manager
-            await self.balance_manager.update_balance(
+            response = await self.balance_manager.update_balance(
                 growid,
                 wl,
                 dl,
                 bgl,
                 f"Donation: {wl} WL, {dl} DL, {bgl} BGL",
-                TransactionType.DONATION
+                TransactionType.DONATION,
+                extra_write=extra_write
             )
+            if not response.success:
+                raise Exception(response.error or f"Gagal update balance {growid}")
 
-            return new_balance
+            return response.data
 
         except Exception as e:
             self.logger.error(f"Error processing donation: {e}")
@@ -303,6 +311,10 @@ class DonationManager:
         
         await channel.send(embed=embed)
 
+    async def close(self):
+        """Kreditkan donasi yang masih tertunda"""
+        await self.credit_queue.close()
+
     async def setup_balance_manager(self, balance_manager):
         """Setup balance manager dependency"""
         self.balance_manager = balance_manager
@@ -8,6 +8,7 @@ from typing import Optional, List
 from src.database.connection import DatabaseManager
 from src.database.models.level import Level, LevelReward, LevelSettings
 from src.services.base_service import BaseService, ServiceResponse
+from src.utils.leveling_curve import LINEAR_CURVE
 
 class LevelService(BaseService):
     """Service untuk menangani operasi level"""
@@ -103,11 +104,11 @@ class LevelService(BaseService):
             new_messages = current_messages + 1
             new_level = current_level
             
-            # Cek level up (asumsi: 100 XP per level)
-            xp_per_level = 100
-            while new_xp >= xp_per_level:
-                new_xp -= xp_per_level
-                new_level += 1
+            # Cek level up (100 XP per level, xp disimpan relatif terhadap level)
+            levels_gained = LINEAR_CURVE.level_for_xp(new_xp)
+            if levels_gained:
+                new_xp -= LINEAR_CURVE.xp_for_level(levels_gained)
+                new_level += levels_gained
             
             # Update database
             from datetime import datetime
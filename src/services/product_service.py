@@ -5,7 +5,9 @@ Menangani business logic untuk product management
 
 import logging
 from typing import Optional, List
+from datetime import datetime
 from src.database.connection import DatabaseManager
+from src.database.migrations import rebuild_stock_counts
 from src.database.models.product import Product, Stock, StockStatus
 from src.services.base_service import BaseService, ServiceResponse
 
@@ -211,7 +213,8 @@ class ProductService(BaseService):
     async def get_product_stock_count(self, code: str) -> ServiceResponse:
         """Ambil jumlah stock product"""
         try:
-            query = "SELECT COUNT(*) as count FROM stock WHERE product_code = ? AND status = ?"
+            # Counter dijaga trigger, tidak perlu COUNT(*) atas seluruh history stock
+            query = "SELECT count FROM stock_counts WHERE product_code = ? AND status = ?"
             result = await self.db.execute_query(query, (code, StockStatus.AVAILABLE.value))
             
             count = result[0]['count'] if result else 0
@@ -224,6 +227,41 @@ class ProductService(BaseService):
         except Exception as e:
             return self._handle_exception(e, "mengambil jumlah stock")
     
+    async def get_stock_summary(self, status: StockStatus = StockStatus.AVAILABLE) -> ServiceResponse:
+        """
+        Ambil jumlah stock semua product dalam satu query ke tabel counter.
+        Product tanpa stock dengan status tersebut tidak muncul (anggap 0).
+        """
+        try:
+            query = "SELECT product_code, count FROM stock_counts WHERE status = ? AND count > 0"
+            result = await self.db.execute_query(query, (status.value,))
+            
+            summary = {row['product_code']: row['count'] for row in result or []}
+            
+            return ServiceResponse.success_response(
+                data=summary,
+                message=f"Ringkasan stock untuk {len(summary)} product"
+            )
+            
+        except Exception as e:
+            return self._handle_exception(e, "mengambil ringkasan stock")
+    
+    async def reconcile_stock_counts(self) -> ServiceResponse:
+        """Hitung ulang counter stock dari tabel stock, return selisih yang diperbaiki"""
+        try:
+            drift = await self.db.execute_write(lambda conn: rebuild_stock_counts(conn.cursor()))
+            
+            return ServiceResponse.success_response(
+                data=[
+                    {'product_code': code, 'status': status, 'old': old, 'new': new}
+                    for (code, status), (old, new) in sorted(drift.items())
+                ],
+                message=f"Counter stock direkonsiliasi, {len(drift)} counter diperbaiki"
+            )
+            
+        except Exception as e:
+            return self._handle_exception(e, "merekonsiliasi counter stock")
+    
     async def get_stock_count(self, code: str) -> ServiceResponse:
         """Alias untuk get_product_stock_count untuk backward compatibility"""
         return await self.get_product_stock_count(code)
@@ -258,9 +296,9 @@ class ProductService(BaseService):
                     message="Content harus berisi minimal satu baris stock yang valid"
                 )
             
-            # Siapkan query untuk batch insert
+            # Siapkan query untuk batch insert (baris duplikat dilewati)
             query = """
-                INSERT INTO stock (product_code, content, status, added_by, added_at, updated_at) 
+                INSERT OR IGNORE INTO stock (product_code, content, status, added_by, added_at, updated_at) 
                 VALUES (?, ?, ?, ?, ?, ?)
             """
             
@@ -283,12 +321,13 @@ class ProductService(BaseService):
                 )
                 params_list.append(params)
             
-            # Execute batch insert
-            success_count = 0
-            for params in params_list:
-                success = await self.db.execute_update(query, params)
-                if success:
-                    success_count += 1
+            def _insert_stock(conn):
+                return [conn.execute(query, params).rowcount > 0 for params in params_list]
+            
+            # Execute batch insert dalam satu transaksi (counter ikut diperbarui trigger)
+            inserted = await self.db.execute_write(_insert_stock)
+            stock_entries = [stock for stock, ok in zip(stock_entries, inserted) if ok]
+            success_count = len(stock_entries)
             
             if success_count == 0:
                 return ServiceResponse.error_response(
@@ -302,7 +341,7 @@ class ProductService(BaseService):
                     "total_lines": len(lines),
                     "success_count": success_count,
                     "failed_count": len(lines) - success_count,
-                    "stock_entries": [stock.to_dict() for stock in stock_entries[:success_count]]
+                    "stock_entries": [stock.to_dict() for stock in stock_entries]
                 },
                 message=f"Berhasil menambahkan {success_count} stock dari {len(lines)} baris untuk product {product_code}"
             )
@@ -350,17 +389,16 @@ class ProductService(BaseService):
                 )
             
             # Update status stock
-            from datetime import datetime
             update_query = """
                 UPDATE stock 
                 SET status = ?, buyer_id = ?, updated_at = ? 
-                WHERE id = ?
+                WHERE id = ? AND status = ?
             """
             updated_at = datetime.utcnow().isoformat()
-            success = await self.db.execute_update(
-                update_query, 
-                (StockStatus.SOLD.value, buyer_id, updated_at, stock_id)
-            )
+            params = (StockStatus.SOLD.value, buyer_id, updated_at, stock_id, StockStatus.AVAILABLE.value)
+            
+            # Guard status di WHERE: stock yang sudah terjual tidak dihitung dua kali
+            success = await self.db.execute_write(lambda conn: conn.execute(update_query, params).rowcount > 0)
             
             if not success:
                 return ServiceResponse.error_response(
@@ -404,7 +442,6 @@ class ProductService(BaseService):
                     message=f"Status harus salah satu dari: {', '.join(valid_statuses)}"
                 )
             
-            from datetime import datetime
             updated_at = datetime.utcnow().isoformat()
             
             # Update semua stock sekaligus
@@ -416,9 +453,15 @@ class ProductService(BaseService):
             """
             
             params = [status, buyer_id, updated_at] + stock_ids + [product_code]
-            success = await self.db.execute_update(query, params)
             
-            if not success:
+            def _write_status(conn):
+                conn.execute(query, params)
+            
+            # Lewat single-writer queue agar digabung dalam satu commit dengan write lain
+            try:
+                await self.db.execute_write(_write_status)
+            except Exception as e:
+                self.logger.error(f"Error update status stock {product_code}: {e}")
                 return ServiceResponse.error_response(
                     error="Gagal update status stock",
                     message="Gagal mengupdate status stock di database"
@@ -531,36 +574,40 @@ class ProductService(BaseService):
                     message=f"Product dengan code {code.upper()} tidak ditemukan"
                 )
             
-            # Ambil stock yang tersedia
-            available_stock_response = await self.get_available_stock(code.upper())
-            if not available_stock_response.success:
-                return ServiceResponse.error_response(
-                    error="Gagal mengambil stock",
-                    message="Gagal mengambil informasi stock produk"
-                )
+            # Tandai stock tertua sebagai 'deleted' (FIFO) dalam satu transaksi
+            updated_at = datetime.utcnow().isoformat()
             
-            available_stocks = available_stock_response.data
-            if len(available_stocks) < amount:
+            def _reduce(conn):
+                rows = conn.execute(
+                    """
+                    UPDATE stock SET status = ?, updated_at = ?
+                    WHERE id IN (
+                        SELECT id FROM stock
+                        WHERE product_code = ? AND status = ?
+                        ORDER BY added_at ASC, id ASC
+                        LIMIT ?
+                    )
+                    RETURNING id
+                    """,
+                    (StockStatus.DELETED.value, updated_at, code.upper(), StockStatus.AVAILABLE.value, amount)
+                ).fetchall()
+                if len(rows) < amount:
+                    # Batalkan intent ini, stock tidak berubah
+                    raise ValueError(len(rows))
+                remaining = conn.execute(
+                    "SELECT count FROM stock_counts WHERE product_code = ? AND status = ?",
+                    (code.upper(), StockStatus.AVAILABLE.value)
+                ).fetchone()
+                return sorted(row[0] for row in rows), remaining[0] if remaining else 0
+            
+            try:
+                stock_ids, remaining_stock = await self.db.execute_write(_reduce)
+            except ValueError as e:
                 return ServiceResponse.error_response(
                     error="Stock tidak cukup",
-                    message=f"Stock tersedia: {len(available_stocks)}, diminta: {amount}"
+                    message=f"Stock tersedia: {e.args[0]}, diminta: {amount}"
                 )
             
-            # Ambil stock yang akan dikurangi (FIFO - First In First Out)
-            stocks_to_reduce = available_stocks[:amount]
-            stock_ids = [stock['id'] for stock in stocks_to_reduce]
-            
-            # Update status stock menjadi 'deleted'
-            update_response = await self.update_stock_status(stock_ids, StockStatus.DELETED)
-            if not update_response.success:
-                return ServiceResponse.error_response(
-                    error="Gagal mengurangi stock",
-                    message="Gagal mengupdate status stock"
-                )
-            
-            # Hitung stock yang tersisa
-            remaining_stock = len(available_stocks) - amount
-            
             # Log aktivitas
             self.logger.info(f"Stock reduced for product {code.upper()}: {amount} items by admin {admin_id}")
             
@@ -24,12 +24,20 @@ from src.database.models.balance import Balance
 from src.database.models.transaction import TransactionType, TransactionStatus
 from src.database.models.product import Product, Stock, StockStatus
 from src.database.connection import get_connection
+from src.database.write_queue import get_write_queue
 from src.utils.base_handler import BaseLockHandler
 from src.services.cache_service import CacheManager
 from src.services.product_service import ProductService
-from src.services.balance_service import BalanceManagerService
+from src.services.balance_service import BalanceManagerService, BalanceResponse
 from src.services.base_service import ServiceResponse
 from src.config.constants.messages import MESSAGES
+from src.config.constants.exceptions import (
+    TransactionError,
+    InsufficientBalanceError,
+    OutOfStockError,
+    ProductError,
+    ProductNotFoundError
+)
 from src.config.constants.colors import COLORS
 from src.config.constants.timeouts import CACHE_TIMEOUT
 
@@ -159,13 +167,133 @@ class TransactionManager(BaseLockHandler):
         self.callback_manager.register('transaction_failed', 
                                      notify_transaction_failed)
 
+    def _debit_balance(self, current: Balance, amount: int) -> Balance:
+        """Kurangi amount (WL) dari balance, pertahankan BGL sebisa mungkin"""
+        remaining = current.total_wl() - amount
+        bgl = min(current.bgl, remaining // 10000)
+        remaining -= bgl * 10000
+        new_balance = Balance(remaining % 100, remaining // 100, bgl)
+        return self.balance_manager.normalize_balance(new_balance, auto_convert_to_bgl=False)
+
+    def _purchase_tx(
+        self,
+        conn,
+        growid: str,
+        buyer_id: str,
+        product_code: str,
+        quantity: int
+    ) -> Dict[str, Any]:
+        """
+        Seluruh pembelian dalam satu transaksi SQLite (dijalankan di writer thread):
+        klaim stock, debit balance, dan tulis ledger transactions/balance_transactions.
+        Exception membatalkan semua perubahan pembelian ini.
+        """
+        product = conn.execute(
+            "SELECT code, name, price FROM products WHERE code = ?",
+            (product_code,)
+        ).fetchone()
+        if not product:
+            raise ProductNotFoundError(
+                MESSAGES.ERROR['PRODUCT_NOT_FOUND'].format(product_code=product_code)
+            )
+
+        total_price = int(product['price'] * quantity)
+
+        user = conn.execute(
+            """
+            SELECT balance_wl, balance_dl, balance_bgl
+            FROM users
+            WHERE growid = ? COLLATE binary
+            """,
+            (growid,)
+        ).fetchone()
+        if not user:
+            raise TransactionError(MESSAGES.ERROR['USER_NOT_REGISTERED'])
+
+        current_balance = Balance(user['balance_wl'], user['balance_dl'], user['balance_bgl'])
+        if not current_balance.can_afford(total_price):
+            raise InsufficientBalanceError(
+                f"❌ Balance tidak cukup! Saldo Anda: {current_balance.total_wl():,.0f} WL, "
+                f"Dibutuhkan: {total_price:,.0f} WL"
+            )
+
+        # Klaim stock secara atomik, tidak ada jeda antara baca dan update stock
+        claimed = conn.execute(
+            """
+            UPDATE stock
+            SET status = ?, buyer_id = ?, updated_at = ?
+            WHERE id IN (
+                SELECT id FROM stock
+                WHERE product_code = ? AND status = ?
+                ORDER BY added_at ASC, id ASC
+                LIMIT ?
+            )
+            RETURNING id, content
+            """,
+            (
+                StockStatus.SOLD.value,
+                buyer_id,
+                datetime.utcnow().isoformat(),
+                product_code,
+                StockStatus.AVAILABLE.value,
+                quantity
+            )
+        ).fetchall()
+        if len(claimed) < quantity:
+            raise OutOfStockError(
+                MESSAGES.ERROR['OUT_OF_STOCK'].format(product_name=product['name'])
+            )
+
+        new_balance = self._debit_balance(current_balance, total_price)
+        conn.execute(
+            """
+            UPDATE users
+            SET balance_wl = ?, balance_dl = ?, balance_bgl = ?,
+                updated_at = CURRENT_TIMESTAMP
+            WHERE growid = ? COLLATE binary
+            """,
+            (new_balance.wl, new_balance.dl, new_balance.bgl, growid)
+        )
+
+        details = f"Purchase {quantity}x {product['name']}"
+        conn.execute(
+            """
+            INSERT INTO balance_transactions
+            (growid, type, details, old_balance, new_balance, created_at)
+            VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+            """,
+            (
+                growid,
+                TransactionType.PURCHASE.value,
+                details,
+                current_balance.format(),
+                new_balance.format()
+            )
+        )
+        conn.execute(
+            """
+            INSERT INTO transactions
+            (buyer_id, product_code, quantity, total_price, status)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (buyer_id, product_code, quantity, total_price, TransactionStatus.COMPLETED.value)
+        )
+
+        return {
+            'product': dict(product),
+            'content': [row['content'] for row in claimed],
+            'total_price': total_price,
+            'old_balance': current_balance,
+            'new_balance': new_balance
+        }
+
     async def process_purchase(
         self, 
         buyer_id: str, 
         product_code: str, 
         quantity: int = 1
     ) -> TransactionResponse:
-        """Process purchase dengan proper coordination"""
+        """Process purchase sebagai satu transaksi database atomik"""
         if quantity < 1:
             return TransactionResponse.error(MESSAGES.ERROR['INVALID_AMOUNT'])
 
@@ -187,113 +315,54 @@ class TransactionManager(BaseLockHandler):
                 return TransactionResponse.error(growid_response.error)
             growid = growid_response.data
 
-            # Get product details
-            product_response = await self.product_manager.get_product(product_code)
-            if not product_response.success:
-                return TransactionResponse.error(product_response.error)
-            product = product_response.data
-
-            # Get available stock
-            stock_response = await self.product_manager.get_available_stock(
-                product_code, 
-                quantity
-            )
-            if not stock_response.success:
-                return TransactionResponse.error(stock_response.error)
-            available_stock = stock_response.data
-
-            # Calculate total price and ensure it's an integer for WL calculations
-            total_price_float = product['price'] * quantity
-            total_price = int(total_price_float)  # Convert to integer for WL calculations
-
-            # Get and verify balance
-            balance_response = await self.balance_manager.get_balance(growid)
-            if not balance_response.success:
-                return TransactionResponse.error(balance_response.error)
-            current_balance = balance_response.data
-
-            # Add detailed logging for balance verification
-            self.logger.info(f"[PURCHASE] Balance verification for {growid}: Balance={current_balance.total_wl()} WL, Required={total_price} WL")
-            self.logger.info(f"[PURCHASE] Balance details: WL={current_balance.wl}, DL={current_balance.dl}, BGL={current_balance.bgl}")
-            self.logger.info(f"[PURCHASE] Balance total_wl calculation: {current_balance.wl} + ({current_balance.dl} * 100) + ({current_balance.bgl} * 10000) = {current_balance.total_wl()}")
-            self.logger.info(f"[PURCHASE] Price calculation: product_price={product['price']} * quantity={quantity} = {total_price_float} -> {total_price} WL")
-            self.logger.info(f"[PURCHASE] Can afford check: current_balance.can_afford({total_price}) = {current_balance.can_afford(total_price)}")
-
-            # Use can_afford method for more reliable balance checking
-            can_afford_result = current_balance.can_afford(total_price)
-            if not can_afford_result:
-                self.logger.error(f"[PURCHASE] CRITICAL: Balance check failed!")
-                self.logger.error(f"[PURCHASE] User: {growid} (ID: {buyer_id})")
-                self.logger.error(f"[PURCHASE] Balance object: {current_balance}")
-                self.logger.error(f"[PURCHASE] Balance WL: {current_balance.wl}, DL: {current_balance.dl}, BGL: {current_balance.bgl}")
-                self.logger.error(f"[PURCHASE] Total WL: {current_balance.total_wl()}")
-                self.logger.error(f"[PURCHASE] Required: {total_price} (type: {type(total_price)})")
-                self.logger.error(f"[PURCHASE] Can afford result: {can_afford_result}")
-                self.logger.error(f"[PURCHASE] Manual check: {current_balance.total_wl()} >= {total_price} = {current_balance.total_wl() >= total_price}")
-                
-                # Clear cache and get fresh balance data to double-check
-                cache_key = f"balance_{growid}"
-                await self.cache_manager.delete(cache_key)
-                self.logger.info(f"[PURCHASE] Cleared balance cache for {growid}")
-                
-                fresh_balance_response = await self.balance_manager.get_balance(growid)
-                if fresh_balance_response.success:
-                    fresh_balance = fresh_balance_response.data
-                    self.logger.error(f"[PURCHASE] Fresh balance check: WL={fresh_balance.wl}, DL={fresh_balance.dl}, BGL={fresh_balance.bgl}")
-                    self.logger.error(f"[PURCHASE] Fresh total WL: {fresh_balance.total_wl()}")
-                    fresh_can_afford = fresh_balance.can_afford(total_price)
-                    self.logger.error(f"[PURCHASE] Fresh can afford: {fresh_can_afford}")
-                    
-                    # If fresh balance check passes, use the fresh balance and continue
-                    if fresh_can_afford:
-                        self.logger.warning(f"[PURCHASE] Fresh balance check passed! Using fresh balance data.")
-                        current_balance = fresh_balance
-                        can_afford_result = True
-                    else:
-                        # Double-check with manual calculation
-                        manual_total = fresh_balance.wl + (fresh_balance.dl * 100) + (fresh_balance.bgl * 10000)
-                        manual_can_afford = manual_total >= total_price
-                        self.logger.error(f"[PURCHASE] Manual calculation: {fresh_balance.wl} + ({fresh_balance.dl} * 100) + ({fresh_balance.bgl} * 10000) = {manual_total}")
-                        self.logger.error(f"[PURCHASE] Manual can afford: {manual_total} >= {total_price} = {manual_can_afford}")
-                        
-                        if manual_can_afford:
-                            self.logger.warning(f"[PURCHASE] Manual calculation passed! Proceeding with transaction.")
-                            current_balance = fresh_balance
-                            can_afford_result = True
-                
-                # If still can't afford after fresh check, return error
-                if not can_afford_result:
-                    return TransactionResponse.error(f"❌ Balance tidak cukup! Saldo Anda: {current_balance.total_wl():,.0f} WL, Dibutuhkan: {total_price:,.0f} WL")
+            # Lock yang sama dengan update_balance, sehingga pembelian dan donasi/deposit
+            # untuk GrowID ini tidak saling mendahului saat menulis dan memperbarui cache
+            balance_lock_key = f"balance_update_{growid}"
+            if not await self.balance_manager.acquire_lock(balance_lock_key):
+                return TransactionResponse.error(MESSAGES.ERROR['LOCK_ACQUISITION_FAILED'])
+            try:
+                # Klaim stock, debit balance dan tulis ledger dalam satu transaksi
+                try:
+                    result = await get_write_queue().submit(
+                        self._purchase_tx,
+                        growid,
+                        buyer_id,
+                        product_code,
+                        quantity
+                    )
+                except (TransactionError, ProductError) as e:
+                    self.logger.warning(f"[PURCHASE] Purchase rejected for {growid} ({buyer_id}): {e}")
+                    return TransactionResponse.error(str(e))
+
+                product = result['product']
+                total_price = result['total_price']
+                new_balance = result['new_balance']
+                self.logger.info(
+                    f"[PURCHASE] {growid} bought {quantity}x {product_code} for {total_price} WL: "
+                    f"{result['old_balance'].format()} -> {new_balance.format()}"
+                )
 
-            # Update stock status via ProductManager
-            stock_update_response = await self.product_manager.update_stock_status(
-                product_code,
-                [item['id'] for item in available_stock[:quantity]],
-                        StockStatus.SOLD.value,
-                buyer_id
+                # Sinkronkan cache dengan hasil transaksi
+                await self.cache_manager.set(
+                    f"balance_{growid}",
+                    new_balance,
+                    expires_in=CACHE_TIMEOUT.get_seconds(CACHE_TIMEOUT.SHORT)
+                )
+                await self.cache_manager.delete(f"trx_history_{growid}")
+                await self.cache_manager.delete(f"stock_count_{product_code}")
+            finally:
+                self.balance_manager.release_lock(balance_lock_key)
+
+            balance_update_response = BalanceResponse.success(
+                new_balance,
+                MESSAGES.SUCCESS['BALANCE_UPDATE']
             )
-            if not stock_update_response.success:
-                return TransactionResponse.error(stock_update_response.error)
-
-            # Update balance via BalanceManager
-            balance_update_response = await self.balance_manager.update_balance(
-                growid=growid,
-                wl=-total_price,
-                details=f"Purchase {quantity}x {product['name']}",
-                transaction_type=TransactionType.PURCHASE
+            await self.balance_manager.callback_manager.trigger(
+                'balance_updated',
+                growid,
+                result['old_balance'],
+                new_balance
             )
-            if not balance_update_response.success:
-                # Rollback stock status if balance update fails
-                await self.product_manager.update_stock_status(
-                    product_code,
-                    [item['id'] for item in available_stock[:quantity]],
-                     StockStatus.AVAILABLE.value,
-                    None
-                )
-                return TransactionResponse.error(balance_update_response.error)
-
-            # Prepare content list
-            content_list = [item['content'] for item in available_stock[:quantity]]
 
             # Trigger completion callbacks
             await self.callback_manager.trigger(
@@ -303,7 +372,7 @@ class TransactionManager(BaseLockHandler):
                 product_code=product_code,
                 quantity=quantity,
                 total_price=total_price,
-                new_balance=balance_update_response.data
+                new_balance=new_balance
             )
 
             await self.callback_manager.trigger(
@@ -318,7 +387,7 @@ class TransactionManager(BaseLockHandler):
             return TransactionResponse.success(
                 transaction_type='purchase',
                 data={
-                    'content': content_list,
+                    'content': result['content'],
                     'total_paid': total_price
                 },
                 message=(
@@ -326,9 +395,9 @@ class TransactionManager(BaseLockHandler):
                     f"Product: {product['name']}\n"
                     f"Quantity: {quantity}x\n"
                     f"Total paid: {total_price:,} WL\n"
-                    f"New balance: {balance_update_response.data.format()}"
+                    f"New balance: {new_balance.format()}"
                 ),
-                product_response=product_response,
+                product_response=product,
                 balance_response=balance_update_response
             )
 
@@ -19,6 +19,7 @@ from src.services.product_service import ProductService
 from src.services.transaction_service import TransactionManager as TransactionService
 from src.services.admin_service import AdminService
 from src.services.cache_service import CacheManager
+from src.utils.lock_manager import KeyedLockTable
 from .modals import RegisterModal, QuantityModal
 
 class ButtonStatistics:
@@ -73,42 +74,20 @@ class InteractionLockManager:
     """Class untuk mengelola interaction locks"""
     
     def __init__(self):
-        self._interaction_locks = {}
-        self._last_cleanup = datetime.utcnow()
+        # Entry dihapus otomatis setelah release, tidak perlu clear periodik
+        self._interaction_locks = KeyedLockTable("interaction")
         self.logger = logging.getLogger("InteractionLockManager")
     
-    async def cleanup_locks(self):
-        """Cleanup old locks periodically"""
-        now = datetime.utcnow()
-        if (now - self._last_cleanup).total_seconds() > 300:  # Every 5 minutes
-            self._interaction_locks.clear()
-            self._last_cleanup = now
-            self.logger.debug("Cleaned up interaction locks")
-    
     async def acquire_lock(self, interaction_id: str) -> bool:
         """Acquire interaction lock"""
-        await self.cleanup_locks()
-
-        if interaction_id not in self._interaction_locks:
-            self._interaction_locks[interaction_id] = asyncio.Lock()
-
         try:
-            await asyncio.wait_for(
-                self._interaction_locks[interaction_id].acquire(),
-                timeout=3.0
-            )
-            return True
-        except:
+            return await self._interaction_locks.acquire(interaction_id, timeout=3.0)
+        except Exception:
             return False
     
     def release_lock(self, interaction_id: str):
         """Release interaction lock"""
-        if interaction_id in self._interaction_locks:
-            try:
-                if self._interaction_locks[interaction_id].locked():
-                    self._interaction_locks[interaction_id].release()
-            except:
-                pass
+        self._interaction_locks.release(interaction_id)
 
 class BaseButtonHandler:
     """Base class untuk button handlers"""
@@ -16,6 +16,9 @@ import discord
 from discord.ext import commands, tasks
 import logging
 import asyncio
+import hashlib
+import json
+import time
 from datetime import datetime
 from typing import Optional, Dict
 from discord import ui
@@ -38,6 +41,9 @@ from src.services.balance_service import BalanceManagerService as BalanceService
 from src.services.transaction_service import TransactionManager as TransactionService
 from src.services.admin_service import AdminService
 
+# Nama field waktu server, dikecualikan dari fingerprint embed
+SERVER_TIME_FIELD = "⏰ Server Time"
+
 class LiveStockManager(BaseLockHandler):
     def __init__(self, bot):
         if not hasattr(self, 'initialized') or not self.initialized:
@@ -66,6 +72,17 @@ class LiveStockManager(BaseLockHandler):
                 'last_update': None
             }
             
+            # Diff-aware update: fingerprint bagian product/stock dari embed terakhir yang dikirim
+            self._last_fingerprint = None
+            self._last_sent_at = 0.0
+            self._display_lock = asyncio.Lock()
+            self._pending_update = None
+            self.update_stats = {
+                'edits_sent': 0,
+                'edits_skipped': 0,
+                'update_requests': 0
+            }
+            
             self.initialized = True
             self.logger.info("LiveStockManager initialized")
 
@@ -121,6 +138,45 @@ class LiveStockManager(BaseLockHandler):
         """Get current livestock status"""
         return self.livestock_status.copy()
 
+    def get_update_stats(self) -> Dict:
+        """Counter edit pesan live stock: terkirim, dilewati dan permintaan update"""
+        return self.update_stats.copy()
+
+    @staticmethod
+    def _embed_fingerprint(embed: discord.Embed, with_view: bool) -> str:
+        """Hash isi embed tanpa field waktu server dan timestamp yang berubah tiap tick"""
+        data = embed.to_dict()
+        data.pop('timestamp', None)
+        data['fields'] = [
+            field for field in data.get('fields', [])
+            if field.get('name') != SERVER_TIME_FIELD
+        ]
+        data['with_view'] = with_view
+        payload = json.dumps(data, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _mark_sent(self, fingerprint: str):
+        self._last_fingerprint = fingerprint
+        self._last_sent_at = time.monotonic()
+        self.update_stats['edits_sent'] += 1
+
+    def request_update(self):
+        """
+        Minta update display karena stock berubah. Permintaan beruntun
+        digabung (debounce) menjadi satu update.
+        """
+        self.update_stats['update_requests'] += 1
+        if self._pending_update and not self._pending_update.done():
+            return
+        self._pending_update = asyncio.create_task(self._debounced_update())
+
+    async def _debounced_update(self):
+        try:
+            await asyncio.sleep(UPDATE_INTERVAL.LIVE_STOCK_DEBOUNCE)
+            await self.update_stock_display()
+        except Exception as e:
+            self.logger.error(f"Error debounced stock update: {e}")
+
     def is_healthy(self) -> bool:
         """Check if livestock is healthy"""
         return self.livestock_status['is_healthy']
@@ -197,11 +253,17 @@ class LiveStockManager(BaseLockHandler):
             # Server time dengan format modern
             current_time = datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
             embed.add_field(
-                name="⏰ Server Time",
+                name=SERVER_TIME_FIELD,
                 value=f"```ansi\n\u001b[0;36m{current_time} UTC\u001b[0m```",
                 inline=False
             )
 
+            # Jumlah stock semua product dalam satu query
+            stock_response = await self.product_service.get_stock_summary()
+            if not stock_response.success:
+                raise ValueError(stock_response.error)
+            stock_counts = stock_response.data
+
             try:
                 # Grouping products by category
                 categories = {}
@@ -218,20 +280,7 @@ class LiveStockManager(BaseLockHandler):
 
                     for product in category_products:
                         try:
-                            # Get stock count dengan caching
-                            stock_cache_key = f'stock_count_{product["code"]}'
-                            stock_count = await self.cache_manager.get(stock_cache_key)
-
-                            if stock_count is None:
-                                stock_response = await self.product_service.get_product_stock_count(product['code'])
-                                if not stock_response.success:
-                                    continue
-                                stock_count = stock_response.data['count']
-                                await self.cache_manager.set(
-                                    stock_cache_key,
-                                    stock_count,
-                                    expires_in=CACHE_TIMEOUT.get_seconds(CACHE_TIMEOUT.SHORT)
-                                )
+                            stock_count = stock_counts.get(product['code'], 0)
 
                             # Status indicators dengan warna
                             if stock_count > Stock.ALERT_THRESHOLD:
@@ -317,6 +366,9 @@ class LiveStockManager(BaseLockHandler):
                 # Clear semua cache stock menggunakan pattern
                 await self.cache_manager.delete_pattern('stock_count_')
                 self.logger.info(f"✅ All stock cache cleared")
+            
+            # Stock berubah: update display tanpa menunggu tick berikutnya
+            self.request_update()
         except Exception as e:
             self.logger.error(f"Error clearing stock cache: {e}")
 
@@ -330,13 +382,21 @@ class LiveStockManager(BaseLockHandler):
             await self.cache_manager.delete('all_products_display')
             
             # Update display
-            await self.update_stock_display()
+            await self.update_stock_display(force=True)
             self.logger.info("✅ Stock display force refreshed")
         except Exception as e:
             self.logger.error(f"Error force refreshing stock: {e}")
 
-    async def update_stock_display(self) -> bool:
-        """Update stock display dengan proper error handling dan button integration"""
+    async def update_stock_display(self, force: bool = False) -> bool:
+        """
+        Update stock display dengan proper error handling dan button integration.
+        Edit dilewati jika isi product/stock tidak berubah, kecuali force atau
+        pesan sudah lebih lama dari LIVE_STOCK_MAX_STALENESS.
+        """
+        async with self._display_lock:
+            return await self._update_stock_display(force)
+
+    async def _update_stock_display(self, force: bool) -> bool:
         try:
             # Tunggu sampai ready
             await self._ready.wait()
@@ -361,6 +421,18 @@ class LiveStockManager(BaseLockHandler):
             if not self.current_stock_message:
                 self.current_stock_message = await self.find_last_message()
 
+            # Lewati edit jika isi product/stock sama dengan yang terakhir dikirim
+            fingerprint = self._embed_fingerprint(embed, with_view=bool(self.button_manager))
+            if (
+                not force
+                and self.current_stock_message
+                and fingerprint == self._last_fingerprint
+                and time.monotonic() - self._last_sent_at < UPDATE_INTERVAL.LIVE_STOCK_MAX_STALENESS
+            ):
+                self.update_stats['edits_skipped'] += 1
+                self.logger.debug("Stock display tidak berubah, edit dilewati")
+                return True
+
             # Buat view/tombol untuk update dengan retry mechanism
             view = None
             max_retries = 3
@@ -400,12 +472,14 @@ class LiveStockManager(BaseLockHandler):
                     self.logger.info("📝 Membuat pesan live stock baru dengan tombol")
                     self.current_stock_message = await channel.send(embed=embed, view=view)
                     self.logger.info("✅ Pesan baru berhasil dibuat dengan tombol")
+                    self._mark_sent(fingerprint)
                     await self._update_status(True)
                 else:
                     # Jika tidak ada button manager, buat pesan tanpa tombol
                     self.logger.info("📝 Membuat pesan live stock baru tanpa tombol (button manager tidak tersedia)")
                     self.current_stock_message = await channel.send(embed=embed)
                     self.logger.info("✅ Pesan baru berhasil dibuat tanpa tombol")
+                    self._mark_sent(fingerprint)
                     await self._update_status(True)
                 return True
 
@@ -414,12 +488,14 @@ class LiveStockManager(BaseLockHandler):
                 if view:
                     await self.current_stock_message.edit(embed=embed, view=view)
                     self.logger.debug("✅ Pesan diupdate dengan embed dan tombol")
+                    self._mark_sent(fingerprint)
                     await self._update_status(True)
                 else:
                     # Hanya update jika memang tidak ada button manager
                     if not self.button_manager:
                         await self.current_stock_message.edit(embed=embed)
                         self.logger.debug("✅ Pesan diupdate dengan embed saja (button manager tidak tersedia)")
+                        self._mark_sent(fingerprint)
                         await self._update_status(True)
                     else:
                         # Jika ada button manager tapi view None, ini error
@@ -437,12 +513,14 @@ class LiveStockManager(BaseLockHandler):
                     self.logger.info("📝 Membuat pesan baru karena pesan lama tidak ditemukan (dengan tombol)")
                     self.current_stock_message = await channel.send(embed=embed, view=view)
                     self.logger.info("✅ Pesan pengganti berhasil dibuat dengan tombol")
+                    self._mark_sent(fingerprint)
                     await self._update_status(True)
                 else:
                     if not self.button_manager:
                         self.logger.info("📝 Membuat pesan baru karena pesan lama tidak ditemukan (tanpa tombol)")
                         self.current_stock_message = await channel.send(embed=embed)
                         self.logger.info("✅ Pesan pengganti berhasil dibuat tanpa tombol")
+                        self._mark_sent(fingerprint)
                         await self._update_status(True)
                     else:
                         error_msg = "Pesan lama tidak ditemukan dan gagal membuat tombol untuk pesan baru"
@@ -467,6 +545,11 @@ class LiveStockManager(BaseLockHandler):
                     color=COLORS.WARNING
                 )
                 await self.current_stock_message.edit(embed=embed)
+            
+            # Pesan sudah diganti maintenance, update berikutnya harus edit ulang
+            self._last_fingerprint = None
+            if self._pending_update and not self._pending_update.done():
+                self._pending_update.cancel()
 
             # Clear caches dengan pattern yang spesifik
             cache_keys = [
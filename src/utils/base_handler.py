@@ -1,34 +1,40 @@
 import asyncio
-from asyncio import Lock
 import logging
-from typing import Optional, Dict
+from typing import Optional, Dict, Any
 from discord.ext import commands
 import discord
 
+from src.utils.lock_manager import KeyedLockTable
+
 class BaseLockHandler:
     """Handler untuk sistem locking"""
     
     def __init__(self):
-        self._locks: Dict[str, Lock] = {}
-        self._response_locks: Dict[str, Lock] = {}
+        # Entry lock dihapus otomatis setelah release, memori tidak tumbuh terus
+        self._locks = KeyedLockTable(f"{self.__class__.__name__}.locks")
+        self._response_locks = KeyedLockTable(f"{self.__class__.__name__}.response")
         self.logger = logging.getLogger(self.__class__.__name__)
         
-    async def acquire_lock(self, key: str, timeout: float = 10.0) -> Optional[Lock]:
-        if key not in self._locks:
-            self._locks[key] = Lock()
-            
+    async def acquire_lock(self, key: str, timeout: float = 10.0) -> bool:
+        # Kurangi timeout untuk mencegah deadlock
+        actual_timeout = min(timeout, 5.0)
         try:
-            # Kurangi timeout untuk mencegah deadlock
-            actual_timeout = min(timeout, 5.0)
-            await asyncio.wait_for(self._locks[key].acquire(), timeout=actual_timeout)
-            self.logger.debug(f"Lock acquired for {key}")
-            return self._locks[key]
-        except asyncio.TimeoutError:
+            if await self._locks.acquire(key, timeout=actual_timeout):
+                self.logger.debug(f"Lock acquired for {key}")
+                return True
             self.logger.warning(f"Lock acquisition timeout for {key} after {actual_timeout}s")
-            return None
+            return False
         except Exception as e:
             self.logger.error(f"Error acquiring lock for {key}: {e}")
-            return None
+            return False
+
+    def _response_key(self, ctx_or_interaction) -> str:
+        """Gunakan message.id untuk Context dan interaction.id untuk Interaction"""
+        if isinstance(ctx_or_interaction, commands.Context):
+            return str(ctx_or_interaction.message.id)
+        if isinstance(ctx_or_interaction, discord.Interaction):
+            return str(ctx_or_interaction.id)
+        return str(id(ctx_or_interaction))  # Fallback menggunakan object id
 
     async def acquire_response_lock(self, ctx_or_interaction, timeout: float = 5.0) -> bool:
         """
@@ -42,50 +48,36 @@ class BaseLockHandler:
             True jika berhasil acquire lock, False jika gagal
         """
         try:
-            # Gunakan message.id untuk Context dan interaction.id untuk Interaction
-            if isinstance(ctx_or_interaction, commands.Context):
-                key = str(ctx_or_interaction.message.id)
-            elif isinstance(ctx_or_interaction, discord.Interaction):
-                key = str(ctx_or_interaction.id)
-            else:
-                key = str(id(ctx_or_interaction))  # Fallback menggunakan object id
-                
-            if key not in self._response_locks:
-                self._response_locks[key] = Lock()
-                
-            await asyncio.wait_for(self._response_locks[key].acquire(), timeout=timeout)
-            return True
+            key = self._response_key(ctx_or_interaction)
+            if await self._response_locks.acquire(key, timeout=timeout):
+                return True
+            self.logger.warning(f"Response lock timeout for {key} after {timeout}s")
+            return False
         except Exception as e:
             self.logger.error(f"Error acquiring response lock: {e}")
             return False
 
     def release_lock(self, key: str):
         """Release lock untuk key tertentu"""
-        if key in self._locks and self._locks[key].locked():
-            try:
-                self._locks[key].release()
-            except RuntimeError:
-                self.logger.warning(f"Attempted to release an unlocked lock for {key}")
+        if key in self._locks and not self._locks.release(key):
+            self.logger.warning(f"Attempted to release an unlocked lock for {key}")
 
     def release_response_lock(self, ctx_or_interaction):
         """Release response lock untuk context/interaction"""
         try:
-            # Gunakan message.id untuk Context dan interaction.id untuk Interaction
-            if isinstance(ctx_or_interaction, commands.Context):
-                key = str(ctx_or_interaction.message.id)
-            elif isinstance(ctx_or_interaction, discord.Interaction):
-                key = str(ctx_or_interaction.id)
-            else:
-                key = str(id(ctx_or_interaction))  # Fallback menggunakan object id
-                
-            if key in self._response_locks and self._response_locks[key].locked():
-                try:
-                    self._response_locks[key].release()
-                except RuntimeError:
-                    self.logger.warning(f"Attempted to release an unlocked response lock for {key}")
+            key = self._response_key(ctx_or_interaction)
+            if key in self._response_locks and not self._response_locks.release(key):
+                self.logger.warning(f"Attempted to release an unlocked response lock for {key}")
         except Exception as e:
             self.logger.error(f"Error releasing response lock: {e}")
 
+    def get_lock_stats(self) -> Dict[str, Any]:
+        """Statistik contention, waktu tunggu dan timeout per prefix key"""
+        return {
+            'locks': self._locks.stats(),
+            'response_locks': self._response_locks.stats()
+        }
+
     def cleanup(self):
         """Bersihkan semua resources"""
         self._locks.clear()
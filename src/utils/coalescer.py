@@ -0,0 +1,97 @@
+"""
+Keyed Coalescer
+Gabungkan item dengan key sama yang masuk dalam jendela waktu pendek menjadi
+satu flush (mis. beberapa donasi untuk GrowID yang sama jadi satu transaksi
+balance). Item punya id unik; id yang sudah pernah diterima diabaikan
+sehingga event yang terkirim ulang tidak diproses dua kali
+"""
+
+import asyncio
+import logging
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+# flush(key, [(item_id, item), ...])
+FlushCallback = Callable[[Hashable, List[Tuple[Hashable, Any]]], Awaitable[None]]
+
+class KeyedCoalescer:
+    """Buffer per key yang di-flush setelah `window` detik atau saat mencapai `max_items`"""
+
+    def __init__(self, flush: FlushCallback, window: float = 1.0, max_items: int = 50, dedupe_size: int = 10_000):
+        self._flush_callback = flush
+        self.window = window
+        self.max_items = max_items
+        self.dedupe_size = dedupe_size
+
+        self._pending: Dict[Hashable, List[Tuple[Hashable, Any]]] = {}
+        self._timers: Dict[Hashable, asyncio.TimerHandle] = {}
+        self._tasks: set = set()
+        # id item yang sudah diterima (LRU terbatas)
+        self._seen: "OrderedDict[Hashable, None]" = OrderedDict()
+
+        # Metrics
+        self.accepted = 0
+        self.duplicates = 0
+        self.flushes = 0
+
+    def __len__(self) -> int:
+        return sum(len(items) for items in self._pending.values())
+
+    def seen(self, item_id: Hashable) -> bool:
+        return item_id in self._seen
+
+    def add(self, key: Hashable, item_id: Hashable, item: Any) -> bool:
+        """Tambahkan item; False jika item_id sudah pernah diterima"""
+        if item_id in self._seen:
+            self.duplicates += 1
+            return False
+        self._seen[item_id] = None
+        while len(self._seen) > self.dedupe_size:
+            self._seen.popitem(last=False)
+
+        self.accepted += 1
+        items = self._pending.setdefault(key, [])
+        items.append((item_id, item))
+
+        if len(items) >= self.max_items:
+            self._start_flush(key)
+        elif key not in self._timers:
+            loop = asyncio.get_running_loop()
+            self._timers[key] = loop.call_later(self.window, self._start_flush, key)
+        return True
+
+    def _start_flush(self, key: Hashable):
+        timer = self._timers.pop(key, None)
+        if timer:
+            timer.cancel()
+        items = self._pending.pop(key, None)
+        if not items:
+            return
+        task = asyncio.get_running_loop().create_task(self._run_flush(key, items))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_flush(self, key: Hashable, items: List[Tuple[Hashable, Any]]):
+        self.flushes += 1
+        try:
+            await self._flush_callback(key, items)
+        except Exception as e:
+            logger.error(f"Flush coalescer untuk {key} gagal: {e}")
+
+    async def close(self):
+        """Flush semua key yang masih tertunda dan tunggu selesai"""
+        for key in list(self._pending):
+            self._start_flush(key)
+        if self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'pending_keys': len(self._pending),
+            'pending_items': len(self),
+            'accepted': self.accepted,
+            'duplicates': self.duplicates,
+            'flushes': self.flushes
+        }
@@ -0,0 +1,33 @@
+"""
+Donation Parser
+Parser pesan donasi (webhook deposit) dengan regex yang dikompilasi sekali:
+satu pass untuk GrowID + jumlah deposit, satu pass untuk nominal lock
+"""
+
+import re
+from typing import Optional, Tuple
+
+# "GrowID: Fdy\nDeposit: 1 Diamond Lock" atau "GrowID: Fdy\nJumlah: ..."
+DONATION_RE = re.compile(r"GrowID:\s*(\w+).*?(?:Deposit|Jumlah):\s*(.+)", re.DOTALL | re.IGNORECASE)
+AMOUNT_RE = re.compile(r"(\d+) (World|Diamond|Blue Gem) Lock")
+
+# Posisi nominal dalam tuple (wl, dl, bgl)
+_LOCK_INDEX = {'World': 0, 'Diamond': 1, 'Blue Gem': 2}
+
+def parse_donation(content: str) -> Optional[Tuple[str, str]]:
+    """(growid, teks deposit) atau None jika bukan pesan donasi"""
+    match = DONATION_RE.search(content)
+    if not match:
+        return None
+    return match.group(1).strip(), match.group(2).strip()
+
+def parse_deposit(deposit: str) -> Tuple[int, int, int]:
+    """Parse teks deposit menjadi (wl, dl, bgl); nominal pertama per jenis lock yang dipakai"""
+    amounts = [0, 0, 0]
+    found = [False, False, False]
+    for match in AMOUNT_RE.finditer(deposit):
+        index = _LOCK_INDEX[match.group(2)]
+        if not found[index]:
+            amounts[index] = int(match.group(1))
+            found[index] = True
+    return amounts[0], amounts[1], amounts[2]
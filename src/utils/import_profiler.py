@@ -0,0 +1,146 @@
+"""
+Import Profiler
+Pengukur waktu import per modul ala `python -X importtime`, bisa dipasang
+hanya selama startup: finder di depan sys.meta_path membungkus loader
+setiap modul baru dan mencatat waktu exec-nya (self dan kumulatif)
+"""
+
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, Set, Tuple
+
+class _TimingLoader:
+    """Loader pembungkus yang mengukur exec_module"""
+
+    def __init__(self, loader, profiler: "ImportProfiler", name: str):
+        self._loader = loader
+        self._profiler = profiler
+        self._name = name
+
+    def __getattr__(self, attr):
+        return getattr(self._loader, attr)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        # Kembalikan loader asli agar modul tidak menyimpan pembungkus ini
+        module.__loader__ = self._loader
+        if getattr(module, '__spec__', None) is not None:
+            module.__spec__.loader = self._loader
+        self._profiler._enter()
+        start = time.perf_counter()
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler._exit(self._name, time.perf_counter() - start)
+
+class ImportProfiler:
+    """
+    Context manager: catat waktu import modul yang dimuat selama aktif.
+    Finder terpasang global selama aktif, jadi import dari thread lain
+    (mis. asyncio.to_thread) ikut tercatat; stack waktu anak disimpan per
+    thread agar import paralel tidak saling mengacaukan atribusi
+    """
+
+    def __init__(self):
+        # name -> (self_seconds, cumulative_seconds)
+        self.records: Dict[str, Tuple[float, float]] = {}
+        self._records_lock = threading.Lock()
+        self._local = threading.local()
+        self.installed = False
+
+    def _state(self) -> threading.local:
+        local = self._local
+        if not hasattr(local, 'child_time'):
+            local.child_time = []
+            local.resolving = set()
+        return local
+
+    # ---- meta path finder ----
+
+    def find_spec(self, fullname, path=None, target=None):
+        resolving = self._state().resolving
+        if fullname in resolving:
+            return None
+        resolving.add(fullname)
+        try:
+            spec = None
+            for finder in sys.meta_path:
+                if finder is self:
+                    continue
+                find = getattr(finder, 'find_spec', None)
+                if find is None:
+                    continue
+                spec = find(fullname, path, target)
+                if spec is not None:
+                    break
+        finally:
+            resolving.discard(fullname)
+
+        if spec is None or spec.loader is None or not hasattr(spec.loader, 'exec_module'):
+            return spec
+        spec.loader = _TimingLoader(spec.loader, self, fullname)
+        return spec
+
+    def _enter(self):
+        self._state().child_time.append(0.0)
+
+    def _exit(self, name: str, elapsed: float):
+        child_time = self._state().child_time
+        children = child_time.pop()
+        with self._records_lock:
+            self.records[name] = (max(elapsed - children, 0.0), elapsed)
+        if child_time:
+            child_time[-1] += elapsed
+
+    # ---- install / uninstall ----
+
+    def install(self):
+        if not self.installed:
+            sys.meta_path.insert(0, self)
+            self.installed = True
+
+    def uninstall(self):
+        if self.installed:
+            try:
+                sys.meta_path.remove(self)
+            except ValueError:
+                pass
+            self.installed = False
+
+    def __enter__(self) -> "ImportProfiler":
+        self.install()
+        return self
+
+    def __exit__(self, *exc):
+        self.uninstall()
+        return False
+
+    # ---- report ----
+
+    def total(self) -> float:
+        """Total waktu import (detik) dari modul top-level yang tercatat"""
+        with self._records_lock:
+            records = list(self.records.values())
+        return sum(self_time for self_time, _ in records)
+
+    def slowest(self, limit: Optional[int] = 20, prefix: str = "") -> List[Tuple[str, float, float]]:
+        """(modul, self_ms, cumulative_ms) diurutkan dari kumulatif terbesar"""
+        with self._records_lock:
+            records = list(self.records.items())
+        rows = [
+            (name, round(self_time * 1000, 2), round(cumulative * 1000, 2))
+            for name, (self_time, cumulative) in records
+            if name.startswith(prefix)
+        ]
+        rows.sort(key=lambda row: row[2], reverse=True)
+        return rows[:limit] if limit else rows
+
+    def format_report(self, limit: Optional[int] = 20, prefix: str = "") -> str:
+        """Laporan teks dengan kolom seperti -X importtime"""
+        lines = [f"{'self [ms]':>10} | {'cumulative [ms]':>15} | module"]
+        for name, self_ms, cumulative_ms in self.slowest(limit, prefix):
+            lines.append(f"{self_ms:>10.2f} | {cumulative_ms:>15.2f} | {name}")
+        return "\n".join(lines)
@@ -0,0 +1,59 @@
+"""
+Leveling Curve
+Kurva XP bersama untuk semua jalur leveling: XP total untuk level L
+adalah a*L^2 + b*L + c, dan level dari XP dicari lewat tabel threshold
+(bisect) atau invers kuadratik untuk XP di luar tabel
+"""
+
+from bisect import bisect_right
+from math import isqrt
+from typing import List
+
+class LevelCurve:
+    """Kurva XP kuadratik dengan koefisien integer"""
+
+    def __init__(self, a: int, b: int, c: int, table_levels: int = 1000):
+        if a < 0 or b < 0 or (a == 0 and b == 0):
+            raise ValueError("Kurva level harus naik (a >= 0, b >= 0, a + b > 0)")
+        self.a = a
+        self.b = b
+        self.c = c
+        # _thresholds[i] = XP minimum untuk level i + 1
+        self._thresholds: List[int] = [self.xp_for_level(level) for level in range(1, table_levels + 1)]
+
+    def xp_for_level(self, level: int) -> int:
+        """XP total yang dibutuhkan untuk mencapai level"""
+        return self.a * level * level + self.b * level + self.c
+
+    def level_for_xp(self, xp: int) -> int:
+        """Level tertinggi yang threshold-nya <= xp (minimal 0)"""
+        if xp < self._thresholds[-1]:
+            return bisect_right(self._thresholds, xp)
+        return self._solve(xp)
+
+    def _solve(self, xp: int) -> int:
+        """Invers kuadratik dengan aritmetika integer (tanpa error pembulatan float)"""
+        a, b, c = self.a, self.b, self.c
+        if a == 0:
+            level = (xp - c) // b
+        else:
+            discriminant = b * b - 4 * a * (c - xp)
+            if discriminant < 0:
+                return 0
+            level = (isqrt(discriminant) - b) // (2 * a)
+        # Koreksi off-by-one dari pembulatan isqrt/floor
+        while self.xp_for_level(level + 1) <= xp:
+            level += 1
+        while level > 0 and self.xp_for_level(level) > xp:
+            level -= 1
+        return max(level, 0)
+
+    def xp_for_next_level(self, xp: int) -> int:
+        """XP total untuk level berikutnya dari posisi xp"""
+        return self.xp_for_level(self.level_for_xp(xp) + 1)
+
+# Kurva tabel user_levels (cog Leveling dan LevelingRepository): 5L^2 + 50L + 100
+DEFAULT_CURVE = LevelCurve(5, 50, 100)
+
+# Kurva tabel levels (LevelService): 100 XP per level
+LINEAR_CURVE = LevelCurve(0, 100, 0)
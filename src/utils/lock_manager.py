@@ -0,0 +1,163 @@
+"""
+Keyed Lock Table
+Tabel asyncio.Lock per key dengan reference counting: entry dihapus begitu
+tidak ada lagi yang memegang atau menunggu lock, sehingga memori tetap
+sebanding dengan jumlah key yang sedang aktif
+"""
+
+import asyncio
+import time
+import weakref
+from typing import Any, Dict, Optional
+
+class _LockEntry:
+    """Lock beserta jumlah pemegang/penunggu"""
+    __slots__ = ('lock', 'refs')
+
+    def __init__(self):
+        self.lock = asyncio.Lock()
+        self.refs = 0
+
+class _PrefixStats:
+    """Statistik lock untuk satu prefix key"""
+    __slots__ = ('acquired', 'contended', 'timeouts', 'total_wait', 'max_wait')
+
+    def __init__(self):
+        self.acquired = 0
+        self.contended = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        attempts = self.acquired + self.timeouts
+        return {
+            'acquired': self.acquired,
+            'contended': self.contended,
+            'timeouts': self.timeouts,
+            'avg_wait_ms': round(self.total_wait / attempts * 1000, 3) if attempts else 0.0,
+            'max_wait_ms': round(self.max_wait * 1000, 3)
+        }
+
+# Semua tabel yang hidup, untuk agregasi statistik
+_tables: "weakref.WeakSet[KeyedLockTable]" = weakref.WeakSet()
+
+# Batas jumlah prefix yang dilacak per tabel, sisanya masuk 'other'
+MAX_TRACKED_PREFIXES = 64
+
+def key_prefix(key: str) -> str:
+    """Prefix key untuk statistik, mis. 'purchase_123_ABC' -> 'purchase'"""
+    head = key.split('_', 1)[0]
+    # Key berupa snowflake (interaction/message id) dikelompokkan jadi satu
+    return 'id' if head.isdigit() else head
+
+class KeyedLockTable:
+    """Lock per key yang otomatis dihapus saat tidak dipakai"""
+
+    def __init__(self, name: str = "locks"):
+        self.name = name
+        self._entries: Dict[str, _LockEntry] = {}
+        self._stats: Dict[str, _PrefixStats] = {}
+        _tables.add(self)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def locked(self, key: str) -> bool:
+        entry = self._entries.get(key)
+        return entry is not None and entry.lock.locked()
+
+    def _stats_for(self, prefix: str) -> _PrefixStats:
+        stats = self._stats.get(prefix)
+        if stats is None:
+            if len(self._stats) >= MAX_TRACKED_PREFIXES:
+                prefix = 'other'
+                stats = self._stats.get(prefix)
+            if stats is None:
+                stats = self._stats[prefix] = _PrefixStats()
+        return stats
+
+    def _unref(self, key: str, entry: _LockEntry):
+        entry.refs -= 1
+        if entry.refs <= 0 and self._entries.get(key) is entry:
+            del self._entries[key]
+
+    async def acquire(self, key: str, timeout: Optional[float] = None) -> bool:
+        """Acquire lock untuk key, False jika timeout"""
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = _LockEntry()
+        entry.refs += 1
+
+        stats = self._stats_for(key_prefix(key))
+
+        start = time.perf_counter()
+        try:
+            if entry.refs == 1 and not entry.lock.locked():
+                # Tidak ada pemegang maupun penunggu lain, acquire langsung berhasil
+                await entry.lock.acquire()
+            else:
+                stats.contended += 1
+                await asyncio.wait_for(entry.lock.acquire(), timeout=timeout)
+        except BaseException as e:
+            if isinstance(e, asyncio.TimeoutError):
+                stats.timeouts += 1
+            self._unref(key, entry)
+            waited = time.perf_counter() - start
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+            if isinstance(e, asyncio.TimeoutError):
+                return False
+            raise
+
+        waited = time.perf_counter() - start
+        stats.acquired += 1
+        stats.total_wait += waited
+        stats.max_wait = max(stats.max_wait, waited)
+        return True
+
+    def release(self, key: str) -> bool:
+        """Release lock untuk key, False jika key tidak sedang dikunci"""
+        entry = self._entries.get(key)
+        if entry is None or not entry.lock.locked():
+            return False
+        entry.lock.release()
+        self._unref(key, entry)
+        return True
+
+    def clear(self):
+        """Lupakan semua entry (lock yang sedang dipegang tetap valid bagi pemegangnya)"""
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Statistik per prefix key dan jumlah key aktif"""
+        return {
+            'active_keys': len(self._entries),
+            'prefixes': {prefix: s.to_dict() for prefix, s in self._stats.items()}
+        }
+
+def lock_stats() -> Dict[str, Dict[str, Any]]:
+    """Statistik gabungan semua KeyedLockTable yang hidup, per nama tabel"""
+    combined: Dict[str, Dict[str, Any]] = {}
+    for table in list(_tables):
+        stats = table.stats()
+        bucket = combined.setdefault(table.name, {'active_keys': 0, 'prefixes': {}})
+        bucket['active_keys'] += stats['active_keys']
+        for prefix, data in stats['prefixes'].items():
+            current = bucket['prefixes'].get(prefix)
+            if current is None:
+                bucket['prefixes'][prefix] = dict(data)
+                continue
+            attempts = current['acquired'] + current['timeouts']
+            new_attempts = data['acquired'] + data['timeouts']
+            total = attempts + new_attempts
+            current['avg_wait_ms'] = round(
+                (current['avg_wait_ms'] * attempts + data['avg_wait_ms'] * new_attempts) / total, 3
+            ) if total else 0.0
+            current['max_wait_ms'] = max(current['max_wait_ms'], data['max_wait_ms'])
+            for field in ('acquired', 'contended', 'timeouts'):
+                current[field] += data[field]
+    return combined
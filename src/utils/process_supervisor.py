@@ -0,0 +1,375 @@
+"""
+Process Supervisor
+Supervisor asyncio untuk child process (mis. bot tenant): dijalankan dengan
+asyncio.create_subprocess_exec, stdout/stderr dialirkan ke file log yang
+dirotasi (pipe tidak pernah penuh), heartbeat berkala untuk process yang
+hidup, restart otomatis dengan exponential backoff saat crash, dan
+registry port in-memory sebagai pengganti probing port satu per satu
+"""
+
+import asyncio
+import logging
+import time
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Sequence, Union
+
+logger = logging.getLogger(__name__)
+
+# Output child dibaca per chunk (bukan readline) sehingga baris yang sangat
+# panjang tidak pernah membuat pembaca berhenti; baris lebih dari MAX_LINE
+# byte ditulis terpotong-potong
+READ_CHUNK = 64 * 1024
+MAX_LINE = 64 * 1024
+
+class PortRegistry:
+    """Alokasi port dari rentang tetap tanpa syscall, satu port per owner"""
+
+    def __init__(self, base_port: int = 8000, size: int = 1000):
+        self.base_port = base_port
+        self.size = size
+        self._by_owner: Dict[Hashable, int] = {}
+        self._owners: Dict[int, Hashable] = {}
+        self._cursor = 0
+
+    def __len__(self) -> int:
+        return len(self._by_owner)
+
+    def reserve(self, owner: Hashable, port: int) -> bool:
+        """Catat port yang sudah dipakai owner (mis. dari database); False jika bentrok"""
+        current = self._owners.get(port)
+        if current is not None and current != owner:
+            return False
+        self.release(owner)
+        self._by_owner[owner] = port
+        self._owners[port] = owner
+        return True
+
+    def allocate(self, owner: Hashable) -> int:
+        """Port milik owner, atau port bebas berikutnya"""
+        if owner in self._by_owner:
+            return self._by_owner[owner]
+        for offset in range(self.size):
+            port = self.base_port + (self._cursor + offset) % self.size
+            if port not in self._owners:
+                self._cursor = (port - self.base_port + 1) % self.size
+                self._by_owner[owner] = port
+                self._owners[port] = owner
+                return port
+        raise RuntimeError("Tidak ada port yang tersedia")
+
+    def release(self, owner: Hashable) -> Optional[int]:
+        port = self._by_owner.pop(owner, None)
+        if port is not None:
+            self._owners.pop(port, None)
+        return port
+
+    def port_of(self, owner: Hashable) -> Optional[int]:
+        return self._by_owner.get(owner)
+
+class SupervisedProcess:
+    """State satu child process yang diawasi"""
+
+    def __init__(self, key: Hashable, cmd: Sequence[str], cwd: Optional[str], env: Optional[Dict[str, str]]):
+        self.key = key
+        self.cmd = list(cmd)
+        self.cwd = cwd
+        self.env = env
+        self.process: Optional[asyncio.subprocess.Process] = None
+        self.task: Optional[asyncio.Task] = None
+        self.status = "starting"
+        self.restarts = 0
+        self.started_at = 0.0
+        self.last_output = 0.0
+        self.last_returncode: Optional[int] = None
+        self.stopping = False
+        self.log: Optional[logging.Logger] = None
+
+    @property
+    def pid(self) -> Optional[int]:
+        return self.process.pid if self.process else None
+
+    @property
+    def running(self) -> bool:
+        return self.process is not None and self.process.returncode is None
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            'pid': self.pid,
+            'status': self.status,
+            'restarts': self.restarts,
+            'uptime': round(time.monotonic() - self.started_at, 1) if self.running else 0.0,
+            'last_returncode': self.last_returncode
+        }
+
+# Callback: on_start(key, pid), on_exit(key, returncode, will_restart), on_heartbeat([keys])
+StartCallback = Callable[[Hashable, int], Awaitable[None]]
+ExitCallback = Callable[[Hashable, int, bool], Awaitable[None]]
+HeartbeatCallback = Callable[[List[Hashable]], Awaitable[None]]
+
+class ProcessSupervisor:
+    """Jalankan, awasi dan restart child process"""
+
+    def __init__(
+        self,
+        log_dir: Union[str, Path] = "logs/tenants",
+        max_log_bytes: int = 5 * 1024 * 1024,
+        log_backups: int = 3,
+        heartbeat_interval: float = 30.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_restarts: int = 5,
+        stable_after: float = 60.0,
+        stop_timeout: float = 10.0
+    ):
+        self.log_dir = Path(log_dir)
+        self.max_log_bytes = max_log_bytes
+        self.log_backups = log_backups
+        self.heartbeat_interval = heartbeat_interval
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        # Restart beruntun maksimum; hitungan di-reset jika process hidup >= stable_after detik
+        self.max_restarts = max_restarts
+        self.stable_after = stable_after
+        self.stop_timeout = stop_timeout
+
+        self.on_start: Optional[StartCallback] = None
+        self.on_exit: Optional[ExitCallback] = None
+        self.on_heartbeat: Optional[HeartbeatCallback] = None
+
+        self._processes: Dict[Hashable, SupervisedProcess] = {}
+        self._heartbeat_task: Optional[asyncio.Task] = None
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._processes
+
+    # ---- log ----
+
+    def _open_log(self, key: Hashable) -> logging.Logger:
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        child_logger = logging.getLogger(f"{__name__}.child.{key}")
+        child_logger.propagate = False
+        child_logger.setLevel(logging.INFO)
+        if not child_logger.handlers:
+            handler = RotatingFileHandler(
+                self.log_dir / f"{key}.log",
+                maxBytes=self.max_log_bytes,
+                backupCount=self.log_backups,
+                encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+            child_logger.addHandler(handler)
+        return child_logger
+
+    def _close_log(self, entry: SupervisedProcess):
+        if entry.log:
+            for handler in list(entry.log.handlers):
+                handler.close()
+                entry.log.removeHandler(handler)
+            entry.log = None
+
+    def _write_line(self, entry: SupervisedProcess, line: bytes):
+        try:
+            entry.log.info(line.decode('utf-8', errors='replace').rstrip())
+        except Exception as e:
+            logger.error(f"Gagal menulis log process {entry.key}: {e}")
+
+    async def _pump(self, entry: SupervisedProcess, stream: asyncio.StreamReader):
+        """Baca output child terus-menerus ke file log agar pipe tidak pernah penuh"""
+        pending = b""
+        while True:
+            try:
+                chunk = await stream.read(READ_CHUNK)
+            except (ValueError, asyncio.LimitOverrunError) as e:
+                # Tetap kuras pipe walaupun stream melaporkan error
+                logger.warning(f"Error membaca output process {entry.key}: {e}")
+                continue
+            if not chunk:
+                break
+            entry.last_output = time.monotonic()
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                self._write_line(entry, line)
+            while len(pending) > MAX_LINE:
+                self._write_line(entry, pending[:MAX_LINE])
+                pending = pending[MAX_LINE:]
+        if pending:
+            self._write_line(entry, pending)
+
+    # ---- lifecycle ----
+
+    async def _spawn(self, entry: SupervisedProcess) -> int:
+        entry.process = await asyncio.create_subprocess_exec(
+            *entry.cmd,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+            cwd=entry.cwd,
+            env=entry.env
+        )
+        entry.started_at = time.monotonic()
+        entry.status = "running"
+        entry.log.info(f"--- started pid {entry.process.pid}: {' '.join(entry.cmd[:2])}")
+        if self.on_start:
+            await self._call(self.on_start, entry.key, entry.process.pid)
+        return entry.process.pid
+
+    async def _call(self, callback, *args):
+        try:
+            await callback(*args)
+        except Exception as e:
+            logger.error(f"Callback supervisor gagal: {e}")
+
+    def backoff(self, restarts: int) -> float:
+        return min(self.backoff_base * (2 ** max(restarts - 1, 0)), self.backoff_max)
+
+    async def _watch(self, entry: SupervisedProcess):
+        """Tunggu child selesai, restart dengan backoff jika keluar tanpa diminta"""
+        while True:
+            results = await asyncio.gather(
+                self._pump(entry, entry.process.stdout), entry.process.wait(), return_exceptions=True
+            )
+            if isinstance(results[0], Exception):
+                logger.error(f"Pembaca output process {entry.key} berhenti: {results[0]}")
+            returncode = entry.process.returncode
+            entry.last_returncode = returncode
+            entry.log.info(f"--- exited with code {returncode}")
+
+            if entry.stopping:
+                entry.status = "stopped"
+                return
+
+            if time.monotonic() - entry.started_at >= self.stable_after:
+                entry.restarts = 0
+            will_restart = entry.restarts < self.max_restarts
+            entry.status = "restarting" if will_restart else "failed"
+            logger.warning(
+                f"Process {entry.key} keluar dengan code {returncode}"
+                + (f", restart ke-{entry.restarts + 1}" if will_restart else ", menyerah")
+            )
+            if self.on_exit:
+                await self._call(self.on_exit, entry.key, returncode, will_restart)
+            if not will_restart:
+                return
+
+            entry.restarts += 1
+            await asyncio.sleep(self.backoff(entry.restarts))
+            if entry.stopping:
+                entry.status = "stopped"
+                return
+            try:
+                await self._spawn(entry)
+            except Exception as e:
+                logger.error(f"Restart process {entry.key} gagal: {e}")
+                entry.status = "failed"
+                if self.on_exit:
+                    await self._call(self.on_exit, entry.key, -1, False)
+                return
+
+    async def start(self, key: Hashable, cmd: Sequence[str], cwd: Optional[str] = None,
+                    env: Optional[Dict[str, str]] = None) -> int:
+        """Jalankan child process untuk key, return pid"""
+        if self.is_supervised(key):
+            raise RuntimeError(f"Process {key} sudah berjalan")
+
+        entry = SupervisedProcess(key, cmd, cwd, env)
+        entry.log = self._open_log(key)
+        self._processes[key] = entry
+        try:
+            pid = await self._spawn(entry)
+        except Exception:
+            self._processes.pop(key, None)
+            self._close_log(entry)
+            raise
+        entry.task = asyncio.create_task(self._watch(entry), name=f"supervise-{key}")
+        self._ensure_heartbeat()
+        return pid
+
+    async def stop(self, key: Hashable, timeout: Optional[float] = None) -> bool:
+        """Hentikan child (terminate, lalu kill setelah timeout) tanpa memblokir event loop"""
+        entry = self._processes.pop(key, None)
+        if entry is None:
+            return False
+        entry.stopping = True
+        timeout = self.stop_timeout if timeout is None else timeout
+
+        if entry.running:
+            entry.process.terminate()
+            try:
+                await asyncio.wait_for(entry.process.wait(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Process {key} tidak berhenti dalam {timeout}s, kill")
+                entry.process.kill()
+                await entry.process.wait()
+
+        if entry.task:
+            if not entry.task.done():
+                # Task bisa sedang menunggu backoff sebelum restart
+                entry.task.cancel()
+            await asyncio.gather(entry.task, return_exceptions=True)
+        entry.status = "stopped"
+        self._close_log(entry)
+        return True
+
+    async def close(self):
+        """Hentikan semua child dan heartbeat"""
+        await asyncio.gather(*(self.stop(key) for key in list(self._processes)), return_exceptions=True)
+        if self._heartbeat_task and not self._heartbeat_task.done():
+            self._heartbeat_task.cancel()
+            await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+
+    # ---- heartbeat ----
+
+    def _ensure_heartbeat(self):
+        if self._heartbeat_task is None or self._heartbeat_task.done():
+            self._heartbeat_task = asyncio.create_task(self._heartbeat_loop(), name="supervisor-heartbeat")
+
+    async def _heartbeat_loop(self):
+        while self._processes:
+            await asyncio.sleep(self.heartbeat_interval)
+            alive = self.alive()
+            if alive and self.on_heartbeat:
+                await self._call(self.on_heartbeat, alive)
+
+    # ---- query ----
+
+    def alive(self) -> List[Hashable]:
+        return [key for key, entry in self._processes.items() if entry.running]
+
+    def is_supervised(self, key: Hashable) -> bool:
+        """True selama supervisor masih mengawasi key (termasuk saat menunggu backoff restart)"""
+        entry = self._processes.get(key)
+        return bool(entry and entry.task and not entry.task.done())
+
+    def is_running(self, key: Hashable) -> bool:
+        entry = self._processes.get(key)
+        return bool(entry and entry.running)
+
+    def pid(self, key: Hashable) -> Optional[int]:
+        entry = self._processes.get(key)
+        return entry.pid if entry else None
+
+    def info(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        entry = self._processes.get(key)
+        return entry.info() if entry else None
+
+    def stats(self) -> Dict[Hashable, Dict[str, Any]]:
+        return {key: entry.info() for key, entry in self._processes.items()}
+
+_supervisor: Optional[ProcessSupervisor] = None
+_ports: Optional[PortRegistry] = None
+
+def get_supervisor(**kwargs: Any) -> ProcessSupervisor:
+    """Supervisor global, dibuat saat pertama dipanggil (bertahan saat cog di-reload)"""
+    global _supervisor
+    if _supervisor is None:
+        _supervisor = ProcessSupervisor(**kwargs)
+    return _supervisor
+
+def get_port_registry(**kwargs: Any) -> PortRegistry:
+    """Registry port global untuk child process"""
+    global _ports
+    if _ports is None:
+        _ports = PortRegistry(**kwargs)
+    return _ports
@@ -0,0 +1,246 @@
+"""
+Rank Index
+Rank dan leaderboard per guild untuk tabel skor (user_levels.xp,
+user_reputation.reputation). Query memakai index komposit
+(guild_id, skor DESC, user_id) dengan keyset pagination, dan urutan skor
+per guild bisa disimpan di memory (sorted list + bisect) sehingga rank
+dan batas halaman didapat dalam O(log n) tanpa scan
+"""
+
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+# (skor, user_id) baris terakhir halaman sebelumnya
+Cursor = Tuple[int, str]
+
+class GuildRanking:
+    """Urutan skor satu guild: entry (-skor, user_id) yang selalu terurut"""
+    __slots__ = ('_scores', '_order', 'loaded_at')
+
+    def __init__(self, rows: Iterable[Tuple[str, int]] = ()):
+        self._scores: Dict[str, int] = {user_id: score for user_id, score in rows}
+        self._order: List[Tuple[int, str]] = sorted(
+            (-score, user_id) for user_id, score in self._scores.items()
+        )
+        self.loaded_at = time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._scores
+
+    def score(self, user_id: str) -> Optional[int]:
+        return self._scores.get(user_id)
+
+    def update(self, user_id: str, score: int):
+        """Set skor user, O(log n) cari + geser list"""
+        old = self._scores.get(user_id)
+        if old == score:
+            return
+        if old is not None:
+            self._discard(old, user_id)
+        self._scores[user_id] = score
+        insort(self._order, (-score, user_id))
+
+    def remove(self, user_id: str):
+        old = self._scores.pop(user_id, None)
+        if old is not None:
+            self._discard(old, user_id)
+
+    def _discard(self, score: int, user_id: str):
+        entry = (-score, user_id)
+        i = bisect_left(self._order, entry)
+        if i < len(self._order) and self._order[i] == entry:
+            del self._order[i]
+
+    def count_above(self, score: int) -> int:
+        """Jumlah user dengan skor > score"""
+        # (-score,) lebih kecil dari semua (-score, user_id), jadi posisinya
+        # tepat setelah entry terakhir yang skornya lebih tinggi
+        return bisect_left(self._order, (-score,))
+
+    def rank(self, user_id: str) -> Optional[int]:
+        """Rank 1-based; skor sama berbagi rank (sama dengan COUNT(skor > x) + 1)"""
+        score = self._scores.get(user_id)
+        if score is None:
+            return None
+        return self.count_above(score) + 1
+
+    def entry_at(self, position: int) -> Optional[Cursor]:
+        """(skor, user_id) pada posisi 0-based di urutan leaderboard"""
+        if 0 <= position < len(self._order):
+            neg_score, user_id = self._order[position]
+            return -neg_score, user_id
+        return None
+
+    def top(self, offset: int, limit: int) -> List[Cursor]:
+        return [(-neg_score, user_id) for neg_score, user_id in self._order[offset:offset + limit]]
+
+class RankIndex:
+    """Rank dan leaderboard untuk satu tabel skor per guild"""
+
+    def __init__(self, table: str, score_column: str, columns: Sequence[str],
+                 min_score: Optional[int] = None, use_memory: bool = True,
+                 max_guilds: int = 64, ttl: float = 600.0):
+        self.table = table
+        self.score_column = score_column
+        self.columns = ', '.join(columns)
+        # Baris dengan skor <= min_score tidak ikut leaderboard
+        self.min_score = min_score
+        self.use_memory = use_memory
+        self.max_guilds = max_guilds
+        # Urutan di memory dibangun ulang setelah ttl, membatasi drift dari
+        # jalur tulis yang tidak memanggil record()
+        self.ttl = ttl
+        self.index_name = f"idx_{table}_rank"
+        self._guilds: "OrderedDict[str, GuildRanking]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'memory_hits': 0, 'loads': 0, 'sql_queries': 0}
+
+    def ensure_index(self, cursor):
+        """Index komposit untuk ORDER BY skor DESC, user_id per guild"""
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS {self.index_name} "
+            f"ON {self.table}(guild_id, {self.score_column} DESC, user_id)"
+        )
+
+    # ---- urutan di memory ----
+
+    def _ranking(self, conn, guild_id: str) -> Optional[GuildRanking]:
+        if not self.use_memory:
+            return None
+        with self._lock:
+            ranking = self._guilds.get(guild_id)
+            if ranking is not None and time.monotonic() - ranking.loaded_at < self.ttl:
+                self._guilds.move_to_end(guild_id)
+                self.stats['memory_hits'] += 1
+                return ranking
+
+            rows = conn.execute(
+                f"SELECT user_id, {self.score_column} FROM {self.table} WHERE guild_id = ?",
+                (guild_id,)
+            ).fetchall()
+            ranking = self._guilds[guild_id] = GuildRanking((row[0], row[1] or 0) for row in rows)
+            self._guilds.move_to_end(guild_id)
+            while len(self._guilds) > self.max_guilds:
+                self._guilds.popitem(last=False)
+            self.stats['loads'] += 1
+            return ranking
+
+    def record(self, guild_id, user_id, score: int):
+        """Catat skor baru user; hanya berlaku untuk guild yang sedang dimuat"""
+        with self._lock:
+            ranking = self._guilds.get(str(guild_id))
+            if ranking is not None:
+                ranking.update(str(user_id), score)
+
+    def invalidate(self, guild_id=None):
+        """Buang urutan di memory untuk satu guild, atau semua"""
+        with self._lock:
+            if guild_id is None:
+                self._guilds.clear()
+            else:
+                self._guilds.pop(str(guild_id), None)
+
+    # ---- query ----
+
+    def _score_filter(self) -> str:
+        return f" AND {self.score_column} > {int(self.min_score)}" if self.min_score is not None else ""
+
+    def rank(self, conn, guild_id, user_id) -> Optional[int]:
+        """Rank user di guild, None jika user belum punya baris"""
+        guild_id, user_id = str(guild_id), str(user_id)
+        ranking = self._ranking(conn, guild_id)
+        if ranking is not None:
+            with self._lock:
+                rank = ranking.rank(user_id)
+            if rank is not None:
+                return rank
+
+        self.stats['sql_queries'] += 1
+        row = conn.execute(
+            f"SELECT {self.score_column} FROM {self.table} WHERE guild_id = ? AND user_id = ?",
+            (guild_id, user_id)
+        ).fetchone()
+        if row is None:
+            return None
+        # COUNT lewat range index (guild_id, skor DESC), tanpa baca tabel
+        higher = conn.execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE guild_id = ? AND {self.score_column} > ?",
+            (guild_id, row[0] or 0)
+        ).fetchone()[0]
+        return higher + 1
+
+    def count(self, conn, guild_id) -> int:
+        """Jumlah baris leaderboard di guild"""
+        guild_id = str(guild_id)
+        ranking = self._ranking(conn, guild_id)
+        if ranking is not None:
+            with self._lock:
+                if self.min_score is None:
+                    return len(ranking)
+                return ranking.count_above(self.min_score)
+
+        self.stats['sql_queries'] += 1
+        return conn.execute(
+            f"SELECT COUNT(*) FROM {self.table} WHERE guild_id = ?{self._score_filter()}",
+            (guild_id,)
+        ).fetchone()[0]
+
+    def after(self, conn, guild_id, limit: int, cursor: Optional[Cursor] = None) -> List[Dict]:
+        """Satu halaman leaderboard setelah cursor (keyset pagination)"""
+        score = self.score_column
+        sql = f"SELECT {self.columns} FROM {self.table} WHERE guild_id = ?{self._score_filter()}"
+        params: list = [str(guild_id)]
+        if cursor is not None:
+            last_score, last_user = cursor
+            # "score <= ?" memberi batas range pada index, sisanya memecah skor yang sama
+            sql += f" AND {score} <= ? AND ({score} < ? OR user_id > ?)"
+            params += [last_score, last_score, str(last_user)]
+        sql += f" ORDER BY {score} DESC, user_id LIMIT ?"
+        params.append(limit)
+
+        self.stats['sql_queries'] += 1
+        return [dict(row) for row in conn.execute(sql, params).fetchall()]
+
+    def page(self, conn, guild_id, page: int, per_page: int) -> List[Dict]:
+        """Halaman ke-page (1-based); batas halaman diambil dari urutan di memory"""
+        offset = (page - 1) * per_page
+        if offset <= 0:
+            return self.after(conn, guild_id, per_page)
+
+        ranking = self._ranking(conn, str(guild_id))
+        if ranking is not None:
+            with self._lock:
+                cursor = ranking.entry_at(offset - 1)
+            if cursor is None or (self.min_score is not None and cursor[0] <= self.min_score):
+                return []
+            return self.after(conn, guild_id, per_page, cursor)
+
+        # Tanpa urutan di memory: OFFSET tetap berjalan di atas index komposit
+        self.stats['sql_queries'] += 1
+        rows = conn.execute(
+            f"SELECT {self.columns} FROM {self.table} WHERE guild_id = ?{self._score_filter()} "
+            f"ORDER BY {self.score_column} DESC, user_id LIMIT ? OFFSET ?",
+            (str(guild_id), per_page, offset)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                **self.stats,
+                'guilds_loaded': len(self._guilds),
+                'entries': sum(len(ranking) for ranking in self._guilds.values())
+            }
+
+LEVEL_RANKS = RankIndex('user_levels', 'xp', ('user_id', 'xp', 'level', 'messages'))
+REPUTATION_RANKS = RankIndex(
+    'user_reputation', 'reputation',
+    ('user_id', 'reputation', 'total_given', 'total_received'),
+    min_score=0
+)
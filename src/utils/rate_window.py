@@ -0,0 +1,77 @@
+"""
+Sliding Window Counter
+Deteksi rate per key (mis. spam per user) dengan deque timestamp monotonic
+ber-maxlen = threshold: cek satu pesan O(1), tanpa lock (semua operasi
+sinkron di event loop), dan memori dibatasi LRU + eviction key idle
+"""
+
+import time
+from collections import OrderedDict, deque
+from typing import Deque, Hashable, Optional
+
+class SlidingWindowCounter:
+    """Hitung event per key dalam jendela waktu geser"""
+
+    def __init__(self, max_keys: int = 50_000, idle_ttl: float = 300.0):
+        self.max_keys = max_keys
+        # Key tanpa event selama idle_ttl detik dibuang
+        self.idle_ttl = idle_ttl
+        # Urutan OrderedDict = urutan event terakhir, key paling lama idle di depan
+        self._windows: "OrderedDict[Hashable, Deque[float]]" = OrderedDict()
+        self.evicted = 0
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._windows
+
+    def hit(self, key: Hashable, threshold: int, timeframe: float, now: Optional[float] = None) -> bool:
+        """Catat satu event; True jika ada >= threshold event dalam timeframe detik terakhir"""
+        if now is None:
+            now = time.monotonic()
+        threshold = max(int(threshold), 1)
+
+        window = self._windows.get(key)
+        if window is None:
+            window = self._windows[key] = deque(maxlen=threshold)
+        else:
+            self._windows.move_to_end(key)
+            if window.maxlen != threshold:
+                # Threshold diubah lewat config, pertahankan timestamp terbaru
+                window = self._windows[key] = deque(window, maxlen=threshold)
+        window.append(now)
+
+        self._evict(now)
+
+        # Deque hanya menyimpan threshold event terakhir; threshold tercapai
+        # jika event tertua di antaranya masih di dalam jendela
+        return len(window) >= threshold and now - window[0] < timeframe
+
+    def count(self, key: Hashable, timeframe: float, now: Optional[float] = None) -> int:
+        """Jumlah event tercatat untuk key dalam timeframe detik terakhir"""
+        window = self._windows.get(key)
+        if not window:
+            return 0
+        if now is None:
+            now = time.monotonic()
+        return sum(1 for stamp in window if now - stamp < timeframe)
+
+    def _evict(self, now: float):
+        """Buang key idle dari depan dan key tertua jika melewati max_keys, amortized O(1)"""
+        windows = self._windows
+        while windows:
+            oldest_key = next(iter(windows))
+            if len(windows) <= self.max_keys and now - windows[oldest_key][-1] < self.idle_ttl:
+                break
+            del windows[oldest_key]
+            self.evicted += 1
+
+    def evict_idle(self, now: Optional[float] = None) -> int:
+        """Buang semua key idle, return jumlah yang dibuang"""
+        before = self.evicted
+        self._evict(time.monotonic() if now is None else now)
+        return self.evicted - before
+
+    def clear(self):
+        self._windows.clear()
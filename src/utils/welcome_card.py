@@ -0,0 +1,236 @@
+"""
+Welcome Card Renderer
+Render kartu welcome di thread pool agar kerja PIL (blur, font, composite,
+encode PNG) tidak memblokir event loop. Background yang sudah di-blur dan
+font di-cache, avatar diambil lewat satu aiohttp session bersama dengan
+cache LRU kecil, dan jumlah render dibatasi supaya raid join tidak
+menumpuk pekerjaan tanpa batas
+"""
+
+import asyncio
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+BLUR_RADIUS = 5
+AVATAR_SIZE = 200
+AVATAR_POSITION = (340, 50)
+BORDER_SIZE = 220
+BORDER_POSITION = (330, 40)
+TITLE_FONT_SIZE = 60
+SUBTITLE_FONT_SIZE = 40
+
+# (text, posisi, "title"/"subtitle", warna)
+TextLine = Tuple[str, Tuple[int, int], str, str]
+
+class WelcomeCardRenderer:
+    """Render kartu welcome off-loop dengan cache asset dan concurrency terbatas"""
+
+    def __init__(
+        self,
+        font_path: str = "assets/fonts/",
+        background_path: str = "assets/backgrounds/",
+        max_workers: int = 2,
+        max_pending: int = 50,
+        avatar_cache_size: int = 256,
+        background_cache_size: int = 16,
+        fetch_timeout: float = 10.0
+    ):
+        self.font_path = font_path
+        self.background_path = background_path
+        self.max_workers = max_workers
+        # Lebih dari sekian render menunggu = kartu dilewati (embed tetap dikirim)
+        self.max_pending = max_pending
+        self.avatar_cache_size = avatar_cache_size
+        self.background_cache_size = background_cache_size
+        self.fetch_timeout = fetch_timeout
+
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._session = None
+        self._pending = 0
+
+        # (path, mtime_ns, blur) -> background RGBA yang sudah di-blur, dipakai bersama antar thread
+        self._backgrounds: "OrderedDict[Tuple[str, int, int], Any]" = OrderedDict()
+        self._backgrounds_lock = threading.Lock()
+        # Font FreeType tidak aman dipakai bersamaan, jadi cache per worker thread
+        self._fonts = threading.local()
+        # URL avatar (sudah mengandung hash avatar) -> bytes, hanya diakses dari event loop
+        self._avatars: "OrderedDict[str, bytes]" = OrderedDict()
+
+        # Metrics
+        self.rendered = 0
+        self.skipped = 0
+        self.avatar_hits = 0
+        self.avatar_misses = 0
+
+    # ---- lifecycle ----
+
+    def _ensure_started(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="welcome-card")
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_workers)
+
+    async def _get_session(self):
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.fetch_timeout))
+        return self._session
+
+    async def close(self):
+        """Tutup session HTTP dan thread pool"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # ---- avatar ----
+
+    async def fetch_avatar(self, url: str) -> Optional[bytes]:
+        """Ambil avatar lewat session bersama, dengan cache LRU"""
+        cached = self._avatars.get(url)
+        if cached is not None:
+            self._avatars.move_to_end(url)
+            self.avatar_hits += 1
+            return cached
+
+        self.avatar_misses += 1
+        try:
+            session = await self._get_session()
+            async with session.get(url) as resp:
+                if resp.status != 200:
+                    logger.error(f"Failed to download avatar: {resp.status}")
+                    return None
+                data = await resp.read()
+        except Exception as e:
+            logger.error(f"Failed to download avatar: {e}")
+            return None
+
+        self._avatars[url] = data
+        while len(self._avatars) > self.avatar_cache_size:
+            self._avatars.popitem(last=False)
+        return data
+
+    # ---- render ----
+
+    async def render(self, avatar_url: str, lines: Sequence[TextLine], settings: Dict[str, Any]) -> Optional[io.BytesIO]:
+        """
+        Render kartu welcome, return buffer PNG atau None jika gagal atau
+        antrian render sudah penuh
+        """
+        if self._pending >= self.max_pending:
+            self.skipped += 1
+            logger.warning(f"Welcome card dilewati, {self._pending} render masih antre")
+            return None
+
+        self._ensure_started()
+        self._pending += 1
+        try:
+            avatar_bytes = await self.fetch_avatar(avatar_url)
+            if avatar_bytes is None:
+                return None
+
+            background = settings.get('custom_background') or "welcome_bg.png"
+            font = settings.get('custom_font')
+            async with self._semaphore:
+                loop = asyncio.get_running_loop()
+                data = await loop.run_in_executor(
+                    self._executor, self._render_sync,
+                    f"{self.background_path}{background}",
+                    f"{self.font_path}{font or 'title.ttf'}",
+                    f"{self.font_path}{font or 'subtitle.ttf'}",
+                    avatar_bytes, tuple(lines)
+                )
+            self.rendered += 1
+            return io.BytesIO(data)
+        except Exception as e:
+            logger.error(f"Error creating welcome card: {e}")
+            return None
+        finally:
+            self._pending -= 1
+
+    def _background(self, path: str):
+        """Background yang sudah di-blur, di-cache per file dan mtime"""
+        from PIL import Image, ImageFilter
+
+        key = (path, os.stat(path).st_mtime_ns, BLUR_RADIUS)
+        with self._backgrounds_lock:
+            image = self._backgrounds.get(key)
+            if image is not None:
+                self._backgrounds.move_to_end(key)
+                return image
+
+        with Image.open(path) as source:
+            image = source.convert("RGBA").filter(ImageFilter.GaussianBlur(BLUR_RADIUS))
+
+        with self._backgrounds_lock:
+            self._backgrounds[key] = image
+            while len(self._backgrounds) > self.background_cache_size:
+                self._backgrounds.popitem(last=False)
+        return image
+
+    def _font(self, path: str, size: int):
+        from PIL import ImageFont
+
+        fonts = getattr(self._fonts, 'cache', None)
+        if fonts is None:
+            fonts = self._fonts.cache = {}
+        font = fonts.get((path, size))
+        if font is None:
+            font = fonts[(path, size)] = ImageFont.truetype(path, size)
+        return font
+
+    def _render_sync(self, background_path: str, title_font_path: str, subtitle_font_path: str,
+                     avatar_bytes: bytes, lines: Tuple[TextLine, ...]) -> bytes:
+        """Kerja PIL yang dijalankan di worker thread"""
+        from PIL import Image, ImageDraw
+
+        card = self._background(background_path).copy()
+        fonts = {
+            'title': self._font(title_font_path, TITLE_FONT_SIZE),
+            'subtitle': self._font(subtitle_font_path, SUBTITLE_FONT_SIZE)
+        }
+
+        with Image.open(io.BytesIO(avatar_bytes)) as source:
+            avatar = source.convert("RGBA").resize((AVATAR_SIZE, AVATAR_SIZE))
+
+        # Circular mask dan border
+        mask = Image.new("L", (AVATAR_SIZE, AVATAR_SIZE), 0)
+        ImageDraw.Draw(mask).ellipse((0, 0, AVATAR_SIZE, AVATAR_SIZE), fill=255)
+        border = Image.new("RGBA", (BORDER_SIZE, BORDER_SIZE), (255, 255, 255, 0))
+        ImageDraw.Draw(border).ellipse(
+            (0, 0, BORDER_SIZE - 1, BORDER_SIZE - 1), outline=(255, 255, 255, 255), width=3
+        )
+        card.paste(avatar, AVATAR_POSITION, mask)
+        card.paste(border, BORDER_POSITION, border)
+
+        # Text dengan shadow
+        draw = ImageDraw.Draw(card)
+        for text, (x, y), font, fill in lines:
+            draw.text((x + 2, y + 2), text, font=fonts[font], fill=(0, 0, 0))
+            draw.text((x, y), text, font=fonts[font], fill=fill)
+
+        buffer = io.BytesIO()
+        card.save(buffer, format="PNG")
+        return buffer.getvalue()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'pending': self._pending,
+            'rendered': self.rendered,
+            'skipped': self.skipped,
+            'avatar_cache': len(self._avatars),
+            'avatar_hits': self.avatar_hits,
+            'avatar_misses': self.avatar_misses,
+            'background_cache': len(self._backgrounds)
+        }
@@ -0,0 +1,85 @@
+"""
+Banned Word Matcher
+Daftar kata terlarang dikompilasi sekali per perubahan config menjadi satu
+regex berbentuk trie (prefix yang sama digabung), sehingga satu pesan
+cukup di-scan sekali oleh engine regex tanpa loop per kata.
+
+- words: cocok sebagai kata utuh (tidak menandai "class" untuk "ass")
+- wildcards: cocok di mana saja; '*' berarti karakter apa pun selain spasi
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Pattern, Tuple
+
+def _normalize(entries: Iterable[str]) -> Tuple[str, ...]:
+    """Lowercase, buang entry kosong dan duplikat, urutan tetap"""
+    seen = {}
+    for entry in entries:
+        entry = entry.strip().lower()
+        if entry:
+            seen.setdefault(entry, None)
+    return tuple(seen)
+
+def trie_pattern(words: Iterable[str]) -> str:
+    """Regex alternation berbentuk trie, mis. bad, badass, bar -> ba(?:d(?:ass)?|r)"""
+    trie: Dict = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = None
+
+    def build(node: Dict) -> str:
+        is_end = '' in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1:
+            body = branches[0]
+            if is_end:
+                return f'(?:{body})?' if len(body) > 1 else f'{body}?'
+            return body
+        body = '(?:' + '|'.join(branches) + ')'
+        return body + '?' if is_end else body
+
+    return build(trie)
+
+def wildcard_pattern(pattern: str) -> str:
+    """Glob sederhana: '*' -> rangkaian karakter non-spasi, sisanya literal"""
+    # '*' di awal/akhir tidak mengubah hasil search, dibuang agar prefix tetap literal
+    return r'\S*?'.join(re.escape(part) for part in pattern.strip('*').split('*'))
+
+class BannedWordMatcher:
+    """Matcher immutable; config baru berarti matcher baru (swap atomik)"""
+
+    def __init__(self, words: Iterable[str] = (), wildcards: Iterable[str] = ()):
+        self.words = _normalize(words)
+        self.wildcards = tuple(w for w in _normalize(wildcards) if w.strip('*'))
+
+        self._words_re: Optional[Pattern] = None
+        if self.words:
+            self._words_re = re.compile(r'(?<!\w)' + trie_pattern(self.words) + r'(?!\w)')
+
+        # Wildcard dikompilasi terpisah: regex yang diawali literal memakai fast
+        # search prefix milik engine re, jauh lebih cepat dari satu alternation
+        # besar untuk jumlah wildcard yang biasanya kecil
+        self._wildcard_res: List[Tuple[str, Pattern]] = [
+            (pattern, re.compile(wildcard_pattern(pattern))) for pattern in self.wildcards
+        ]
+
+    def __len__(self) -> int:
+        return len(self.words) + len(self.wildcards)
+
+    def search(self, text: str) -> str:
+        """Kata/pattern terlarang pertama di text, string kosong jika tidak ada"""
+        if not text:
+            return ""
+        content = text.lower()
+        if self._words_re is not None:
+            match = self._words_re.search(content)
+            if match:
+                return match.group(0)
+        for pattern, regex in self._wildcard_res:
+            if regex.search(content):
+                return pattern
+        return ""
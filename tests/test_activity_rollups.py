@@ -0,0 +1,80 @@
+"""
+Test cases untuk rollup activity_logs dan retensi log mentah
+"""
+
+import asyncio
+import sqlite3
+import unittest
+
+from src.database.activity_rollups import (
+    activity_totals, ensure_activity_rollups, member_counts, prune_activity
+)
+
+class TestActivityRollups(unittest.TestCase):
+    """Test cases untuk rollup per jam/hari"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        # Schema lama: activity_logs tanpa channel_id, sudah berisi data
+        self.conn.executescript("""
+            CREATE TABLE activity_logs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                activity_type TEXT NOT NULL,
+                details TEXT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            CREATE TABLE member_history (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id TEXT NOT NULL,
+                member_count INTEGER NOT NULL,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+            );
+            INSERT INTO activity_logs (guild_id, user_id, activity_type, timestamp)
+            VALUES ('g', 'u', 'message', datetime('now', '-2 days')),
+                   ('g', 'u', 'message', datetime('now', '-40 days'));
+        """)
+        ensure_activity_rollups(self.conn)
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _raw_totals(self, days):
+        return dict(self.conn.execute("""
+            SELECT activity_type, COUNT(*) FROM activity_logs
+            WHERE guild_id = 'g' AND timestamp > datetime('now', ?)
+            GROUP BY activity_type
+        """, (f'-{days} days',)).fetchall())
+
+    def test_rollups_match_raw_counts(self):
+        """Backfill + trigger menghasilkan total yang sama dengan COUNT mentah"""
+        self.conn.executemany(
+            "INSERT INTO activity_logs (guild_id, user_id, activity_type, channel_id) VALUES (?, ?, ?, ?)",
+            [('g', 'u', 'message', '1'), ('g', 'v', 'message', '2'), ('g', 'u', 'voice_join', '3'),
+             ('other', 'u', 'message', '1')]
+        )
+        for days in (1, 7, 60):
+            self.assertEqual(activity_totals(self.conn, 'g', days), self._raw_totals(days))
+
+    def test_member_counts_keep_last_snapshot_per_day(self):
+        """member_count_daily menyimpan snapshot terakhir per hari"""
+        self.conn.executemany(
+            "INSERT INTO member_history (guild_id, member_count) VALUES ('g', ?)", [(10,), (12,), (11,)]
+        )
+        self.assertEqual([count for _, count in member_counts(self.conn, 'g')], [11])
+
+    def test_prune_keeps_daily_rollups(self):
+        """Retensi menghapus log mentah lama tapi total harian tetap"""
+        before = activity_totals(self.conn, 'g', 60)
+
+        async def submit(func, *args):
+            return func(self.conn, *args)
+
+        removed = asyncio.run(prune_activity(submit, raw_days=30))
+        self.assertEqual(removed['activity_logs'], 1)
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM activity_logs").fetchone()[0], 1)
+        self.assertEqual(activity_totals(self.conn, 'g', 60), before)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+"""
+Test cases untuk counter warning AutoMod (jendela 24 jam dan buffer tulis)
+"""
+
+import asyncio
+import sqlite3
+import tempfile
+import time
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+from src.cogs.automod import WARNING_WINDOW, AutoMod
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+from src.utils.rate_window import SlidingWindowCounter
+
+def _timestamp(ts: float) -> str:
+    return datetime.utcfromtimestamp(ts).strftime('%Y-%m-%d %H:%M:%S')
+
+class TestAutoModWarnings(unittest.TestCase):
+    """Test cases untuk record_warning, flush_warnings dan load_recent_warnings"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+        self.connect_patch = mock.patch("src.cogs.automod.get_connection", self._connect)
+        self.connect_patch.start()
+
+    def tearDown(self):
+        self.connect_patch.stop()
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _automod(self, warn_threshold: int = 3) -> AutoMod:
+        # Tanpa __init__: tidak membuat task, file config, atau handler dispatcher
+        cog = object.__new__(AutoMod)
+        cog.config = {"punishments": {"warn_threshold": warn_threshold, "mute_duration": 10}}
+        cog.warning_windows = SlidingWindowCounter(max_keys=100_000, idle_ttl=WARNING_WINDOW)
+        cog._pending_warnings = []
+        cog._warning_flush_event = asyncio.Event()
+        cog._warning_flush_lock = asyncio.Lock()
+        cog.setup_database()
+        return cog
+
+    def _rows(self):
+        conn = self._connect()
+        try:
+            return [tuple(row) for row in conn.execute(
+                "SELECT user_id, guild_id, warning_type, reason FROM automod_warnings ORDER BY id"
+            )]
+        finally:
+            conn.close()
+
+    def test_threshold_counted_within_window(self):
+        """Threshold mute hanya tercapai oleh warning dalam jendela 24 jam"""
+        cog = self._automod(warn_threshold=3)
+        start = 1_700_000_000
+        results = [
+            cog.record_warning(1, 42, "spam", "r", now=start),
+            cog.record_warning(1, 42, "spam", "r", now=start + 60),
+            # Warning pertama sudah keluar dari jendela
+            cog.record_warning(1, 42, "spam", "r", now=start + WARNING_WINDOW + 1),
+            cog.record_warning(1, 42, "spam", "r", now=start + WARNING_WINDOW + 2),
+        ]
+        self.assertEqual(results, [False, False, False, True])
+        # Guild lain dihitung terpisah
+        self.assertFalse(cog.record_warning(2, 42, "spam", "r", now=start + WARNING_WINDOW + 3))
+        self.assertEqual(
+            cog.warning_windows.count(("1", "42"), WARNING_WINDOW, now=start + WARNING_WINDOW + 2), 3
+        )
+        self.assertEqual(len(cog._pending_warnings), 5)
+
+    def test_buffered_warnings_flushed_through_write_queue(self):
+        """Warning di-buffer lalu ditulis ke tabel dalam satu submit write queue"""
+        async def run():
+            cog = self._automod()
+            pool = ConnectionPool(self.db_path)
+            writer = WriteQueue(pool, window=0.001)
+            try:
+                with mock.patch("src.cogs.automod.get_write_queue", lambda: writer):
+                    cog.record_warning(1, 42, "spam", "flood")
+                    cog.record_warning(1, 43, "caps", "shouting")
+                    self.assertEqual(self._rows(), [])
+                    written = await cog.flush_warnings()
+                    again = await cog.flush_warnings()
+                return written, again, writer.stats(), cog._pending_warnings
+            finally:
+                await writer.close()
+                await pool.close()
+
+        written, again, stats, pending = asyncio.run(run())
+        self.assertEqual((written, again), (2, 0))
+        self.assertEqual(stats['submitted'], 1)
+        self.assertEqual(pending, [])
+        self.assertEqual(self._rows(), [("42", "1", "spam", "flood"), ("43", "1", "caps", "shouting")])
+
+    def test_failed_flush_keeps_rows_buffered(self):
+        """Flush yang gagal mengembalikan baris ke buffer"""
+        class _BrokenQueue:
+            async def submit(self, func, *args):
+                raise sqlite3.OperationalError("database is locked")
+
+        async def run():
+            cog = self._automod()
+            cog.record_warning(1, 42, "spam", "flood")
+            with mock.patch("src.cogs.automod.get_write_queue", _BrokenQueue):
+                written = await cog.flush_warnings()
+            return written, cog._pending_warnings
+
+        written, pending = asyncio.run(run())
+        self.assertEqual(written, 0)
+        self.assertEqual(len(pending), 1)
+
+    def test_counter_rebuilt_from_table_on_load(self):
+        """load_recent_warnings mengisi counter dari baris 24 jam terakhir"""
+        cog = self._automod(warn_threshold=3)
+        now = time.time()
+        conn = self._connect()
+        conn.executemany(
+            "INSERT INTO automod_warnings (user_id, guild_id, warning_type, reason, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [
+                ("42", "1", "spam", "r", _timestamp(now - 3600)),
+                ("42", "1", "spam", "r", _timestamp(now - 60)),
+                ("42", "1", "spam", "r", _timestamp(now - WARNING_WINDOW - 3600)),
+                ("43", "1", "caps", "r", _timestamp(now - 60)),
+            ]
+        )
+        conn.commit()
+        conn.close()
+
+        cog.load_recent_warnings()
+        self.assertEqual(cog.warning_windows.count(("1", "42"), WARNING_WINDOW, now=now), 2)
+        self.assertEqual(cog.warning_windows.count(("1", "43"), WARNING_WINDOW, now=now), 1)
+        # Warning berikutnya setelah restart langsung mencapai threshold
+        self.assertTrue(cog.record_warning(1, 42, "spam", "r", now=now))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+Test cases untuk backup online database
+"""
+
+import gzip
+import os
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.database.backup import BackupEngine, BackupError, manifest_path
+
+class TestBackupEngine(unittest.TestCase):
+    """Test cases untuk BackupEngine"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "shop.db"
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)")
+        self.conn.executemany("INSERT INTO items (name) VALUES (?)", [(f"item{i}",) for i in range(500)])
+        self.conn.commit()
+        self.engine = BackupEngine(self.db_path, Path(self.tmpdir.name) / "backups", pages_per_step=2, step_sleep=0)
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmpdir.cleanup()
+
+    def _count(self, path):
+        conn = sqlite3.connect(str(path))
+        try:
+            return conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        finally:
+            conn.close()
+
+    def test_backup_includes_wal_content_and_manifest(self):
+        """Backup memuat data yang masih di file -wal dan ditulisi manifest"""
+        self.assertTrue(os.path.exists(f"{self.db_path}-wal"))
+        manifest = self.engine.create_backup()
+        backup_path = self.engine.backup_dir / manifest['file']
+
+        self.assertEqual(self._count(backup_path), 500)
+        self.assertFalse(os.path.exists(f"{backup_path}-wal"))
+        self.assertEqual(manifest['integrity'], 'ok')
+        self.assertTrue(manifest_path(backup_path).exists())
+        self.assertEqual(self.engine.list_backups()[0]['file'], manifest['file'])
+
+    def test_compressed_backup_verify_and_restore(self):
+        """Backup gzip diverifikasi lalu direstore ke database aktif"""
+        manifest = self.engine.create_backup(compress=True)
+        backup_path = self.engine.backup_dir / manifest['file']
+        self.assertTrue(manifest['file'].endswith('.db.gz'))
+
+        self.conn.execute("DELETE FROM items")
+        self.conn.commit()
+
+        db_path, info = self.engine.verify_backup(backup_path)
+        self.assertEqual(info['integrity'], 'ok')
+        self.engine.restore(db_path)
+        # Koneksi yang sudah terbuka langsung melihat hasil restore
+        self.assertEqual(self.conn.execute("SELECT COUNT(*) FROM items").fetchone()[0], 500)
+
+    def test_verify_rejects_tampered_and_corrupt_backups(self):
+        """Checksum yang tidak cocok dan file rusak ditolak sebelum restore"""
+        manifest = self.engine.create_backup()
+        backup_path = self.engine.backup_dir / manifest['file']
+        with open(backup_path, 'r+b') as f:
+            f.seek(4096)
+            f.write(b"\x00" * 64)
+        with self.assertRaises(BackupError):
+            self.engine.verify_backup(backup_path)
+
+        garbage = self.engine.backup_dir / "upload.db.gz"
+        with gzip.open(garbage, 'wb') as f:
+            f.write(b"not a database" * 100)
+        with self.assertRaises(BackupError):
+            self.engine.verify_backup(garbage)
+
+    def test_skip_unchanged_and_retention(self):
+        """Backup terjadwal dilewati jika tidak ada perubahan, retensi menyimpan N terbaru"""
+        first = self.engine.create_backup(prefix="scheduled", skip_if_unchanged=True)
+        self.assertIsNotNone(first)
+        self.assertIsNone(self.engine.create_backup(prefix="scheduled", skip_if_unchanged=True))
+
+        for i in range(3):
+            self.conn.execute("INSERT INTO items (name) VALUES (?)", (f"new{i}",))
+            self.conn.commit()
+            self.assertIsNotNone(self.engine.create_backup(prefix="scheduled", skip_if_unchanged=True))
+        latest = self.engine.latest_backup("scheduled")
+
+        removed = self.engine.prune_backups("scheduled", keep=2)
+        self.assertEqual(len(removed), 2)
+        self.assertEqual(len(self.engine.list_backups("scheduled")), 2)
+        self.assertEqual(self.engine.latest_backup("scheduled")['file'], latest['file'])
+        self.assertFalse((self.engine.backup_dir / first['file']).exists())
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Test cases untuk batch insert queue (activity log)
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.database.batch_insert import BatchInsertQueue
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+
+class TestBatchInsertQueue(unittest.TestCase):
+    """Test cases untuk BatchInsertQueue"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_rows_are_flushed_in_batches(self):
+        """Baris ditulis dengan executemany per batch dan semuanya tersimpan saat close"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path)
+            await pool.run(lambda conn: conn.execute("CREATE TABLE t (x INTEGER)"))
+            writer = WriteQueue(pool)
+            queue = BatchInsertQueue("INSERT INTO t VALUES (?)", batch_size=50,
+                                     flush_interval=0.05, submit=writer.submit)
+            for i in range(120):
+                queue.put_nowait((i,))
+            await queue.close()
+            count = await pool.run(lambda conn: conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+            stats = queue.stats()
+            await writer.close()
+            await pool.close()
+            return count, stats
+
+        count, stats = asyncio.run(scenario())
+        self.assertEqual(count, 120)
+        self.assertEqual(stats['flushed'], 120)
+        self.assertEqual(stats['batches'], 3)
+
+    def test_sampling_and_dropping_when_full(self):
+        """Di atas high watermark baris di-sample, saat penuh baris dibuang"""
+        async def scenario():
+            written = []
+
+            async def submit(func, sql, rows):
+                written.extend(rows)
+
+            queue = BatchInsertQueue("unused", max_queue=10, high_watermark=0.5,
+                                     sample_every=2, submit=submit)
+            # Tanpa await flusher belum berjalan, antrian terisi penuh
+            accepted = sum(queue.put_nowait((i,)) for i in range(30))
+            stats = queue.stats()
+            await queue.close()
+            return accepted, stats, written
+
+        accepted, stats, written = asyncio.run(scenario())
+        self.assertEqual(accepted, 10)
+        self.assertEqual(stats['enqueued'], 10)
+        self.assertEqual(stats['sampled_out'] + stats['dropped'], 20)
+        self.assertGreater(stats['sampled_out'], 0)
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(len(written), 10)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,218 @@
+"""
+Test cases untuk CacheManager (LRU, expiry heap, index prefix, snapshot, write-behind)
+"""
+
+import asyncio
+import sqlite3
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.database.migrations import _create_cache_tables
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+from src.services.cache_service import CacheManager
+
+class TestCacheManager(unittest.TestCase):
+    """Test cases untuk CacheManager dengan tabel cache di database sementara"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+        conn = sqlite3.connect(self.db_path)
+        asyncio.run(_create_cache_tables(conn.cursor()))
+        conn.commit()
+        conn.close()
+        # CacheManager singleton, buat instance baru per test
+        CacheManager._instance = None
+
+    def tearDown(self):
+        CacheManager._instance = None
+        self.tmpdir.cleanup()
+
+    def _cache(self, **overrides) -> CacheManager:
+        cache = CacheManager()
+        # Flush hanya terjadi saat dipanggil eksplisit di test
+        cache.FLUSH_INTERVAL = 60
+        for name, value in overrides.items():
+            setattr(cache, name, value)
+        return cache
+
+    def _run(self, scenario):
+        """Jalankan scenario(cache) dengan pool dan write queue di database test"""
+        async def run():
+            pool = ConnectionPool(self.db_path)
+            writer = WriteQueue(pool, window=0.001)
+            cache = self._cache()
+            try:
+                with mock.patch("src.services.cache_service.get_pool", lambda: pool), \
+                        mock.patch("src.services.cache_service.get_write_queue", lambda: writer):
+                    try:
+                        return await scenario(cache)
+                    finally:
+                        await cache.close(flush=False)
+            finally:
+                await writer.close()
+                await pool.close()
+
+        return asyncio.run(run())
+
+    def _rows(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return dict(conn.execute("SELECT key, value FROM cache").fetchall())
+        finally:
+            conn.close()
+
+    def test_lru_evicts_least_recently_used(self):
+        """Item yang paling lama tidak diakses dibuang lebih dulu"""
+        async def scenario(cache):
+            cache.MAX_MEMORY_ITEMS = 3
+            for key in ("stock_count_a", "stock_count_b", "stock_count_c"):
+                await cache.set(key, 1)
+            # Akses a menjadikannya paling baru, b sekarang paling lama
+            await cache.get("stock_count_a")
+            await cache.set("stock_count_d", 1)
+            return list(cache.memory_cache)
+
+        keys = self._run(scenario)
+        self.assertEqual(keys, ["stock_count_c", "stock_count_a", "stock_count_d"])
+
+    def test_expiry_heap_skips_reset_keys(self):
+        """Entry heap basi dari key yang di-set ulang tidak menghapus value baru"""
+        async def scenario(cache):
+            await cache.set("stock_count_short", 1, expires_in=1)
+            await cache.set("stock_count_reset", 1, expires_in=1)
+            await cache.set("stock_count_reset", 2, expires_in=100)
+            await cache.set("stock_count_forever", 3)
+            removed = cache._expire_due(time.time() + 2)
+            return removed, list(cache.memory_cache), len(cache._expiry_heap)
+
+        removed, keys, heap_size = self._run(scenario)
+        self.assertEqual(removed, 1)
+        self.assertEqual(keys, ["stock_count_reset", "stock_count_forever"])
+        self.assertEqual(heap_size, 1)
+
+    def test_expired_entry_not_served(self):
+        """get tidak mengembalikan entry memory yang sudah expired"""
+        async def scenario(cache):
+            await cache.set("stock_count_x", 1, expires_in=1)
+            cache.memory_cache["stock_count_x"]['expires_at'] = time.time() - 1
+            return await cache.get("stock_count_x"), "stock_count_x" in cache.memory_cache
+
+        self.assertEqual(self._run(scenario), (None, False))
+
+    def test_delete_pattern_uses_prefix_index(self):
+        """delete_pattern menghapus key ber-prefix dari memory, dirty dan database"""
+        async def scenario(cache):
+            await cache.set("growid_1", "a", expires_in=60)
+            await cache.set("balance_1", "b", expires_in=60)
+            await cache.flush()
+            await cache.set("growid_2", "c", expires_in=60)
+            await cache.delete_pattern("growid_*")
+            await cache.flush()
+            return (
+                sorted(cache.memory_cache),
+                sorted(cache._prefix_index),
+                await cache.get("growid_2")
+            )
+
+        keys, namespaces, value = self._run(scenario)
+        self.assertEqual(keys, ["balance_1"])
+        self.assertEqual(namespaces, ["balance"])
+        self.assertIsNone(value)
+        self.assertEqual(list(self._rows()), ["balance_1"])
+
+    def test_mutable_values_are_copied(self):
+        """Value mutable disalin saat set dan get, value immutable dibagi langsung"""
+        async def scenario(cache):
+            original = {'items': [1, 2]}
+            await cache.set("stock_count_dict", original)
+            original['items'].append(3)
+            first = await cache.get("stock_count_dict")
+            first['items'].append(4)
+            second = await cache.get("stock_count_dict")
+
+            text = "x" * 100
+            await cache.set("stock_count_text", text)
+            return first, second, (await cache.get("stock_count_text")) is text
+
+        first, second, shared = self._run(scenario)
+        self.assertEqual(first, {'items': [1, 2, 4]})
+        self.assertEqual(second, {'items': [1, 2]})
+        self.assertTrue(shared)
+
+    def test_write_behind_reads_pending_then_flushes(self):
+        """Perubahan dirty terbaca sebelum flush dan ditulis dalam satu batch"""
+        async def scenario(cache):
+            await cache.set("growid_1", "first", expires_in=60)
+            await cache.set("growid_1", "second", expires_in=60)
+            await cache.set("balance_1", {'wl': 1}, expires_in=60)
+            before = self._rows()
+            # Evicted dari memory tetapi belum di-flush: tetap dibaca dari buffer dirty
+            cache._memory_remove("growid_1")
+            pending = await cache.get("growid_1")
+            flushed = await cache.flush()
+            return before, pending, flushed, cache.stats()
+
+        before, pending, flushed, stats = self._run(scenario)
+        self.assertEqual(before, {})
+        self.assertEqual(pending, "second")
+        self.assertEqual(flushed, 2)
+        self.assertEqual(stats['coalesced'], 1)
+        self.assertEqual(stats['flushes'], 1)
+        self.assertEqual(self._rows(), {"growid_1": '"second"', "balance_1": '{"wl":1}'})
+
+    def test_pending_delete_hides_persisted_value(self):
+        """Delete yang belum di-flush tidak membuat value lama di database terbaca lagi"""
+        async def scenario(cache):
+            await cache.set("growid_1", "old", expires_in=60)
+            await cache.flush()
+            await cache.delete("growid_1")
+            return await cache.get("growid_1"), self._rows()
+
+        value, rows = self._run(scenario)
+        self.assertIsNone(value)
+        self.assertEqual(rows, {"growid_1": '"old"'})
+
+    def test_memory_only_prefix_never_persisted(self):
+        """Key MEMORY_ONLY_PREFIXES tidak masuk buffer dirty maupun database"""
+        async def scenario(cache):
+            await cache.set("stock_count_abc", 5, expires_in=60)
+            dirty = cache.stats()['dirty']
+            await cache.flush()
+            cache._memory_remove("stock_count_abc")
+            return dirty, await cache.get("stock_count_abc")
+
+        self.assertEqual(self._run(scenario), (0, None))
+        self.assertEqual(self._rows(), {})
+
+    def test_close_flushes_or_drops_pending_writes(self):
+        """close() menulis perubahan tersisa, close(flush=False) membuangnya"""
+        async def scenario(cache):
+            await cache.set("growid_1", "kept", expires_in=60)
+            await cache.close()
+            await cache.set("growid_2", "dropped", expires_in=60)
+            await cache.close(flush=False)
+            return cache.stats()['dirty'], cache._flush_task
+
+        dirty, task = self._run(scenario)
+        self.assertEqual(dirty, 0)
+        self.assertIsNone(task)
+        self.assertEqual(self._rows(), {"growid_1": '"kept"'})
+
+    def test_rejected_row_does_not_fail_batch(self):
+        """Baris yang melanggar constraint tabel dilewati, baris lain tetap ditulis"""
+        async def scenario(cache):
+            # Kolom expires_at NOT NULL: entry tanpa expiry hanya hidup di memory
+            await cache.set("growid_1", "no expiry")
+            await cache.set("growid_2", "with expiry", expires_in=60)
+            return await cache.flush()
+
+        self.assertEqual(self._run(scenario), 2)
+        self.assertEqual(self._rows(), {"growid_2": '"with expiry"'})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test cases untuk connection pool database
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.database.pool import ConnectionPool
+
+class TestConnectionPool(unittest.TestCase):
+    """Test cases untuk ConnectionPool"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_connections_are_reused(self):
+        """Koneksi dipakai ulang, PRAGMA hanya dijalankan sekali"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path, max_size=2)
+            await pool.run(lambda conn: conn.execute("CREATE TABLE t (x INTEGER)"))
+            for i in range(10):
+                await pool.run(lambda conn, v: (conn.execute("INSERT INTO t VALUES (?)", (v,)), conn.commit()), i)
+            rows = await pool.run(lambda conn: conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+            mode = await pool.run(lambda conn: conn.execute("PRAGMA journal_mode").fetchone()[0])
+            stats = pool.stats()
+            await pool.close()
+            return rows, mode, stats
+
+        rows, mode, stats = asyncio.run(scenario())
+        self.assertEqual(rows, 10)
+        self.assertEqual(mode, "wal")
+        self.assertEqual(stats['created'], 1)
+        self.assertEqual(stats['checkouts'], 13)
+        self.assertEqual(stats['in_use'], 0)
+
+    def test_pool_is_bounded(self):
+        """Checkout melebihi max_size menunggu koneksi dikembalikan"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path, max_size=2)
+
+            async def hold():
+                async with pool.connection():
+                    await asyncio.sleep(0.02)
+
+            await asyncio.gather(*(hold() for _ in range(6)))
+            stats = pool.stats()
+            await pool.close()
+            return stats
+
+        stats = asyncio.run(scenario())
+        self.assertLessEqual(stats['created'], 2)
+        self.assertGreater(stats['waits'], 0)
+        self.assertEqual(stats['idle'], stats['created'])
+
+    def test_open_transaction_is_rolled_back_on_release(self):
+        """Transaksi yang tidak di-commit tidak bocor ke checkout berikutnya"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path, max_size=1)
+            await pool.run(lambda conn: conn.execute("CREATE TABLE t (x INTEGER)"))
+            async with pool.connection() as conn:
+                conn.execute("INSERT INTO t VALUES (1)")
+            rows = await pool.run(lambda conn: conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+            await pool.close()
+            return rows
+
+        self.assertEqual(asyncio.run(scenario()), 0)
+
+if __name__ == "__main__":
+    unittest.main()
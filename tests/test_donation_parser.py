@@ -0,0 +1,203 @@
+"""
+Test cases untuk parser donasi, coalescer kredit donasi dan idempotensi kredit
+"""
+
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.database.migrations import DONATION_LEDGER_SCHEMA
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+from src.services.balance_service import BalanceCallbackManager, BalanceManagerService
+from src.services.donation_service import DonationManager
+from src.utils.base_handler import BaseLockHandler
+from src.utils.coalescer import KeyedCoalescer
+from src.utils.donation_parser import parse_deposit, parse_donation
+
+class TestDonationParser(unittest.TestCase):
+    """Test cases untuk parse_donation dan parse_deposit"""
+
+    def test_parse_donation_formats(self):
+        """Format Deposit dan Jumlah dikenali, case-insensitive, multi-line"""
+        self.assertEqual(
+            parse_donation("GrowID: Fdy\nDeposit: 1 Diamond Lock"), ("Fdy", "1 Diamond Lock")
+        )
+        self.assertEqual(
+            parse_donation("growid: Abc_1\nWorld: START\njumlah: 50 World Lock"), ("Abc_1", "50 World Lock")
+        )
+        self.assertIsNone(parse_donation("hello there"))
+
+    def test_parse_deposit(self):
+        """Semua jenis lock terbaca dalam satu pass"""
+        self.assertEqual(parse_deposit("2 Blue Gem Lock, 3 Diamond Lock, 45 World Lock"), (45, 3, 2))
+        self.assertEqual(parse_deposit("10 World Locks"), (10, 0, 0))
+        self.assertEqual(parse_deposit("nothing"), (0, 0, 0))
+
+class TestKeyedCoalescer(unittest.TestCase):
+    """Test cases untuk KeyedCoalescer"""
+
+    def test_merges_by_key_and_dedupes_ids(self):
+        """Item dengan key sama digabung, id duplikat diabaikan"""
+        flushed = []
+
+        async def flush(key, items):
+            flushed.append((key, [item_id for item_id, _ in items]))
+
+        async def run():
+            coalescer = KeyedCoalescer(flush, window=0.02)
+            self.assertTrue(coalescer.add("fdy", 1, (1, 0, 0)))
+            self.assertTrue(coalescer.add("fdy", 2, (0, 1, 0)))
+            self.assertFalse(coalescer.add("fdy", 1, (1, 0, 0)))
+            self.assertTrue(coalescer.add("abc", 3, (5, 0, 0)))
+            await asyncio.sleep(0.05)
+            self.assertFalse(coalescer.add("fdy", 2, (0, 1, 0)))
+            await coalescer.close()
+            return coalescer.stats()
+
+        stats = asyncio.run(run())
+        self.assertEqual(sorted(flushed), [("abc", [3]), ("fdy", [1, 2])])
+        self.assertEqual(stats['duplicates'], 2)
+
+    def test_flushes_immediately_at_max_items_and_on_close(self):
+        """Batch penuh langsung di-flush, sisanya di-flush saat close"""
+        flushed = []
+
+        async def flush(key, items):
+            flushed.append(len(items))
+
+        async def run():
+            coalescer = KeyedCoalescer(flush, window=60, max_items=2)
+            for item_id in range(3):
+                coalescer.add("fdy", item_id, None)
+            await asyncio.sleep(0)
+            self.assertEqual(flushed, [2])
+            await coalescer.close()
+
+        asyncio.run(run())
+        self.assertEqual(flushed, [2, 1])
+
+class _MemoryCache:
+    """Pengganti CacheManager in-memory untuk test"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, expires_in=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+class _Channel:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+class TestDonationCreditIdempotency(unittest.TestCase):
+    """Kredit donasi lewat update_balance(extra_write=...) dan processed_donations"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+        conn = sqlite3.connect(self.db_path)
+        conn.executescript(
+            """
+            CREATE TABLE users (
+                growid TEXT PRIMARY KEY,
+                balance_wl INTEGER DEFAULT 0,
+                balance_dl INTEGER DEFAULT 0,
+                balance_bgl INTEGER DEFAULT 0,
+                updated_at TIMESTAMP
+            );
+            CREATE TABLE balance_transactions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                growid TEXT, type TEXT, details TEXT,
+                old_balance TEXT, new_balance TEXT, created_at TIMESTAMP
+            );
+            INSERT INTO users (growid) VALUES ('Fdy');
+            """
+        )
+        conn.execute(DONATION_LEDGER_SCHEMA)
+        # Donasi m1 sudah dikreditkan sebelum restart
+        conn.execute("INSERT INTO processed_donations (message_id, growid, wl) VALUES ('m1', 'Fdy', 5)")
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _balance_manager(self):
+        manager = object.__new__(BalanceManagerService)
+        BaseLockHandler.__init__(manager)
+        manager.bot = None
+        manager.cache_manager = _MemoryCache()
+        manager.callback_manager = BalanceCallbackManager()
+        manager.initialized = True
+        return manager
+
+    def _donation_manager(self, balance_manager):
+        donations = object.__new__(DonationManager)
+        donations.logger = mock.Mock()
+        donations.balance_manager = balance_manager
+        return donations
+
+    def _run_flush(self, items):
+        async def run():
+            pool = ConnectionPool(self.db_path)
+            writer = WriteQueue(pool, window=0.001)
+            donations = self._donation_manager(self._balance_manager())
+            with mock.patch("src.services.balance_service.get_connection", self._connect), \
+                    mock.patch("src.services.balance_service.get_write_queue", lambda: writer):
+                await donations._flush_credits("Fdy", items)
+            await writer.close()
+            await pool.close()
+
+        asyncio.run(run())
+        conn = self._connect()
+        try:
+            wl = conn.execute("SELECT balance_wl FROM users WHERE growid = 'Fdy'").fetchone()[0]
+            ids = [row[0] for row in conn.execute("SELECT message_id FROM processed_donations ORDER BY message_id")]
+            transactions = conn.execute("SELECT COUNT(*) FROM balance_transactions").fetchone()[0]
+        finally:
+            conn.close()
+        return wl, ids, transactions
+
+    def test_already_credited_message_is_skipped_in_transaction(self):
+        """Message id yang sudah tercatat tidak dikreditkan ulang, sisa batch tetap masuk"""
+        channel = _Channel()
+        wl, ids, transactions = self._run_flush([
+            ("m1", (5, 0, 0, channel)),
+            ("m2", (7, 0, 0, channel)),
+            ("m3", (3, 0, 0, channel)),
+        ])
+        self.assertEqual(wl, 10)
+        self.assertEqual(ids, ["m1", "m2", "m3"])
+        self.assertEqual(transactions, 1)
+        self.assertEqual(len(channel.sent), 1)
+        self.assertIn("Successfully filled Fdy (2 donations)", channel.sent[0])
+
+    def test_fully_credited_batch_changes_nothing(self):
+        """Batch yang seluruhnya sudah dikreditkan tidak mengubah balance"""
+        channel = _Channel()
+        wl, ids, transactions = self._run_flush([("m1", (5, 0, 0, channel))])
+        self.assertEqual(wl, 0)
+        self.assertEqual(ids, ["m1"])
+        self.assertEqual(transactions, 0)
+        self.assertEqual(channel.sent, [])
+
+if __name__ == "__main__":
+    unittest.main()
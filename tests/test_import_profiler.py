@@ -0,0 +1,74 @@
+"""
+Test cases untuk import profiler startup
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+
+from src.utils.import_profiler import ImportProfiler
+
+class TestImportProfiler(unittest.TestCase):
+    """Test cases untuk ImportProfiler"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        with open(os.path.join(self.tmpdir.name, "_profiled_child.py"), "w") as f:
+            f.write("import time\ntime.sleep(0.02)\n")
+        with open(os.path.join(self.tmpdir.name, "_profiled_parent.py"), "w") as f:
+            f.write("import time\nimport _profiled_child\ntime.sleep(0.01)\n")
+        with open(os.path.join(self.tmpdir.name, "_profiled_worker.py"), "w") as f:
+            f.write("import time\ntime.sleep(0.05)\n")
+        with open(os.path.join(self.tmpdir.name, "_profiled_spawner.py"), "w") as f:
+            f.write(
+                "import threading, time\n"
+                "worker = threading.Thread(target=lambda: __import__('_profiled_worker'))\n"
+                "worker.start()\n"
+                "time.sleep(0.01)\n"
+            )
+        sys.path.insert(0, self.tmpdir.name)
+
+    def tearDown(self):
+        sys.path.remove(self.tmpdir.name)
+        for name in ("_profiled_parent", "_profiled_child", "_profiled_worker", "_profiled_spawner"):
+            sys.modules.pop(name, None)
+        self.tmpdir.cleanup()
+
+    def test_records_self_and_cumulative_time(self):
+        """Waktu kumulatif parent mencakup child, waktu self tidak"""
+        with ImportProfiler() as profiler:
+            import _profiled_parent  # noqa: F401
+
+        self.assertNotIn(profiler, sys.meta_path)
+        parent_self, parent_total = profiler.records["_profiled_parent"]
+        child_self, child_total = profiler.records["_profiled_child"]
+        self.assertGreaterEqual(child_total, 0.02)
+        self.assertGreaterEqual(parent_total, child_total + 0.01)
+        self.assertLess(parent_self, parent_total - 0.015)
+
+        slowest = profiler.slowest(limit=1, prefix="_profiled")
+        self.assertEqual(slowest[0][0], "_profiled_parent")
+        self.assertIn("_profiled_child", profiler.format_report(prefix="_profiled"))
+
+    def test_module_keeps_original_loader(self):
+        """Modul yang diimport tidak menyimpan loader pembungkus"""
+        with ImportProfiler():
+            import _profiled_child
+        self.assertEqual(type(_profiled_child.__loader__).__name__, "SourceFileLoader")
+        self.assertIs(_profiled_child.__spec__.loader, _profiled_child.__loader__)
+
+    def test_imports_in_other_threads_are_attributed_separately(self):
+        """Import di thread lain tidak tercampur ke stack import thread utama"""
+        with ImportProfiler() as profiler:
+            import _profiled_spawner
+            _profiled_spawner.worker.join()
+
+        spawner_self, spawner_total = profiler.records["_profiled_spawner"]
+        worker_self, worker_total = profiler.records["_profiled_worker"]
+        self.assertGreaterEqual(worker_total, 0.05)
+        self.assertAlmostEqual(worker_self, worker_total, delta=0.005)
+        self.assertAlmostEqual(spawner_self, spawner_total, delta=0.005)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,222 @@
+"""
+Test cases untuk buffer XP dan cache settings cog Leveling
+"""
+
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+from src.cogs import leveling
+from src.cogs.leveling import Leveling
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+
+def _message(guild_id: int, user_id: int, channel_id: int = 5):
+    author = SimpleNamespace(bot=False, id=user_id, roles=[])
+    return SimpleNamespace(author=author, guild=SimpleNamespace(id=guild_id), channel=SimpleNamespace(id=channel_id))
+
+class _BrokenQueue:
+    async def submit(self, func, *args):
+        raise sqlite3.OperationalError("database is locked")
+
+class LevelingTestCase(unittest.TestCase):
+    """Cog Leveling tanpa bot, dengan database dan write queue sementara"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+        self.connect_patch = mock.patch("src.cogs.leveling.get_connection", self._connect)
+        self.connect_patch.start()
+        self.cog = self._leveling()
+        self.cog.setup_tables()
+        conn = self._connect()
+        # Cooldown 0 dan XP tetap agar hasil bisa diprediksi
+        conn.executemany(
+            "INSERT INTO leveling_settings (guild_id, min_xp, max_xp, cooldown) VALUES (?, 10, 10, 0)",
+            [("1",), ("2",)]
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.connect_patch.stop()
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _leveling(self) -> Leveling:
+        # Tanpa __init__: tidak membuat flush loop atau handler dispatcher
+        cog = object.__new__(Leveling)
+        cog.bot = None
+        cog.xp_states = {}
+        cog._flush_lock = asyncio.Lock()
+        cog.xp_metrics = {'buffered': 0, 'flushed_rows': 0, 'flushes': 0, 'flush_errors': 0}
+        cog.settings_cache = {}
+        cog.flush_task = mock.Mock()
+        return cog
+
+    def _run(self, scenario):
+        """Jalankan scenario(writer) dengan pool dan write queue di database test"""
+        async def run():
+            pool = ConnectionPool(self.db_path)
+            writer = WriteQueue(pool, window=0.001)
+            try:
+                with mock.patch("src.cogs.leveling.get_pool", lambda: pool), \
+                        mock.patch("src.cogs.leveling.get_write_queue", lambda: writer):
+                    return await scenario(writer)
+            finally:
+                await writer.close()
+                await pool.close()
+
+        return asyncio.run(run())
+
+    def _levels(self):
+        conn = self._connect()
+        try:
+            return {
+                (row['guild_id'], row['user_id']): (row['xp'], row['messages'])
+                for row in conn.execute("SELECT guild_id, user_id, xp, messages FROM user_levels")
+            }
+        finally:
+            conn.close()
+
+class TestXPBuffer(LevelingTestCase):
+    """Test cases untuk _XPState dan flush_xp"""
+
+    def test_xp_merged_per_user_and_flushed_in_one_batch(self):
+        """XP di-buffer per (guild, user) dan ditulis dengan satu executemany"""
+        conn = self._connect()
+        conn.execute("INSERT INTO user_levels (guild_id, user_id, xp, messages) VALUES ('1', '10', 100, 4)")
+        conn.commit()
+        conn.close()
+
+        async def scenario(writer):
+            for message in (_message(1, 10), _message(1, 10), _message(1, 10), _message(1, 11), _message(2, 10)):
+                await self.cog.on_message(message)
+            self.assertEqual(self._levels(), {('1', '10'): (100, 4)})
+            with mock.patch.object(leveling, "_flush_user_levels", wraps=leveling._flush_user_levels) as flush:
+                written = await self.cog.flush_xp()
+            return written, flush.call_args_list, writer.stats()['submitted']
+
+        written, calls, submitted = self._run(scenario)
+        self.assertEqual(written, 3)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(len(calls[0].args[1]), 3)
+        self.assertEqual(submitted, 1)
+        self.assertEqual(self._levels(), {
+            ('1', '10'): (130, 7),
+            ('1', '11'): (10, 1),
+            ('2', '10'): (10, 1),
+        })
+        self.assertEqual(self.cog.get_xp_metrics()['pending_rows'], 0)
+
+    def test_cog_unload_flushes_pending_xp(self):
+        """cog_unload menghentikan loop flush dan menulis XP yang tersisa"""
+        async def scenario(writer):
+            await self.cog.on_message(_message(1, 10))
+            await self.cog.on_message(_message(1, 10))
+            await self.cog.cog_unload()
+
+        self._run(scenario)
+        self.cog.flush_task.cancel.assert_called_once()
+        self.assertEqual(self._levels(), {('1', '10'): (20, 2)})
+
+    def test_failed_flush_keeps_buffered_xp(self):
+        """Flush yang gagal mengembalikan delta ke buffer untuk flush berikutnya"""
+        async def scenario(writer):
+            await self.cog.on_message(_message(1, 10))
+            with mock.patch("src.cogs.leveling.get_write_queue", _BrokenQueue):
+                failed = await self.cog.flush_xp()
+            state = self.cog.xp_states[('1', '10')]
+            pending = (state.pending_xp, state.pending_messages)
+            # XP yang masuk setelah flush gagal ikut di batch berikutnya
+            await self.cog.on_message(_message(1, 10))
+            written = await self.cog.flush_xp()
+            return failed, pending, written
+
+        failed, pending, written = self._run(scenario)
+        self.assertEqual((failed, pending, written), (0, (10, 1), 1))
+        self.assertEqual(self.cog.xp_metrics['flush_errors'], 1)
+        self.assertEqual(self._levels(), {('1', '10'): (20, 2)})
+
+class TestSettingsCache(LevelingTestCase):
+    """Test cases untuk GuildLevelSettings dan invalidate_settings"""
+
+    def _ctx(self, guild_id: int = 1):
+        return SimpleNamespace(guild=SimpleNamespace(id=guild_id), send=mock.AsyncMock())
+
+    def test_repeated_lookups_use_parsed_cache(self):
+        """Lookup berikutnya memakai settings yang sudah di-parse tanpa membaca database"""
+        conn = self._connect()
+        conn.execute("UPDATE leveling_settings SET ignored_channels = '7,8' WHERE guild_id = '1'")
+        conn.commit()
+        conn.close()
+
+        async def scenario(writer):
+            first = await self.cog.get_guild_settings(1)
+            with mock.patch("src.cogs.leveling.get_pool", side_effect=AssertionError("pool dibaca")):
+                second = await self.cog.get_guild_settings(1)
+            return first, second
+
+        first, second = self._run(scenario)
+        self.assertIs(first, second)
+        self.assertEqual(first.ignored_channels, frozenset({7, 8}))
+        self.assertEqual((first.min_xp, first.max_xp, first.cooldown), (10, 10, 0))
+
+    def test_missing_row_cached_as_defaults(self):
+        """Guild tanpa baris settings mendapat default yang juga ditulis ke database"""
+        async def scenario(writer):
+            settings = await self.cog.get_guild_settings(3)
+            return settings, await self.cog.get_guild_settings(3), writer.stats()['submitted']
+
+        settings, again, submitted = self._run(scenario)
+        self.assertIs(settings, again)
+        self.assertEqual(submitted, 1)
+        self.assertEqual((settings.min_xp, settings.max_xp, settings.cooldown), (15, 25, 60))
+        conn = self._connect()
+        try:
+            self.assertIsNotNone(
+                conn.execute("SELECT 1 FROM leveling_settings WHERE guild_id = '3'").fetchone()
+            )
+        finally:
+            conn.close()
+
+    def test_levelset_subcommands_invalidate_cache(self):
+        """Setiap subcommand levelset membuang cache sehingga bacaan berikutnya melihat nilai baru"""
+        channel = SimpleNamespace(id=123, mention="#general")
+        role = SimpleNamespace(id=456, mention="@member")
+        cases = [
+            (Leveling.toggle_leveling, (False,), lambda s: s.enabled is False),
+            (Leveling.set_announcement_channel, (channel,), lambda s: s.announcement_channel == 123),
+            (Leveling.set_xp_range, (5, 9), lambda s: (s.min_xp, s.max_xp) == (5, 9)),
+            (Leveling.set_cooldown, (7,), lambda s: s.cooldown == 7),
+            (Leveling.toggle_stack_rewards, (False,), lambda s: s.stack_rewards is False),
+            (Leveling.toggle_ignore_channel, (channel,), lambda s: s.ignored_channels == frozenset({123})),
+            (Leveling.toggle_ignore_channel, (channel,), lambda s: s.ignored_channels == frozenset()),
+            (Leveling.toggle_ignore_role, (role,), lambda s: s.ignored_roles == frozenset({456})),
+            (Leveling.toggle_double_xp_role, (role,), lambda s: s.double_xp_roles == frozenset({456})),
+        ]
+
+        async def scenario(writer):
+            results = []
+            for command, args, check in cases:
+                await self.cog.get_guild_settings(1)
+                await command.callback(self.cog, self._ctx(), *args)
+                cached = 1 in self.cog.settings_cache
+                results.append((command.name, cached, check(await self.cog.get_guild_settings(1))))
+            return results
+
+        for name, cached, updated in self._run(scenario):
+            with self.subTest(command=name):
+                self.assertFalse(cached)
+                self.assertTrue(updated)
+
+if __name__ == "__main__":
+    unittest.main()
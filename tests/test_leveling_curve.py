@@ -0,0 +1,40 @@
+"""
+Test cases untuk kurva leveling bersama
+"""
+
+import unittest
+
+from src.utils.leveling_curve import DEFAULT_CURVE, LINEAR_CURVE, LevelCurve
+
+def loop_level_for_xp(curve: LevelCurve, xp: int) -> int:
+    level = 0
+    while curve.xp_for_level(level + 1) <= xp:
+        level += 1
+    return level
+
+class TestLevelCurve(unittest.TestCase):
+    """Test cases untuk LevelCurve"""
+
+    def test_matches_linear_search(self):
+        """Hasil tabel bisect sama dengan loop lama di sekitar setiap threshold"""
+        for level in range(0, 300):
+            threshold = DEFAULT_CURVE.xp_for_level(level)
+            for xp in (threshold - 1, threshold, threshold + 1):
+                self.assertEqual(DEFAULT_CURVE.level_for_xp(xp), loop_level_for_xp(DEFAULT_CURVE, xp))
+
+    def test_closed_form_beyond_table(self):
+        """Invers kuadratik dipakai di luar tabel dan tetap tepat di threshold"""
+        curve = LevelCurve(5, 50, 100, table_levels=10)
+        for level in (10, 11, 250, 10_000):
+            threshold = curve.xp_for_level(level)
+            self.assertEqual(curve.level_for_xp(threshold), level)
+            self.assertEqual(curve.level_for_xp(threshold - 1), level - 1)
+
+    def test_linear_curve(self):
+        """Kurva linear: 100 XP per level"""
+        self.assertEqual(LINEAR_CURVE.level_for_xp(99), 0)
+        self.assertEqual(LINEAR_CURVE.level_for_xp(250), 2)
+        self.assertEqual(LINEAR_CURVE.level_for_xp(10 ** 9), 10 ** 7)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+Test cases untuk keyed lock table
+"""
+
+import asyncio
+import unittest
+
+from src.utils.lock_manager import KeyedLockTable
+
+class TestKeyedLockTable(unittest.TestCase):
+    """Test cases untuk KeyedLockTable"""
+
+    def test_entries_are_evicted_after_release(self):
+        """Entry lock dihapus setelah release, memori tidak tumbuh"""
+        async def scenario():
+            table = KeyedLockTable("test")
+            for i in range(1000):
+                key = f"purchase_{i}_ABC"
+                self.assertTrue(await table.acquire(key))
+                table.release(key)
+            return len(table), table.stats()
+
+        size, stats = asyncio.run(scenario())
+        self.assertEqual(size, 0)
+        self.assertEqual(stats['prefixes']['purchase']['acquired'], 1000)
+
+    def test_mutual_exclusion_and_contention_stats(self):
+        """Hanya satu pemegang per key, penunggu tercatat sebagai contention"""
+        async def scenario():
+            table = KeyedLockTable("test")
+            active = 0
+            peak = 0
+
+            async def worker():
+                nonlocal active, peak
+                await table.acquire("balance_update_Foo", timeout=1.0)
+                active += 1
+                peak = max(peak, active)
+                await asyncio.sleep(0.001)
+                active -= 1
+                table.release("balance_update_Foo")
+
+            await asyncio.gather(*(worker() for _ in range(5)))
+            return peak, len(table), table.stats()
+
+        peak, size, stats = asyncio.run(scenario())
+        self.assertEqual(peak, 1)
+        self.assertEqual(size, 0)
+        self.assertEqual(stats['prefixes']['balance']['contended'], 4)
+
+    def test_timeout_releases_reference(self):
+        """Timeout mengembalikan False dan tidak meninggalkan entry"""
+        async def scenario():
+            table = KeyedLockTable("test")
+            await table.acquire("deposit_1")
+            acquired = await table.acquire("deposit_1", timeout=0.01)
+            table.release("deposit_1")
+            return acquired, len(table), table.stats()
+
+        acquired, size, stats = asyncio.run(scenario())
+        self.assertFalse(acquired)
+        self.assertEqual(size, 0)
+        self.assertEqual(stats['prefixes']['deposit']['timeouts'], 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+"""
+Test cases untuk pemuatan cog paralel berbasis dependensi di ModuleLoader
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from src.bot.module_loader import ModuleLoader
+
+class FakeBot:
+    """Bot palsu yang mencatat kapan setiap extension mulai dan selesai dimuat"""
+
+    def __init__(self, failing=()):
+        self.events = []
+        self.failing = set(failing)
+
+    async def load_extension(self, name):
+        self.events.append(("start", name))
+        await asyncio.sleep(0.01)
+        if name in self.failing:
+            raise RuntimeError("boom")
+        self.events.append(("end", name))
+
+class TestCogDependencyLoading(unittest.TestCase):
+    """Test cases untuk DAG dependensi cog"""
+
+    def _load(self, bot, cogs, dependencies):
+        loader = ModuleLoader(bot)
+        loader._cog_dependencies = dependencies
+        with patch.object(ModuleLoader, "_discover_cogs", return_value=cogs):
+            result = asyncio.run(loader._load_cogs())
+        return loader, result
+
+    def test_dependents_wait_and_independent_cogs_run_concurrently(self):
+        """Cog menunggu dependensinya, cog lain dimuat bersamaan"""
+        bot = FakeBot()
+        loader, result = self._load(
+            bot, ["stock", "buttons", "leveling", "automod"], {"buttons": ("stock",)}
+        )
+        self.assertEqual(result, (4, 0))
+        events = bot.events
+        self.assertLess(events.index(("end", "stock")), events.index(("start", "buttons")))
+        # leveling dan automod mulai sebelum stock selesai
+        self.assertLess(events.index(("start", "automod")), events.index(("end", "stock")))
+        self.assertEqual(set(loader.get_cog_load_times()), {"stock", "buttons", "leveling", "automod"})
+
+    def test_failed_dependency_and_cycle(self):
+        """Dependensi gagal membuat dependent gagal, siklus tidak dimuat"""
+        bot = FakeBot(failing={"stock"})
+        loader, result = self._load(
+            bot, ["stock", "buttons", "a", "b", "solo"],
+            {"buttons": ("stock",), "a": ("b",), "b": ("a",), "solo": ("missing",)}
+        )
+        self.assertEqual(result, (1, 4))
+        failed = dict(loader.get_failed_modules())
+        self.assertEqual(set(failed), {"stock", "buttons", "a", "b"})
+        self.assertNotIn(("start", "buttons"), bot.events)
+
+    def test_source_scan_cached_by_mtime(self):
+        """COG_DEPENDENCIES dibaca dari source, file yang tidak berubah tidak dibaca ulang"""
+        loader = ModuleLoader(FakeBot())
+        with tempfile.TemporaryDirectory() as tmpdir:
+            path = Path(tmpdir) / "cog.py"
+            path.write_text("COG_DEPENDENCIES = ('src.cogs.live_stock',)\nasync def setup(bot):\n    pass\n")
+            source = loader._scan_source(path)
+            self.assertEqual(source.dependencies, ('src.cogs.live_stock',))
+            self.assertTrue(loader._validate_cog_file(path))
+
+            with patch("builtins.open", side_effect=AssertionError("dibaca ulang")):
+                self.assertIs(loader._scan_source(path), source)
+
+            path.write_text("class Helper:\n    pass\n\n")
+            os.utime(path, ns=(0, 0))
+            self.assertFalse(loader._validate_cog_file(path))
+
+if __name__ == "__main__":
+    unittest.main()
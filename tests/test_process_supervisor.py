@@ -0,0 +1,139 @@
+"""
+Test cases untuk process supervisor tenant bot
+"""
+
+import asyncio
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.utils.process_supervisor import PortRegistry, ProcessSupervisor
+
+class TestPortRegistry(unittest.TestCase):
+    """Test cases untuk PortRegistry"""
+
+    def test_allocate_reserve_release(self):
+        """Port unik per owner, port yang di-reserve dilewati, port dilepas bisa dipakai lagi"""
+        ports = PortRegistry(base_port=9000, size=3)
+        self.assertTrue(ports.reserve("old", 9001))
+        self.assertEqual(ports.allocate("a"), 9000)
+        self.assertEqual(ports.allocate("a"), 9000)
+        self.assertEqual(ports.allocate("b"), 9002)
+        self.assertFalse(ports.reserve("c", 9002))
+        with self.assertRaises(RuntimeError):
+            ports.allocate("c")
+        self.assertEqual(ports.release("a"), 9000)
+        self.assertEqual(ports.allocate("c"), 9000)
+
+class TestProcessSupervisor(unittest.TestCase):
+    """Test cases untuk ProcessSupervisor"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_streams_output_to_log_and_restarts_with_backoff(self):
+        """Output child masuk ke file log, child yang crash di-restart sampai batas"""
+        exits = []
+        starts = []
+
+        async def run():
+            supervisor = ProcessSupervisor(
+                log_dir=self.tmpdir.name, backoff_base=0.01, max_restarts=2, heartbeat_interval=60
+            )
+
+            async def on_start(key, pid):
+                starts.append(pid)
+
+            async def on_exit(key, returncode, will_restart):
+                exits.append((returncode, will_restart))
+
+            supervisor.on_start = on_start
+            supervisor.on_exit = on_exit
+            script = "import sys\nfor i in range(2000): print('line', i)\nsys.exit(3)"
+            await supervisor.start("tenant1", [sys.executable, "-c", script])
+            for _ in range(200):
+                if supervisor.info("tenant1")['status'] == "failed":
+                    break
+                await asyncio.sleep(0.05)
+            info = supervisor.info("tenant1")
+            await supervisor.close()
+            return info
+
+        info = asyncio.run(run())
+        self.assertEqual(info['status'], "failed")
+        self.assertEqual(len(starts), 3)
+        self.assertEqual(exits, [(3, True), (3, True), (3, False)])
+        log = (Path(self.tmpdir.name) / "tenant1.log").read_text()
+        self.assertIn("line 1999", log)
+
+    def test_stop_and_heartbeat(self):
+        """Heartbeat melaporkan child yang hidup, stop menghentikan child tanpa restart"""
+        beats = []
+
+        async def run():
+            supervisor = ProcessSupervisor(log_dir=self.tmpdir.name, heartbeat_interval=0.05)
+
+            async def on_heartbeat(keys):
+                beats.append(list(keys))
+
+            supervisor.on_heartbeat = on_heartbeat
+            await supervisor.start("tenant2", [sys.executable, "-c", "import time; time.sleep(30)"])
+            await asyncio.sleep(0.2)
+            self.assertTrue(supervisor.is_running("tenant2"))
+            self.assertTrue(await supervisor.stop("tenant2", timeout=5))
+            self.assertFalse(supervisor.is_running("tenant2"))
+            self.assertFalse(await supervisor.stop("tenant2"))
+            await supervisor.close()
+
+        asyncio.run(run())
+        self.assertIn(["tenant2"], beats)
+
+    def test_supervised_while_waiting_for_restart(self):
+        """Selama backoff restart key tetap diawasi dan start kedua ditolak"""
+        async def run():
+            supervisor = ProcessSupervisor(log_dir=self.tmpdir.name, backoff_base=30, heartbeat_interval=60)
+            await supervisor.start("tenant4", [sys.executable, "-c", "raise SystemExit(1)"])
+            for _ in range(100):
+                if supervisor.info("tenant4")['status'] == "restarting":
+                    break
+                await asyncio.sleep(0.05)
+            self.assertFalse(supervisor.is_running("tenant4"))
+            self.assertTrue(supervisor.is_supervised("tenant4"))
+            with self.assertRaises(RuntimeError):
+                await supervisor.start("tenant4", [sys.executable, "-c", "pass"])
+            self.assertTrue(await supervisor.stop("tenant4"))
+            self.assertFalse(supervisor.is_supervised("tenant4"))
+            await supervisor.close()
+
+        asyncio.run(run())
+
+    def test_over_long_line_does_not_stall_reader(self):
+        """Baris lebih panjang dari limit StreamReader tetap dikuras, child bisa selesai"""
+        async def run():
+            supervisor = ProcessSupervisor(log_dir=self.tmpdir.name, max_restarts=0, heartbeat_interval=60)
+            script = (
+                "import sys\n"
+                "sys.stdout.write('x' * 200000 + '\\n')\n"
+                "for i in range(5000): print('after', i)\n"
+            )
+            await supervisor.start("tenant3", [sys.executable, "-c", script])
+            for _ in range(200):
+                if supervisor.info("tenant3")['status'] == "failed":
+                    break
+                await asyncio.sleep(0.05)
+            info = supervisor.info("tenant3")
+            await supervisor.close()
+            return info
+
+        info = asyncio.run(run())
+        self.assertEqual(info['status'], "failed")
+        self.assertEqual(info['last_returncode'], 0)
+        log = (Path(self.tmpdir.name) / "tenant3.log").read_text()
+        self.assertIn("after 4999", log)
+
+if __name__ == "__main__":
+    unittest.main()
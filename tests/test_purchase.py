@@ -0,0 +1,226 @@
+"""
+Test cases untuk pembelian atomik dan update balance lewat write queue
+"""
+
+import asyncio
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.database.migrations import _create_product_tables, _create_user_tables, ensure_schema
+from src.database.models.balance import Balance
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+from src.services.balance_service import BalanceCallbackManager, BalanceManagerService
+from src.services.transaction_service import TransactionCallbackManager, TransactionManager
+from src.utils.base_handler import BaseLockHandler
+
+class _MemoryCache:
+    """Pengganti CacheManager in-memory untuk test"""
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, expires_in=None):
+        self.data[key] = value
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+class TestAtomicPurchase(unittest.TestCase):
+    """Test cases untuk TransactionManager.process_purchase"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+        conn = sqlite3.connect(self.db_path)
+        cursor = conn.cursor()
+        asyncio.run(_create_user_tables(cursor))
+        asyncio.run(_create_product_tables(cursor))
+        ensure_schema(cursor)
+        cursor.execute("INSERT INTO users (growid, balance_wl) VALUES ('Fdy', 0)")
+        cursor.execute("UPDATE users SET balance_dl = 10 WHERE growid = 'Fdy'")
+        cursor.execute("INSERT INTO user_growid (discord_id, growid) VALUES ('42', 'Fdy')")
+        cursor.execute("INSERT INTO products (code, name, price) VALUES ('ACC', 'Account', 300)")
+        cursor.executemany(
+            "INSERT INTO stock (product_code, content, added_by) VALUES ('ACC', ?, 'admin')",
+            [("acc-1",), ("acc-2",)]
+        )
+        conn.commit()
+        conn.close()
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _managers(self):
+        balance = object.__new__(BalanceManagerService)
+        BaseLockHandler.__init__(balance)
+        balance.bot = None
+        balance.cache_manager = _MemoryCache()
+        balance.callback_manager = BalanceCallbackManager()
+        balance.initialized = True
+
+        transactions = object.__new__(TransactionManager)
+        BaseLockHandler.__init__(transactions)
+        transactions.bot = None
+        transactions.cache_manager = balance.cache_manager
+        transactions._product_manager = None
+        transactions._balance_manager = balance
+        transactions.callback_manager = TransactionCallbackManager()
+        transactions.initialized = True
+        return transactions, balance
+
+    def _run(self, scenario):
+        """Jalankan scenario(transactions, balance) dengan write queue di database test"""
+        async def run():
+            pool = ConnectionPool(self.db_path)
+            writer = WriteQueue(pool, window=0.001)
+            transactions, balance = self._managers()
+            try:
+                with mock.patch("src.services.balance_service.get_connection", self._connect), \
+                        mock.patch("src.services.balance_service.get_write_queue", lambda: writer), \
+                        mock.patch("src.services.transaction_service.get_write_queue", lambda: writer):
+                    return await scenario(transactions, balance)
+            finally:
+                await writer.close()
+                await pool.close()
+
+        return asyncio.run(run())
+
+    def _state(self):
+        conn = self._connect()
+        try:
+            user = conn.execute(
+                "SELECT balance_wl, balance_dl, balance_bgl FROM users WHERE growid = 'Fdy'"
+            ).fetchone()
+            return {
+                'total_wl': user[0] + user[1] * 100 + user[2] * 10000,
+                'available': conn.execute(
+                    "SELECT COUNT(*) FROM stock WHERE status = 'available'"
+                ).fetchone()[0],
+                'ledger': [tuple(row) for row in conn.execute(
+                    "SELECT type, old_balance, new_balance FROM balance_transactions ORDER BY id"
+                )],
+                'transactions': [tuple(row) for row in conn.execute(
+                    "SELECT buyer_id, product_code, quantity, total_price, status FROM transactions"
+                )],
+                'stock_counts': dict(
+                    (row[0], row[1]) for row in conn.execute(
+                        "SELECT status, count FROM stock_counts WHERE product_code = 'ACC'"
+                    )
+                )
+            }
+        finally:
+            conn.close()
+
+    def test_successful_purchase_writes_both_ledgers(self):
+        """Pembelian mengklaim stock, mendebit balance dan menulis kedua ledger"""
+        async def scenario(transactions, balance):
+            response = await transactions.process_purchase('42', 'ACC', 1)
+            return response, balance.cache_manager.data.get('balance_Fdy')
+
+        response, cached = self._run(scenario)
+        self.assertTrue(response.success, response.error)
+        self.assertEqual(response.data['content'], ['acc-1'])
+        self.assertEqual(response.data['total_paid'], 300)
+
+        state = self._state()
+        self.assertEqual(state['total_wl'], 700)
+        self.assertEqual(state['available'], 1)
+        self.assertEqual(state['ledger'], [('purchase', '10 DL', '7 DL')])
+        self.assertEqual(state['transactions'], [('42', 'ACC', 1, 300, 'completed')])
+        self.assertEqual(state['stock_counts'], {'available': 1, 'sold': 1})
+        self.assertEqual(cached.total_wl(), 700)
+
+    def test_insufficient_balance_changes_nothing(self):
+        """Balance tidak cukup ditolak tanpa menyentuh stock atau ledger"""
+        before = self._state()
+
+        async def scenario(transactions, balance):
+            await transactions.process_purchase('42', 'ACC', 1)
+            conn = self._connect()
+            conn.execute("UPDATE products SET price = 5000 WHERE code = 'ACC'")
+            conn.commit()
+            conn.close()
+            return await transactions.process_purchase('42', 'ACC', 1)
+
+        response = self._run(scenario)
+        self.assertFalse(response.success)
+        self.assertIn("Balance tidak cukup", response.error)
+        state = self._state()
+        self.assertEqual(state['total_wl'], before['total_wl'] - 300)
+        self.assertEqual(state['available'], 1)
+        self.assertEqual(len(state['transactions']), 1)
+
+    def test_out_of_stock_rolls_back_everything(self):
+        """Stock yang terklaim kurang dari quantity membatalkan seluruh pembelian"""
+        before = self._state()
+
+        async def scenario(transactions, balance):
+            return await transactions.process_purchase('42', 'ACC', 3)
+
+        response = self._run(scenario)
+        self.assertFalse(response.success)
+        self.assertIn("Stock Habis", response.error)
+        self.assertEqual(self._state(), before)
+
+    def test_debit_prefers_keeping_bgl(self):
+        """_debit_balance mengurangi dari WL/DL sebelum memecah BGL"""
+        transactions, _ = self._managers()
+        new_balance = transactions._debit_balance(Balance(50, 3, 1), 120)
+        self.assertEqual(new_balance.total_wl(), 50 + 300 + 10000 - 120)
+        self.assertEqual(new_balance.bgl, 1)
+
+    def test_concurrent_purchase_and_balance_update_keep_both_changes(self):
+        """Pembelian dan donasi bersamaan untuk GrowID sama tidak saling menimpa"""
+        async def scenario(transactions, balance):
+            # Cache balance sudah terisi sebelum keduanya berjalan
+            await balance.get_balance('Fdy')
+            return await asyncio.gather(
+                transactions.process_purchase('42', 'ACC', 1),
+                balance.update_balance('Fdy', wl=50, details="Donation"),
+            )
+
+        purchase, update = self._run(scenario)
+        self.assertTrue(purchase.success, purchase.error)
+        self.assertTrue(update.success, update.error)
+        state = self._state()
+        self.assertEqual(state['total_wl'], 1000 - 300 + 50)
+        self.assertEqual(len(state['ledger']), 2)
+
+    def test_update_balance_ignores_stale_cached_balance(self):
+        """update_balance menghitung dari balance di database, bukan cache yang basi"""
+        async def scenario(transactions, balance):
+            await balance.get_balance('Fdy')
+            # Perubahan lewat jalur lain setelah cache terisi
+            await transactions.process_purchase('42', 'ACC', 1)
+            balance.cache_manager.data['balance_Fdy'] = Balance(0, 10, 0)
+            return await balance.update_balance('Fdy', wl=50, details="Donation")
+
+        response = self._run(scenario)
+        self.assertTrue(response.success, response.error)
+        self.assertEqual(response.data.total_wl(), 750)
+        self.assertEqual(self._state()['total_wl'], 750)
+
+    def test_update_balance_rejects_overdraw(self):
+        """Withdraw melebihi balance di database ditolak"""
+        async def scenario(transactions, balance):
+            return await balance.update_balance('Fdy', dl=-11, details="Withdraw")
+
+        response = self._run(scenario)
+        self.assertFalse(response.success)
+        self.assertIn("tidak cukup", response.error)
+        self.assertEqual(self._state()['ledger'], [])
+
+if __name__ == "__main__":
+    unittest.main()
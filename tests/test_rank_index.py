@@ -0,0 +1,84 @@
+"""
+Test cases untuk rank index leaderboard
+"""
+
+import random
+import sqlite3
+import unittest
+
+from src.utils.rank_index import GuildRanking, RankIndex
+
+class TestRankIndex(unittest.TestCase):
+    """Test cases untuk GuildRanking dan RankIndex"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("""
+            CREATE TABLE user_levels (
+                guild_id TEXT NOT NULL,
+                user_id TEXT NOT NULL,
+                xp INTEGER DEFAULT 0,
+                level INTEGER DEFAULT 0,
+                messages INTEGER DEFAULT 0,
+                PRIMARY KEY (guild_id, user_id)
+            )
+        """)
+        rng = random.Random(7)
+        self.rows = [("g1", str(i), rng.randint(0, 50)) for i in range(200)]
+        self.conn.executemany("INSERT INTO user_levels (guild_id, user_id, xp) VALUES (?, ?, ?)", self.rows)
+        self.conn.execute("INSERT INTO user_levels (guild_id, user_id, xp) VALUES ('g2', '1', 999)")
+
+    def tearDown(self):
+        self.conn.close()
+
+    def _sql_rank(self, user_id):
+        """Rank versi lama: COUNT(xp > milik user) + 1"""
+        return self.conn.execute("""
+            SELECT COUNT(*) + 1 FROM user_levels
+            WHERE guild_id = 'g1' AND xp > (SELECT xp FROM user_levels WHERE guild_id = 'g1' AND user_id = ?)
+        """, (user_id,)).fetchone()[0]
+
+    def test_rank_matches_count_query(self):
+        """Rank dari memory dan dari SQL sama dengan query COUNT lama"""
+        for use_memory in (True, False):
+            index = RankIndex('user_levels', 'xp', ('user_id', 'xp'), use_memory=use_memory)
+            index.ensure_index(self.conn)
+            for _, user_id, _ in self.rows[:50]:
+                self.assertEqual(index.rank(self.conn, 'g1', user_id), self._sql_rank(user_id))
+            self.assertIsNone(index.rank(self.conn, 'g1', 'missing'))
+
+    def test_pages_cover_leaderboard_in_order(self):
+        """Halaman keyset menyambung tanpa duplikat dan urut xp DESC, user_id"""
+        expected = [(row['user_id'], row['xp']) for row in self.conn.execute(
+            "SELECT user_id, xp FROM user_levels WHERE guild_id = 'g1' ORDER BY xp DESC, user_id"
+        )]
+        for use_memory in (True, False):
+            index = RankIndex('user_levels', 'xp', ('user_id', 'xp'), use_memory=use_memory)
+            self.assertEqual(index.count(self.conn, 'g1'), 200)
+            collected = []
+            for page in range(1, 22):
+                collected += [(row['user_id'], row['xp']) for row in index.page(self.conn, 'g1', page, 10)]
+            self.assertEqual(collected, expected)
+
+    def test_record_updates_loaded_guild(self):
+        """record() menggeser posisi user di guild yang sudah dimuat"""
+        index = RankIndex('user_levels', 'xp', ('user_id', 'xp'))
+        index.rank(self.conn, 'g1', '0')
+        index.record('g1', '0', 10_000)
+        self.assertEqual(index.rank(self.conn, 'g1', '0'), 1)
+        # Guild yang belum dimuat tidak disentuh
+        index.record('g3', '5', 1)
+        self.assertEqual(index.get_stats()['guilds_loaded'], 1)
+
+    def test_min_score_excludes_rows(self):
+        """Baris dengan skor <= min_score tidak masuk leaderboard"""
+        ranking = GuildRanking([('a', 5), ('b', 0), ('c', 3), ('d', 5)])
+        self.assertEqual(ranking.count_above(0), 3)
+        self.assertEqual(ranking.rank('d'), 1)
+        self.assertEqual(ranking.rank('c'), 3)
+        ranking.remove('a')
+        self.assertEqual(ranking.top(0, 2), [(5, 'd'), (3, 'c')])
+
+if __name__ == "__main__":
+    unittest.main()
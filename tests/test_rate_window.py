@@ -0,0 +1,41 @@
+"""
+Test cases untuk sliding window counter (deteksi spam AutoMod)
+"""
+
+import unittest
+
+from src.utils.rate_window import SlidingWindowCounter
+
+class TestSlidingWindowCounter(unittest.TestCase):
+    """Test cases untuk SlidingWindowCounter"""
+
+    def test_threshold_within_timeframe(self):
+        """Threshold tercapai hanya jika cukup banyak event dalam timeframe"""
+        counter = SlidingWindowCounter()
+        hits = [counter.hit("u", threshold=3, timeframe=5, now=t) for t in (0, 1, 2)]
+        self.assertEqual(hits, [False, False, True])
+        # Event lama keluar dari jendela
+        self.assertFalse(counter.hit("u", threshold=3, timeframe=5, now=10))
+        self.assertEqual(counter.count("u", timeframe=5, now=10), 1)
+
+    def test_threshold_change_keeps_recent_events(self):
+        """Perubahan threshold tidak membuang timestamp terbaru"""
+        counter = SlidingWindowCounter()
+        for t in (0, 1, 2):
+            counter.hit("u", threshold=5, timeframe=10, now=t)
+        self.assertTrue(counter.hit("u", threshold=2, timeframe=10, now=3))
+
+    def test_idle_and_lru_eviction(self):
+        """Key idle dan key tertua di atas max_keys dibuang"""
+        counter = SlidingWindowCounter(max_keys=3, idle_ttl=60)
+        for i in range(5):
+            counter.hit(i, threshold=5, timeframe=5, now=i)
+        self.assertEqual(len(counter), 3)
+        self.assertNotIn(0, counter)
+
+        counter.hit("fresh", threshold=5, timeframe=5, now=100)
+        self.assertEqual(len(counter), 1)
+        self.assertEqual(counter.evict_idle(now=1000), 1)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+"""
+Test cases untuk counter stock per product dan status
+"""
+
+import sqlite3
+import unittest
+
+from src.database.migrations import ensure_schema, rebuild_stock_counts
+
+class TestStockCounters(unittest.TestCase):
+    """Test cases untuk tabel stock_counts dan trigger-nya"""
+
+    def setUp(self):
+        self.conn = sqlite3.connect(":memory:")
+        self.conn.execute("""
+            CREATE TABLE stock (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                product_code TEXT NOT NULL,
+                content TEXT NOT NULL UNIQUE,
+                status TEXT DEFAULT 'available'
+            )
+        """)
+        self.conn.executemany(
+            "INSERT INTO stock (product_code, content) VALUES (?, ?)",
+            [("A", "a1"), ("A", "a2"), ("B", "b1")]
+        )
+        ensure_schema(self.conn.cursor())
+
+    def tearDown(self):
+        self.conn.close()
+
+    def counts(self):
+        return {
+            (code, status): count
+            for code, status, count in self.conn.execute(
+                "SELECT product_code, status, count FROM stock_counts WHERE count > 0"
+            )
+        }
+
+    def test_backfill_existing_stock(self):
+        """Counter diisi dari stock yang sudah ada saat tabel dibuat"""
+        self.assertEqual(self.counts(), {("A", "available"): 2, ("B", "available"): 1})
+
+    def test_triggers_follow_writes(self):
+        """Insert, update status dan delete memperbarui counter"""
+        self.conn.execute("INSERT INTO stock (product_code, content) VALUES ('A', 'a3')")
+        self.conn.execute("UPDATE stock SET status = 'sold' WHERE content IN ('a1', 'a2')")
+        self.conn.execute("DELETE FROM stock WHERE content = 'b1'")
+        self.assertEqual(self.counts(), {("A", "available"): 1, ("A", "sold"): 2})
+        self.assertEqual(rebuild_stock_counts(self.conn.cursor()), {})
+
+    def test_rebuild_reports_drift(self):
+        """Rekonsiliasi memperbaiki counter yang melenceng"""
+        self.conn.execute("UPDATE stock_counts SET count = 7 WHERE product_code = 'B'")
+        drift = rebuild_stock_counts(self.conn.cursor())
+        self.assertEqual(drift, {("B", "available"): (7, 1)})
+        self.assertEqual(self.counts()[("B", "available")], 1)
+
+if __name__ == "__main__":
+    unittest.main()
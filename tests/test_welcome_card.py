@@ -0,0 +1,113 @@
+"""
+Test cases untuk renderer kartu welcome
+"""
+
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+from pathlib import Path
+
+from PIL import Image
+
+from src.utils.welcome_card import WelcomeCardRenderer
+
+class FakeResponse:
+    def __init__(self, status, data):
+        self.status = status
+        self._data = data
+
+    async def read(self):
+        return self._data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+class FakeSession:
+    """Session palsu yang mencatat URL yang diambil"""
+
+    def __init__(self, data=b"avatar"):
+        self.data = data
+        self.requests = []
+        self.closed = False
+
+    def get(self, url):
+        self.requests.append(url)
+        return FakeResponse(200, self.data)
+
+def _png(size, color) -> bytes:
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+class TestWelcomeCardRenderer(unittest.TestCase):
+    """Test cases untuk WelcomeCardRenderer"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.background = Path(self.tmpdir.name) / "welcome_bg.png"
+        self.background.write_bytes(_png((800, 450), (40, 80, 160)))
+        self.renderer = WelcomeCardRenderer(font_path="", background_path=f"{self.tmpdir.name}/")
+
+    def tearDown(self):
+        self.renderer._executor and self.renderer._executor.shutdown(wait=True)
+        self.tmpdir.cleanup()
+
+    def test_skips_when_too_many_pending(self):
+        """Render dilewati (None) saat antrian render penuh"""
+        self.renderer.max_pending = 0
+        result = asyncio.run(self.renderer.render("https://cdn/avatar.png", [], {}))
+        self.assertIsNone(result)
+        self.assertEqual(self.renderer.stats()['skipped'], 1)
+
+    def test_avatar_lru(self):
+        """Avatar di-cache per URL, entri tertua dibuang saat cache penuh"""
+        session = FakeSession()
+
+        async def get_session():
+            return session
+
+        self.renderer._get_session = get_session
+        self.renderer.avatar_cache_size = 2
+
+        async def run():
+            for url in ("a", "b", "a", "c", "b"):
+                await self.renderer.fetch_avatar(url)
+
+        asyncio.run(run())
+        # "b" dibuang saat "c" masuk, jadi diambil ulang
+        self.assertEqual(session.requests, ["a", "b", "c", "b"])
+        stats = self.renderer.stats()
+        self.assertEqual((stats['avatar_hits'], stats['avatar_misses']), (1, 4))
+        self.assertEqual(stats['avatar_cache'], 2)
+
+    def test_background_cache_invalidated_on_mtime_change(self):
+        """Background yang sudah di-blur dipakai ulang sampai file berubah"""
+        first = self.renderer._background(str(self.background))
+        self.assertIs(self.renderer._background(str(self.background)), first)
+
+        self.background.write_bytes(_png((800, 450), (200, 20, 20)))
+        stat = self.background.stat()
+        os.utime(self.background, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        second = self.renderer._background(str(self.background))
+        self.assertIsNot(second, first)
+        self.assertEqual(second.getpixel((400, 225))[:3], (200, 20, 20))
+
+    def test_render_sync_returns_png(self):
+        """_render_sync menghasilkan PNG dengan ukuran background"""
+        self.renderer._font = lambda path, size: None  # font default PIL
+        data = self.renderer._render_sync(
+            str(self.background), "title.ttf", "subtitle.ttf",
+            _png((128, 128), (255, 255, 0)),
+            (("Welcome tester!", (450, 280), 'title', "white"),)
+        )
+        self.assertTrue(data.startswith(b"\x89PNG"))
+        with Image.open(io.BytesIO(data)) as card:
+            self.assertEqual(card.size, (800, 450))
+
+if __name__ == "__main__":
+    unittest.main()
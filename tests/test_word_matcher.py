@@ -0,0 +1,42 @@
+"""
+Test cases untuk banned word matcher AutoMod
+"""
+
+import re
+import unittest
+
+from src.utils.word_matcher import BannedWordMatcher, trie_pattern
+
+class TestBannedWordMatcher(unittest.TestCase):
+    """Test cases untuk BannedWordMatcher"""
+
+    def test_words_match_whole_words_only(self):
+        """Kata terlarang hanya cocok sebagai kata utuh, case-insensitive"""
+        matcher = BannedWordMatcher(["ass", "bad", "badass"])
+        self.assertEqual(matcher.search("You are a BADASS!"), "badass")
+        self.assertEqual(matcher.search("that was bad."), "bad")
+        self.assertEqual(matcher.search("first class"), "")
+        self.assertEqual(matcher.search("badly done"), "")
+
+    def test_wildcards(self):
+        """'*' cocok dengan karakter non-spasi, pattern tanpa '*' cocok sebagai substring"""
+        matcher = BannedWordMatcher([], ["f*ck", "scam"])
+        self.assertEqual(matcher.search("what the fu*ck"), "f*ck")
+        self.assertEqual(matcher.search("free scamcoin"), "scam")
+        self.assertEqual(matcher.search("f ck"), "")
+
+    def test_trie_pattern_equivalent_to_alternation(self):
+        """Regex trie menerima tepat kata-kata yang sama dengan alternation biasa"""
+        words = ["a", "ab", "abc", "b.d", "bar", "baz", "x"]
+        regex = re.compile(f"(?:{trie_pattern(words)})")
+        for candidate in words + ["abd", "ba", "bxd", "", "abcd"]:
+            self.assertEqual(bool(regex.fullmatch(candidate)), candidate in words, candidate)
+
+    def test_empty_matcher(self):
+        """Matcher tanpa kata tidak pernah cocok"""
+        matcher = BannedWordMatcher([" ", ""], ["*"])
+        self.assertEqual(len(matcher), 0)
+        self.assertEqual(matcher.search("anything"), "")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test cases untuk single-writer queue (group commit)
+"""
+
+import asyncio
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.database.pool import ConnectionPool
+from src.database.write_queue import WriteQueue
+
+class TestWriteQueue(unittest.TestCase):
+    """Test cases untuk WriteQueue"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.db_path = Path(self.tmpdir.name) / "test.db"
+
+    def tearDown(self):
+        self.tmpdir.cleanup()
+
+    def test_concurrent_writes_are_grouped(self):
+        """Write yang datang bersamaan digabung ke satu commit"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path)
+            await pool.run(lambda conn: conn.execute("CREATE TABLE t (x INTEGER)"))
+            writer = WriteQueue(pool, window=0.01)
+
+            def insert(conn, value):
+                conn.execute("INSERT INTO t VALUES (?)", (value,))
+                return value
+
+            results = await asyncio.gather(*(writer.submit(insert, i) for i in range(20)))
+            count = await pool.run(lambda conn: conn.execute("SELECT COUNT(*) FROM t").fetchone()[0])
+            stats = writer.stats()
+            await writer.close()
+            await pool.close()
+            return results, count, stats
+
+        results, count, stats = asyncio.run(scenario())
+        self.assertEqual(results, list(range(20)))
+        self.assertEqual(count, 20)
+        self.assertLess(stats['batches'], 20)
+        self.assertEqual(stats['succeeded'], 20)
+
+    def test_failed_intent_does_not_abort_batch(self):
+        """Intent yang gagal hanya membatalkan write miliknya sendiri"""
+        async def scenario():
+            pool = ConnectionPool(self.db_path)
+            await pool.run(lambda conn: conn.execute("CREATE TABLE t (x INTEGER UNIQUE)"))
+            writer = WriteQueue(pool, window=0.01)
+
+            def insert(conn, value):
+                conn.execute("INSERT INTO t VALUES (?)", (value,))
+
+            results = await asyncio.gather(
+                writer.submit(insert, 1),
+                writer.submit(insert, 1),
+                writer.submit(insert, 2),
+                return_exceptions=True
+            )
+            rows = await pool.run(lambda conn: [r[0] for r in conn.execute("SELECT x FROM t ORDER BY x")])
+            await writer.close()
+            await pool.close()
+            return results, rows
+
+        results, rows = asyncio.run(scenario())
+        self.assertIsNone(results[0])
+        self.assertIsInstance(results[1], Exception)
+        self.assertIsNone(results[2])
+        self.assertEqual(rows, [1, 2])
+
+if __name__ == "__main__":
+    unittest.main()